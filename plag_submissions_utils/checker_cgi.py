@@ -1,31 +1,32 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import cgi
 import cgitb
 cgitb.enable()
 
 import logging
+import os
 import os.path as fs
 import tempfile
 import shutil
 
 import sys
 
-from jinja2 import Template
-
 
 sys.path.append("/compiled/python")
 from . import common_runner
+from .report import render_report
+from .common import upload
 
 
 def print_resp(text):
     print("Content-Type: text/html; charset=utf-8")
     print()
-    print(text.encode("utf-8"))
+    sys.stdout.flush()
+    sys.stdout.buffer.write(text.encode("utf-8"))
 
-def print_err(text):
-    print("Status: 500 Internal error")
+def print_err(text, status = "500 Internal error"):
+    print("Status: %s" % status)
     print()
     print(text)
 
@@ -38,7 +39,8 @@ def main():
 
     temp_dir = tempfile.mkdtemp()
     try:
-        form = cgi.FieldStorage()
+        #oversized uploads are rejected while the form is parsed
+        form = upload.parse_form(sys.stdin.buffer, os.environ, temp_dir)
 
         if "file" not in form:
             print_err("no 'file' field in uploaded form")
@@ -47,26 +49,16 @@ def main():
         upl_file_ext = fs.splitext(upl_file_form.filename)[1]
 
         arch_path = fs.join(temp_dir, "arch%s" % upl_file_ext)
-        with open(arch_path, 'w') as f:
-            f.write(upl_file_form.file.read())
-            f.flush()
+        upload.save_form_file(upl_file_form, arch_path)
 
         metrics, errors, stat = common_runner.run(arch_path,
                                                   form.getvalue("version", "1"))
 
-        data_dir = \
-        fs.dirname(fs.dirname(fs.realpath(__file__)))
-        with open(fs.join(data_dir, "data/templates/report.html.j2"), 'r') as f:
-            template = f.read()
-        jinja_html_template = Template(template.decode("utf-8"))
-
-        print_resp(jinja_html_template.render({
-            "checked_filename": upl_file_form.filename,
-            "errors" : errors,
-            "metrics": metrics
-        }))
+        print_resp(render_report(upl_file_form.filename, metrics, errors))
 
         # print "\n".join(str(e) for e in errors)
+    except upload.UploadTooLarge as e:
+        print_err(e, status = "413 Request Entity Too Large")
     except Exception as e:
         logging.exception("Error: %s", e)
         print_err(e)
@@ -8,10 +8,16 @@ import logging
 
 from plag_submissions_utils import common_runner
 from plag_submissions_utils.common.submissions import run_over_submissions
+from plag_submissions_utils.common.submissions import SUBMISSIONS_WORKERS
 from plag_submissions_utils.common.stats import StatCollector
 from plag_submissions_utils.common.stats import SrcStatCollector
 from plag_submissions_utils.common.stats import print_mod_types_stat
 from plag_submissions_utils.common.ir_utils import calc_various_similarity
+from plag_submissions_utils.common import doc_cache
+from plag_submissions_utils.common import subm_cache
+from plag_submissions_utils.common import chunk_cache
+from plag_submissions_utils.common import processor
+from plag_submissions_utils.common import source_doc
 
 def run_v1(opts):
     common_run(opts, "1")
@@ -54,9 +60,10 @@ def collect_stat(opts):
     def proc_arc(susp_id, _, meta_file_path):
         chunks, _ = common_runner.create_chunks(
             susp_id, meta_file_path)
-        stat_collector(chunks)
+        return StatCollector()(chunks)
 
-    run_over_submissions(opts.archive_dir, proc_arc)
+    run_over_submissions(opts.archive_dir, proc_arc, workers = opts.workers,
+                         merge_result = lambda _, stat: stat_collector.merge(stat))
     print_mod_types_stat(stat_collector, sys.stdout)
 
 def collect_src_stat(opts):
@@ -64,9 +71,12 @@ def collect_src_stat(opts):
     def proc_arc(susp_id, _, meta_file_path):
         chunks, _ = common_runner.create_chunks(
             susp_id, meta_file_path)
-        stat_collector(chunks)
+        collector = SrcStatCollector()
+        collector(chunks)
+        return collector
 
-    run_over_submissions(opts.archive_dir, proc_arc)
+    run_over_submissions(opts.archive_dir, proc_arc, workers = opts.workers,
+                         merge_result = lambda _, collector: stat_collector.merge(collector))
     stat_collector.print_stat(sys.stdout)
 
 
@@ -79,6 +89,19 @@ def main():
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--verbose", "-v", action="store_true")
+    parser.add_argument("--doc_cache_dir", "-C", default=doc_cache.DOC_CACHE_DIR,
+                        help="directory for caching of converted source documents")
+    parser.add_argument("--subm_cache_dir", "-S", default=subm_cache.SUBM_CACHE_DIR,
+                        help="directory for caching of extracted submissions and parsed chunks"
+                        " (and converted sources, unless --doc_cache_dir is set)")
+    parser.add_argument("--chunk_cache_dir", "-R", default=chunk_cache.CHUNK_CACHE_DIR,
+                        help="directory for caching of results of checkers for chunks")
+    parser.add_argument("--workers", "-j", type=int, default=SUBMISSIONS_WORKERS,
+                        help="number of processes for stat, src_stat and chunks_sim")
+    parser.add_argument("--sources_workers", type=int, default=source_doc.LOAD_SOURCES_WORKERS,
+                        help="number of processes that convert source documents of a submission")
+    parser.add_argument("--chunks_workers", type=int, default=processor.CHECK_CHUNKS_WORKERS,
+                        help="number of processes that check chunks of a submission")
 
     subparsers = parser.add_subparsers(help='different versions')
 
@@ -129,6 +152,12 @@ def main():
     FORMAT="%(asctime)s %(levelname)s: %(name)s: %(message)s"
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
                         format = FORMAT)
+    cache = doc_cache.configure(subm_cache.get_doc_cache_dir(args.doc_cache_dir,
+                                                             args.subm_cache_dir))
+    subm_cache_inst = subm_cache.configure(args.subm_cache_dir)
+    chunk_cache_inst = chunk_cache.configure(args.chunk_cache_dir)
+    source_doc.LOAD_SOURCES_WORKERS = args.sources_workers
+    processor.CHECK_CHUNKS_WORKERS = args.chunks_workers
 
     try:
         args.func(args)
@@ -136,5 +165,12 @@ def main():
     except Exception as e:
         logging.exception("Error: %s", e)
 
+    if cache is not None:
+        logging.debug("%s", cache)
+    if subm_cache_inst is not None:
+        logging.debug("%s", subm_cache_inst)
+    if chunk_cache_inst is not None:
+        logging.debug("%s", chunk_cache_inst)
+
 if __name__ == '__main__' :
     main()
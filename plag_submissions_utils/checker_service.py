@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Long-running WSGI service that checks uploaded submissions.
+
+checker_cgi is started for every upload, so most of the request time is
+spent on imports, loading of pymorphy2/hunspell dictionaries and
+compiling of the report template. The service does it once at start,
+then forks workers that run common_runner.run; the form of
+data/html/submission_checker*.html can be posted to it as is.
+
+Checks can be also run as jobs, so that the request is not blocked:
+POST /jobs (the same form) returns job id,
+GET /jobs/<id> returns the status of the job (queued, running, done, failed),
+GET /jobs/<id>/report returns the report of the finished job.
+Results are cached by hash of the archive and the version,
+so resubmission of the same archive doesn't start a new check.
+"""
+
+import argparse
+import collections
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import os.path as fs
+import shutil
+import socketserver
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIServer
+
+from plag_submissions_utils import common_runner
+from plag_submissions_utils.common import chunk_cache
+from plag_submissions_utils.common import doc_cache
+from plag_submissions_utils.common import processor
+from plag_submissions_utils.common import resources
+from plag_submissions_utils.common import source_doc
+from plag_submissions_utils.common import subm_cache
+from plag_submissions_utils.common import text_proc
+from plag_submissions_utils.common import upload
+from plag_submissions_utils.report import get_report_template
+from plag_submissions_utils.report import render_report
+
+#number of processes that check submissions
+CHECKER_WORKERS = int(os.environ.get("CHECKER_WORKERS", 2))
+#number of cached check results
+CHECK_RESULTS_CACHE_SIZE = int(os.environ.get("CHECK_RESULTS_CACHE_SIZE", 256))
+#number of remembered jobs; the oldest finished jobs are forgotten
+CHECK_MAX_JOBS = int(os.environ.get("CHECK_MAX_JOBS", 1024))
+
+VERSIONS = ("1", "2", "3")
+
+
+def preload():
+    """Loads everything that is needed for checking, so that forked workers share it."""
+    get_report_template()
+    for version in VERSIONS:
+        importlib.import_module('.processor', 'plag_submissions_utils.v' + version)
+
+    #dictionaries of checkers are registered when the processors are imported
+    resources.preload()
+    logging.info("preloaded resources: %s", resources.format_load_times())
+    text_proc.prepare_converters()
+
+def _init_worker():
+    #uploads are already checked in parallel
+    source_doc.LOAD_SOURCES_WORKERS = 1
+    processor.CHECK_CHUNKS_WORKERS = 1
+
+def run_check(arch_path, version):
+    """Returns metrics and errors of the submission"""
+    try:
+        metrics, errors, _ = common_runner.run(arch_path, version)
+        return metrics, errors
+    finally:
+        text_proc.save_morph_cache()
+
+
+class CheckJob(object):
+    def __init__(self, job_id, checked_filename, future):
+        super(CheckJob, self).__init__()
+        self.job_id           = job_id
+        self.checked_filename = checked_filename
+        self.future           = future
+
+    def get_status(self):
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.future.exception() is not None else "done"
+
+
+class CheckQueue(object):
+    """Runs checks in the executor; the number of concurrent checks
+    is bounded by the number of its workers.
+    Results (or pending checks) are shared by all jobs with the same archive
+    and version; failed checks are not cached.
+    """
+    def __init__(self, executor, cache_size = CHECK_RESULTS_CACHE_SIZE,
+                 max_jobs = CHECK_MAX_JOBS):
+        super(CheckQueue, self).__init__()
+        self._executor   = executor
+        self._cache_size = cache_size
+        self._max_jobs   = max_jobs
+        #done callback is called in submit if the check is already finished
+        self._lock       = threading.RLock()
+        #key -> future
+        self._results    = collections.OrderedDict()
+        #job id -> CheckJob
+        self._jobs       = collections.OrderedDict()
+
+    def submit(self, key, temp_dir, arch_path, version, checked_filename):
+        """The archive is checked unless the result for key is cached.
+        temp_dir is removed when the archive is no longer needed.
+        """
+        with self._lock:
+            future = self._results.get(key)
+            if future is not None:
+                self._results.move_to_end(key)
+                shutil.rmtree(temp_dir)
+            else:
+                future = self._executor.submit(run_check, arch_path, version)
+                self._results[key] = future
+                future.add_done_callback(lambda f: self._on_done(key, temp_dir, f))
+                while len(self._results) > self._cache_size:
+                    self._results.popitem(last = False)
+
+            job = CheckJob(uuid.uuid4().hex, checked_filename, future)
+            self._jobs[job.job_id] = job
+            self._forget_jobs()
+        return job
+
+    def _on_done(self, key, temp_dir, future):
+        shutil.rmtree(temp_dir, ignore_errors = True)
+        if future.exception() is not None:
+            with self._lock:
+                if self._results.get(key) is future:
+                    del self._results[key]
+
+    def _forget_jobs(self):
+        if len(self._jobs) <= self._max_jobs:
+            return
+        for job_id in [j.job_id for j in self._jobs.values() if j.future.done()]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self._max_jobs:
+                break
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class CheckerApp(object):
+    """WSGI application. A form posted to /jobs creates a job,
+    a form posted to any other path is checked synchronously.
+    """
+    def __init__(self, queue, max_upload_size = None):
+        super(CheckerApp, self).__init__()
+        self._queue           = queue
+        self._max_upload_size = max_upload_size
+
+    def _respond(self, start_response, status, text,
+                 content_type = "text/plain; charset=utf-8", headers = ()):
+        body = text.encode("utf-8")
+        start_response(status, [("Content-Type", content_type),
+                                ("Content-Length", str(len(body)))] + list(headers))
+        return [body]
+
+    def _respond_json(self, start_response, status, obj, headers = ()):
+        return self._respond(start_response, status, json.dumps(obj),
+                             content_type = "application/json", headers = headers)
+
+    def _respond_report(self, start_response, job):
+        metrics, errors = job.future.result()
+        return self._respond(start_response, "200 OK",
+                             render_report(job.checked_filename, metrics, errors),
+                             content_type = "text/html; charset=utf-8")
+
+    def _job_info(self, job):
+        info = {"job_id": job.job_id, "status": job.get_status()}
+        if info["status"] == "failed":
+            info["error"] = str(job.future.exception())
+        return info
+
+    def _save_upload(self, upl_file_form, arch_path, version):
+        """Returns the key of the result cache"""
+        sha1 = hashlib.sha1()
+        sha1.update(("%s:" % version).encode("utf-8"))
+        upload.save_form_file(upl_file_form, arch_path, digest = sha1)
+        return sha1.hexdigest()
+
+    def _submit(self, environ):
+        """Returns (job, None) or (None, error message).
+        raise UploadTooLarge"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            form = upload.parse_form(environ["wsgi.input"], environ, temp_dir,
+                                     self._max_upload_size, keep_blank_values = True)
+            err = None
+            if "file" not in form or not form["file"].filename:
+                err = "no 'file' field in uploaded form"
+            elif form.getvalue("version", "1") not in VERSIONS:
+                err = "unknown version %s" % form.getvalue("version")
+            if err is not None:
+                shutil.rmtree(temp_dir)
+                return None, err
+
+            upl_file_form = form["file"]
+            upl_file_ext = fs.splitext(upl_file_form.filename)[1]
+            version = form.getvalue("version", "1")
+            arch_path = fs.join(temp_dir, "arch%s" % upl_file_ext)
+            key = self._save_upload(upl_file_form, arch_path, version)
+        except Exception:
+            shutil.rmtree(temp_dir)
+            raise
+        return self._queue.submit(key, temp_dir, arch_path, version,
+                                  upl_file_form.filename), None
+
+    def _do_jobs(self, environ, start_response, method, parts):
+        if parts == ["jobs"] and method == "POST":
+            job, err = self._submit(environ)
+            if job is None:
+                return self._respond(start_response, "400 Bad Request", err)
+            return self._respond_json(start_response, "202 Accepted", self._job_info(job),
+                                      headers = [("Location", "/jobs/%s" % job.job_id)])
+
+        if method != "GET" or len(parts) not in (2, 3) or \
+           (len(parts) == 3 and parts[2] != "report"):
+            return self._respond(start_response, "404 Not Found", "unknown request")
+
+        job = self._queue.get_job(parts[1])
+        if job is None:
+            return self._respond(start_response, "404 Not Found", "unknown job")
+        if len(parts) == 2:
+            return self._respond_json(start_response, "200 OK", self._job_info(job))
+
+        status = job.get_status()
+        if status == "done":
+            return self._respond_report(start_response, job)
+        if status == "failed":
+            return self._respond(start_response, "500 Internal error",
+                                 str(job.future.exception()))
+        return self._respond(start_response, "409 Conflict", "job is %s" % status)
+
+    def __call__(self, environ, start_response):
+        method = environ.get("REQUEST_METHOD")
+        parts = [p for p in environ.get("PATH_INFO", "").split("/") if p]
+        try:
+            if parts and parts[0] == "jobs":
+                return self._do_jobs(environ, start_response, method, parts)
+
+            if method != "POST":
+                return self._respond(start_response, "405 Method Not Allowed",
+                                     "submissions should be posted")
+            job, err = self._submit(environ)
+            if job is None:
+                return self._respond(start_response, "500 Internal error", err)
+            return self._respond_report(start_response, job)
+        except upload.UploadTooLarge as e:
+            return self._respond(start_response, "413 Request Entity Too Large", str(e))
+        except Exception as e:
+            logging.exception("Error: %s", e)
+            return self._respond(start_response, "500 Internal error", str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verbose", "-v", action="store_true")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", "-p", type=int, default=8080)
+    parser.add_argument("--workers", "-j", type=int, default=CHECKER_WORKERS,
+                        help="number of processes that check submissions"
+                        " (0 - check in a thread of the service)")
+    parser.add_argument("--doc_cache_dir", "-C", default=doc_cache.DOC_CACHE_DIR,
+                        help="directory for caching of converted source documents")
+    parser.add_argument("--subm_cache_dir", "-S", default=subm_cache.SUBM_CACHE_DIR,
+                        help="directory for caching of extracted submissions"
+                        " (and converted sources, unless --doc_cache_dir is set)")
+    parser.add_argument("--chunk_cache_dir", "-R", default=chunk_cache.CHUNK_CACHE_DIR,
+                        help="directory for caching of results of checkers for chunks,"
+                        " so that only changed rows of resubmitted essays are checked")
+    parser.add_argument("--max_upload_size", type=int, default=upload.MAX_UPLOAD_SIZE,
+                        help="maximum size of uploaded form in bytes")
+    args = parser.parse_args()
+
+    FORMAT="%(asctime)s %(levelname)s: %(name)s: %(message)s"
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format = FORMAT)
+    doc_cache.configure(subm_cache.get_doc_cache_dir(args.doc_cache_dir,
+                                                     args.subm_cache_dir))
+    subm_cache.configure(args.subm_cache_dir)
+    chunk_cache.configure(args.chunk_cache_dir)
+
+    preload()
+    if args.workers > 0:
+        #workers are forked after preload, so they share loaded modules and dictionaries
+        executor = ProcessPoolExecutor(max_workers = args.workers,
+                                       mp_context = multiprocessing.get_context("fork"),
+                                       initializer = _init_worker)
+        #fork all workers now, before the server starts its threads
+        executor.submit(int).result()
+    else:
+        executor = ThreadPoolExecutor(max_workers = 1)
+    try:
+        app = CheckerApp(CheckQueue(executor), max_upload_size = args.max_upload_size)
+        server = make_server(args.host, args.port, app,
+                             server_class = ThreadingWSGIServer)
+        logging.info("checker service is listening on %s:%d", args.host, args.port)
+        server.serve_forever()
+    finally:
+        executor.shutdown()
+
+
+if __name__ == '__main__' :
+    main()
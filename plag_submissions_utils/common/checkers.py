@@ -1,34 +1,99 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import copy
 import logging
 from collections import Counter
 from collections import defaultdict
 import itertools
-import unicodedata
 
-import regex
 import hunspell
 import langdetect
+import langdetect.detector_factory
 
 from plag_submissions_utils.common import text_proc
 from plag_submissions_utils.common import source_doc
 from plag_submissions_utils.common import chunks
 from plag_submissions_utils.common import homoglyphs
+from plag_submissions_utils.common import resources
 from plag_submissions_utils.common.chunks import ModType
 from plag_submissions_utils.common.errors import ErrSeverity
 from plag_submissions_utils.common.errors import ChunkError
 from plag_submissions_utils.common.errors import Error
 from plag_submissions_utils.common.simple_detector import calc_originality
+from plag_submissions_utils.common.spell_engine import SpellEngine
 
+DEFAULT_DICT_PREFIX = '/usr/share/hunspell'
+SPELL_DICTS = ('ru_RU', 'en_US')
+
+def _spell_engine_name(dict_prefix, dict_name):
+    return "hunspell:%s/%s" % (dict_prefix, dict_name)
+
+def _register_spell_engine(dict_prefix, dict_name):
+    def _load():
+        return SpellEngine(hunspell.HunSpell('%s/%s.dic' % (dict_prefix, dict_name),
+                                             '%s/%s.aff' % (dict_prefix, dict_name)),
+                           name = dict_name)
+    resources.register(_spell_engine_name(dict_prefix, dict_name), _load)
+
+def _spell_engine_resource(dict_prefix, dict_name):
+    """Returns the name of the registered resource of the dictionary"""
+    name = _spell_engine_name(dict_prefix, dict_name)
+    if not resources.is_registered(name):
+        _register_spell_engine(dict_prefix, dict_name)
+    return name
+
+def get_spell_engine(dict_prefix, dict_name):
+    """hunspell dictionaries are loaded once per process and shared by spell checkers"""
+    return resources.get(_spell_engine_resource(dict_prefix, dict_name))
+
+def _load_langdetect():
+    langdetect.detector_factory.init_factory()
+    return langdetect.detector_factory._factory
+
+for _dict_name in SPELL_DICTS:
+    _register_spell_engine(DEFAULT_DICT_PREFIX, _dict_name)
+resources.register("langdetect", _load_langdetect)
 
 class IChecher:
+    """Results of a checker for a chunk may be cached across submissions (see chunk_cache).
+    A cacheable checker returns a key from get_chunk_cache_key; its result for a chunk
+    must depend only on the content of the chunk and on this key
+    (options of the checker, hashes of source documents, etc.).
+    The result is represented as a state of the chunk: calc_chunk_state checks the chunk
+    and returns its picklable contribution to the checker, merge_chunk_state adds
+    a (cached) contribution as if the chunk was checked. The state must not
+    depend on the id of the chunk, since rows of the essay may be moved.
+    By default the state is the list of errors reported for the chunk;
+    aggregate checkers (OriginalityChecker, SpellChecker) override both methods
+    and calculate their errors in get_errors from the merged states.
+    """
     def get_errors(self):
         raise NotImplementedError("Should implement this!")
 
     def __call__(self, chunk, src_docs):
         raise NotImplementedError("Should implement this!")
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        """None means that results of the checker are not cached"""
+        return None
+
+    def get_resources(self):
+        """Names of resources (see resources module) that are used by the checker,
+        so that they can be loaded before workers are forked"""
+        return ()
+
+    def calc_chunk_state(self, chunk, src_docs):
+        start = len(self._errors)
+        self(chunk, src_docs)
+        return self._errors[start:]
+
+    def merge_chunk_state(self, chunk, state):
+        for err in state:
+            err = copy.copy(err)
+            err.chunk_num = chunk.get_chunk_id()
+            self._errors.append(err)
+
 class IFixableChecker(IChecher):
     def fix_all(self, all_chunks):
         raise NotImplementedError("Should implement this!")
@@ -44,6 +109,9 @@ class BaseChunkSimChecker(IChecher):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return sorted(self._diff_perc_dict.items()), self._fluctuation_delta
+
     def __call__(self, chunk, src_docs):
         if chunk.get_mod_type() == ModType.ORIG:
             return
@@ -198,6 +266,10 @@ class SYNChecker(BaseChunkSimChecker):
         super(SYNChecker, self).__call__(chunk, src_docs)
 
 
+CYRILLIC_ALIASES = ['CYRILLIC']
+homoglyphs.register_homoglyph_table(CYRILLIC_ALIASES)
+ASCII_DIGITS = frozenset('0123456789')
+
 class CyrillicAlphabetChecker(IFixableChecker):
     def __init__(self, opts):
         super(CyrillicAlphabetChecker, self).__init__()
@@ -206,6 +278,12 @@ class CyrillicAlphabetChecker(IFixableChecker):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return ()
+
+    def get_resources(self):
+        return (homoglyphs.register_homoglyph_table(CYRILLIC_ALIASES), )
+
     def _find_homoglyphs(self, chunk):
         """Example:
         _find_homoglyphs(u"искуᏟꓚCСTвенный")
@@ -225,25 +303,32 @@ class CyrillicAlphabetChecker(IFixableChecker):
         'homoglyphs': {'a': u'CYRILLIC', 'c': u'\\u0422'}}]
         """
 
+        table = homoglyphs.get_homoglyph_table(CYRILLIC_ALIASES)
+        scan = chunk.get_lexical_scan()
         found = []
-        for sent_num, s in enumerate(chunk.get_mod_sents()):
-            for m in regex.finditer(r"[\w']+", s, regex.UNICODE):
-                token = m.group()
+        for sent_num, s in enumerate(scan.get_sents()):
+            #confusable characters of the sentence; most sentences have none
+            candidates = table.keys() & set(s)
+            #skip numbers
+            candidates -= ASCII_DIGITS
+            if not candidates:
+                continue
+            for start, token, has_cyrillic in scan.get_words(sent_num):
                 #do not check words in latin or other alphabet
-                if not regex.search('[а-яА-Я]', token, regex.UNICODE):
+                if not has_cyrillic or candidates.isdisjoint(token):
                     continue
-                confusable_chars = homoglyphs.find_homoglyphs(token, ['CYRILLIC'])
-                if confusable_chars:
-                    for char_info in confusable_chars:
-
-                        if ord(char_info['character']) >=48 and \
-                           ord(char_info['character']) <= 57:
-                            #skip numbers
-                            continue
-                        char_info['word'] = token
-                        char_info['sent_num'] = sent_num
-                        char_info['pos'] = m.start() + char_info['pos']
-                        found.append(char_info)
+                for pos, char in enumerate(token):
+                    if char not in candidates:
+                        continue
+                    char_alias, t = table[char]
+                    found.append({
+                        'character': char,
+                        'alias': char_alias,
+                        'homoglyphs': dict(t),
+                        'word': token,
+                        'sent_num': sent_num,
+                        'pos': start + pos
+                    })
 
         return found
 
@@ -273,24 +358,13 @@ class CyrillicAlphabetChecker(IFixableChecker):
         if not found:
             return
 
-        new_sents = []
-        char_info_num = 0
-        for sent_num, sent in enumerate(chunk.get_mod_sents()):
-            char_info = found[char_info_num]
-            new_sent = []
-            for sent_pos, char in enumerate(sent):
-                if char_info['sent_num'] == sent_num and char_info['pos'] == sent_pos:
-                    logging.info("Replace '%s' (%s) with '%s'", char, char_info['alias'],
-                                  char_info['homoglyphs']['c'])
-                    new_sent.append(char_info['homoglyphs']['c'])
-                    if char_info_num + 1 < len(found):
-                        char_info_num += 1
-                        char_info = found[char_info_num]
-                else:
-                    new_sent.append(char)
-            new_sents.append(''.join(new_sent))
-
-        chunk.get_mod_sents()[:] = new_sents
+        new_sents = [list(sent) for sent in chunk.get_mod_sents()]
+        for char_info in found:
+            logging.info("Replace '%s' (%s) with '%s'", char_info['character'],
+                         char_info['alias'], char_info['homoglyphs']['c'])
+            new_sents[char_info['sent_num']][char_info['pos']] = char_info['homoglyphs']['c']
+
+        chunk.set_mod_sents([''.join(sent) for sent in new_sents])
 
     def fix_all(self, all_chunks):
         for chunk in all_chunks:
@@ -305,17 +379,19 @@ class ORIGModTypeChecker(IChecher):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        #the chunk is searched in all documents
+        return [(src, src_docs[src].get_digest()) for src in src_docs]
+
 
     def _try_find_chunk_in_src(self, chunk, src_docs):
+        sent_holder = chunk.get_mod_sent_holder()
+        sents = sent_holder.get_sents()
+        long_sents = [sent for num, sent in enumerate(sents)
+                      if sent_holder.get_sent_info(num).word_cnt >= 6]
         for src in src_docs:
-            sent_holder = chunk.get_mod_sent_holder()
-            sents = sent_holder.get_sents()
-            found_sents = 0
-            for num, sent in enumerate(sents):
-                if sent_holder.get_sent_info(num).word_cnt < 6:
-                    continue
-                if src_docs[src].is_sent_in_doc(sent):
-                    found_sents += 1
+            offsets = src_docs[src].get_sents_offs(long_sents)
+            found_sents = sum(1 for offs in offsets if offs is not None)
             if found_sents == len(sents):
                 self._errors.append(ChunkError(
                     "Оригинальное предложение было найдено в документе '%s'" % src,
@@ -353,6 +429,12 @@ class OrigSentChecker(IChecher):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        src_filename = chunk.get_orig_doc_filename()
+        if src_filename not in src_docs:
+            return (None, )
+        return (src_docs[src_filename].get_digest(), )
+
     def _check_duplicates(self, chunk):
         unique_sents = frozenset(chunk.get_orig_sents())
         if len(unique_sents) != len(chunk.get_orig_sents()):
@@ -374,12 +456,9 @@ class OrigSentChecker(IChecher):
         self._check_duplicates(chunk)
 
         parsed_doc = src_docs[src_filename]
-        not_found_cnt = 0
         sents = chunk.get_orig_sents()
-        for sent in sents:
-            if not parsed_doc.is_sent_in_doc(sent):
-                not_found_cnt += 1
-
+        offsets = parsed_doc.get_sents_offs(sents)
+        not_found_cnt = sum(1 for offs in offsets if offs is None)
 
         if not_found_cnt == len(sents):
             self._errors.append(ChunkError(
@@ -402,13 +481,16 @@ class ModSentChecker(IChecher):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return ()
+
     def __call__(self, chunk, src_docs):
         if chunk.get_mod_type() == ModType.ORIG:
             return
 
-        res = text_proc.seg_text_as_list(chunk.get_mod_text())
         if not chunk.has_mod_type(ModType.SEP) and not chunk.has_mod_type(ModType.SSP) and\
-           not chunk.has_mod_type(ModType.HPR) and len(res) > 1:
+           not chunk.has_mod_type(ModType.HPR) and \
+           chunk.get_lexical_scan().get_segments_cnt() > 1:
 
             self._errors.append(ChunkError(
                 "Модифицированный фрагмент содержит несколько предложений, но его тип не SSP/SEP",
@@ -424,6 +506,9 @@ class OrigSentsCheckerV2(IChecher):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return ()
+
     def __call__(self, chunk, src_docs):
         if chunk.get_mod_type() == ModType.ORIG:
             return
@@ -488,6 +573,9 @@ class LexicalSimChecker(IChecher):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return self._opts.min_lexical_dist, self._fluctuation_delta
+
     def __call__(self, chunk, src_docs):
         if chunk.get_mod_type() == ModType.ORIG:
             return
@@ -539,6 +627,19 @@ class OriginalityChecker(IChecher):
         self._modified_text.append(chunk.get_mod_text())
         self._orig_text.append(chunk.get_orig_text())
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return ()
+
+    def calc_chunk_state(self, chunk, src_docs):
+        """Originality is calculated over texts of all chunks in get_errors"""
+        self(chunk, src_docs)
+        return chunk.get_mod_text(), chunk.get_orig_text()
+
+    def merge_chunk_state(self, chunk, state):
+        mod_text, orig_text = state
+        self._modified_text.append(mod_text)
+        self._orig_text.append(orig_text)
+
 
 class SentCorrectnessChecker(IFixableChecker):
     def __init__(self, mods = None):
@@ -549,14 +650,18 @@ class SentCorrectnessChecker(IFixableChecker):
     def get_errors(self):
         return self._errors
 
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return (sorted(self._mods) if self._mods else None, )
+
     def _find_sents_wo_term_in_the_end(self, chunk):
         sents_with_errors = []
 
         if self._mods and "term_in_the_end" not in self._mods:
             return sents_with_errors
 
-        for num, s in enumerate(chunk.get_mod_sents()):
-            if s[-1] not in text_proc.SENTENCE_TERMINALS:
+        scan = chunk.get_lexical_scan()
+        for num in range(len(scan.get_sents())):
+            if not scan.ends_with_terminal(num):
                 sents_with_errors.append(num)
 
         return sents_with_errors
@@ -567,12 +672,9 @@ class SentCorrectnessChecker(IFixableChecker):
         if self._mods and "title_case" not in self._mods:
             return sents_with_errors
 
-        for num, s in enumerate(chunk.get_mod_sents()):
-            first_token = s.split(None, 1)[0]
-
-            #allow up to 2 punctuation characters before upper letter or digit.
-            m = regex.search(r"^\p{P}{0,2}(\p{Lu}|\d)", first_token)
-            if m is None:
+        scan = chunk.get_lexical_scan()
+        for num in range(len(scan.get_sents())):
+            if not scan.starts_with_title_case(num):
                 sents_with_errors.append(num)
 
         return sents_with_errors
@@ -593,12 +695,14 @@ class SentCorrectnessChecker(IFixableChecker):
 
 
     def fix(self, chunk):
-        sents = chunk.get_mod_sents()
+        sents = list(chunk.get_mod_sents())
 
         sents_wo_term = self._find_sents_wo_term_in_the_end(chunk)
 
         for snum in sents_wo_term:
             sents[snum] = sents[snum] + '.'
+        if sents_wo_term:
+            chunk.set_mod_sents(sents)
 
         sents_wo_title_case = self._find_sents_wo_title_case(chunk)
 
@@ -612,6 +716,8 @@ class SentCorrectnessChecker(IFixableChecker):
 
             sents[snum] = temp_sent[0].upper() + temp_sent[1:]
 
+        if sents_wo_title_case:
+            chunk.set_mod_sents(sents)
         return len(sents_wo_term), len(sents_wo_title_case)
 
     def fix_all(self, all_chunks):
@@ -625,17 +731,19 @@ class SentCorrectnessChecker(IFixableChecker):
         logging.info("Fixed %d sents with title case", sents_wo_title_case_cnt)
 
 class SpellChecker(IFixableChecker):
-    DICT_PREFIX = '/usr/share/hunspell'
+    DICT_PREFIX = DEFAULT_DICT_PREFIX
 
     def __init__(self, high_rate = 0.1, norm_rate = 0.01,
                  lang_hint = 'ru', whitelist = None):
         super(SpellChecker, self).__init__()
         self._last_lang                = lang_hint
         self._errors                   = []
-        self._dicts                    = {}
+        self._engines                  = {}
         self._white_list = set()
         self._suggest_list = {}
         self._make_white_list_and_suggest_list(whitelist)
+        self._options_key              = (self.DICT_PREFIX, sorted(self._white_list),
+                                          sorted(self._suggest_list.items()))
 
 
         self._tokens_cnt               = 0
@@ -647,7 +755,8 @@ class SpellChecker(IFixableChecker):
         self._high_rate                = high_rate
         self._norm_rate                = norm_rate
 
-        self._counter                  = Counter()
+        #lowercased token -> Counter((token, lang))
+        self._typo_occs                = defaultdict(Counter)
 
 
     def _make_white_list_and_suggest_list(self, input_whitelist):
@@ -661,18 +770,46 @@ class SpellChecker(IFixableChecker):
                 self._white_list.add(w)
 
 
+    def _get_suggestions(self, token, lang):
+        if token in self._suggest_list:
+            return [self._suggest_list[token]]
+        return self._get_engine(lang).suggest(token)
+
     def _drop_most_common(self):
         """ "typos" that are encountered more than typo_max_tf times are not typos...
+        Misspelled tokens without suggestions are not typos either.
+        Suggestions are calculated only until it is known whether the typo is dropped.
         """
-        for typo in list(self._counter.keys()):
-            if self._counter[typo] >= self._typo_max_tf:
-                del self._typo_sents_dict[typo]
-                del self._counter[typo]
+        for typo in list(self._typo_occs.keys()):
+            occs = self._typo_occs[typo]
+            typo_cnt = 0
+            suggested = {}
+            for occ, cnt in occs.most_common():
+                if typo_cnt >= self._typo_max_tf:
+                    break
+                suggestions = self._get_suggestions(*occ)
+                if suggestions:
+                    suggested[occ] = suggestions
+                    typo_cnt += cnt
+
+            if typo_cnt == 0 or typo_cnt >= self._typo_max_tf:
+                del self._typo_occs[typo]
+                self._typo_sents_dict.pop(typo, None)
+                continue
+
+            self._typo_occs[typo] = Counter({occ: occs[occ] for occ in suggested})
+            infos = [dict(i, suggest = suggested[(i['typo'], i['lang'])])
+                     for i in self._typo_sents_dict.get(typo, [])
+                     if (i['typo'], i['lang']) in suggested]
+            if infos:
+                self._typo_sents_dict[typo] = infos
+            else:
+                self._typo_sents_dict.pop(typo, None)
 
     def _get_stat(self):
         sents_set =  set(i['chunk_id']
                          for i in itertools.chain(*iter(self._typo_sents_dict.values())))
-        wrong_spelled_tokens = len(self._counter)
+        wrong_spelled_tokens = len(self._typo_occs)
         return sents_set, wrong_spelled_tokens
 
     def _make_err_msg(self):
@@ -696,6 +833,8 @@ class SpellChecker(IFixableChecker):
         logging.debug("SpellChecker: typos cnt: %s, all tokens: %s",
                       wrong_spelled_tokens,
                       self._tokens_cnt)
+        for engine in self._engines.values():
+            logging.debug("%s", engine)
 
 
         err_msg, extra = self._make_err_msg()
@@ -712,7 +851,14 @@ class SpellChecker(IFixableChecker):
 
 
     def _detect_lang(self, chunk):
-        lang = langdetect.detect(chunk.get_mod_text())
+        text = chunk.get_mod_text()
+        #the script is enough to choose the dictionary;
+        #langdetect is slow and random, so it is used only for mixed texts
+        lang = text_proc.detect_lang_by_script(text)
+        if lang is None:
+            #profiles are loaded by the registry, so that their load time is accounted
+            resources.get("langdetect")
+            lang = langdetect.detect(text)
         if lang not in ['ru', 'en']:
             logging.debug("Failed to detect lang; Fallback to last detected: %s",
                           self._last_lang)
@@ -721,50 +867,37 @@ class SpellChecker(IFixableChecker):
         self._last_lang = lang
         return lang
 
-    def _get_dict(self, chunk):
-        lang = self._detect_lang(chunk)
-
-        if lang in self._dicts:
-            return self._dicts[lang]
+    def _get_engine(self, lang):
+        if lang in self._engines:
+            return self._engines[lang]
 
         if lang == 'ru':
             dict_name = 'ru_RU'
         else:
             dict_name = 'en_US'
 
-        self._dicts[lang] = hunspell.HunSpell(
-            '%s/%s.dic' % (self.DICT_PREFIX, dict_name),
-            '%s/%s.aff' % (self.DICT_PREFIX, dict_name))
-
-        return self._dicts[lang]
-
+        self._engines[lang] = get_spell_engine(self.DICT_PREFIX, dict_name)
 
-    def _strip_accents(self, s):
-        return ''.join(c for c in s
-                       if unicodedata.category(c) != 'Mn')
+        return self._engines[lang]
 
-    def _find_typos(self, chunk):
 
+    def _check_chunk(self, chunk):
+        """Returns the state of the chunk:
+        (sents_cnt, tokens_cnt, misspelled tokens, lang of the chunk).
+        """
         if not chunk.get_mod_text():
             logging.warning("Empty modified sent!")
-            return
-
-        only_collect_stat = False
-        if chunk.get_mod_type() == ModType.CPY:
-            only_collect_stat = True
-
-        self._all_sents += 1
+            return 0, 0, [], self._last_lang
 
-        spell_dict = self._get_dict(chunk)
-        if spell_dict is None:
-            return
+        lang = self._detect_lang(chunk)
+        engine = self._get_engine(lang)
 
-        tokens = [self._strip_accents(t)
-                  for s in chunk.get_mod_sents()
-                  for t in regex.findall(r"[\w.]+", s, regex.UNICODE)]
+        tokens = chunk.get_lexical_scan().get_spell_tokens()
 
         logging.debug(" ".join(tokens))
 
+        tokens_cnt = 0
+        typos = []
         for token in tokens:
             #yeah we're gonna skip the first word in the sentence.
             #but we also skip all named entities (poor man's named entity recognition)
@@ -777,35 +910,53 @@ class SpellChecker(IFixableChecker):
             if token[-1] == '.':
                 continue
 
-            self._tokens_cnt += 1
+            tokens_cnt += 1
 
 
             if token in self._white_list:
                 continue
 
-            enc_token = token.encode(spell_dict.get_dic_encoding(), 'replace')
-            if not spell_dict.spell(enc_token):
-                if token in self._suggest_list:
-                    suggestions = [self._suggest_list[token]]
-                else:
-                    suggestions = spell_dict.suggest(enc_token)
-                    #dont even ask what is going on here
-                    #see HunSpell_suggest https://github.com/blatinier/pyhunspell/blob/master/hunspell.cpp#L171
-                    suggestions = spell_dict.suggest(enc_token)
-                    suggestions = [ss.encode('latin1').decode(spell_dict.get_dic_encoding())
-                                   for ss in suggestions]
-                    # suggestions = [s.decode(spell_dict.get_dic_encoding()) for s in suggestions]
-
-                if not suggestions:
-                    continue
+            #suggestions are calculated in _drop_most_common
+            if not engine.spell(token):
+                typos.append(token)
+
+        return 1, tokens_cnt, typos, lang
 
-                token_key = token.lower()
-                self._counter[token_key] +=1
+    def merge_chunk_state(self, chunk, state):
+        sents_cnt, tokens_cnt, typos, lang = state
+        self._all_sents += sents_cnt
+        self._tokens_cnt += tokens_cnt
+        #language of the next chunk may fall back to it
+        self._last_lang = lang
 
-                if not only_collect_stat:
-                    self._typo_sents_dict[token_key].append({'chunk_id': chunk.get_chunk_id(),
-                                                             'typo': token,
-                                                             'suggest': suggestions})
+        only_collect_stat = False
+        if chunk.get_mod_type() == ModType.CPY:
+            only_collect_stat = True
+
+        for token in typos:
+            token_key = token.lower()
+            self._typo_occs[token_key][(token, lang)] +=1
+
+            if not only_collect_stat:
+                self._typo_sents_dict[token_key].append({'chunk_id': chunk.get_chunk_id(),
+                                                         'typo': token,
+                                                         'lang': lang})
+
+    def calc_chunk_state(self, chunk, src_docs):
+        state = self._check_chunk(chunk)
+        self.merge_chunk_state(chunk, state)
+        return state
+
+    def get_chunk_cache_key(self, chunk, src_docs):
+        #the language of the chunk falls back to the language of the previous chunks
+        return self._last_lang, self._options_key
+
+    def get_resources(self):
+        return [_spell_engine_resource(self.DICT_PREFIX, d) for d in SPELL_DICTS] + \
+            ["langdetect"]
+
+    def _find_typos(self, chunk):
+        self.calc_chunk_state(chunk, None)
 
     def __call__(self, chunk, _):
         self._find_typos(chunk)
@@ -833,4 +984,4 @@ class SpellChecker(IFixableChecker):
                     logging.info("Replaced %s with %s", typo_info['typo'], typo_info['suggest'][0])
                 new_sents.append(sent)
 
-            chunk.get_mod_sents()[:] = new_sents
+            chunk.set_mod_sents(new_sents)
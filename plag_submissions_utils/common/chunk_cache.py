@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Persistent cache of results of checkers for chunks.
+
+Students fix a few rows of sources_list and resubmit the essay,
+so most of the chunks are checked again with the same result.
+An entry is addressed by Chunk.get_digest (the content of the row, but not its number)
+and holds states of all checkers for the chunk (see checkers.IChecher);
+a state is stored under the name of the checker and its get_chunk_cache_key,
+that includes options of the checker and hashes of the source documents it depends on.
+CHUNK_CACHE_VERSION should be bumped whenever results of checkers change.
+The cache is disabled unless CHUNK_CACHE_DIR is set (or configure is called).
+"""
+
+import hashlib
+import logging
+import os
+import os.path as fs
+import pickle
+
+from . import disk_lru
+
+CHUNK_CACHE_DIR = os.environ.get("CHUNK_CACHE_DIR", "")
+CHUNK_CACHE_MAX_SIZE = int(os.environ.get("CHUNK_CACHE_MAX_SIZE", 1024 ** 3))
+
+CHUNK_CACHE_VERSION = "3"
+
+CHUNK_CACHE = None
+
+
+class ChunkResults(object):
+    """Cached states of checkers for one chunk"""
+    def __init__(self, cache, path, states):
+        super(ChunkResults, self).__init__()
+        self._cache  = cache
+        self._path   = path
+        self._states = states
+        self._dirty  = False
+
+    def check(self, checker, chunk, src_docs):
+        """Runs checker for the chunk, unless its state is cached"""
+        key = checker.get_chunk_cache_key(chunk, src_docs)
+        if key is None:
+            checker(chunk, src_docs)
+            return
+        self.get_state(checker, key, chunk, src_docs)
+
+    def get_state(self, checker, key, chunk, src_docs):
+        """Returns the state of the chunk for the cacheable checker;
+        key is checker.get_chunk_cache_key(chunk, src_docs).
+        The state is merged into the checker.
+        """
+        key = "%s.%s:%r" % (type(checker).__module__, type(checker).__name__, key)
+        if key in self._states:
+            self._cache.hits += 1
+            checker.merge_chunk_state(chunk, self._states[key])
+            return self._states[key]
+
+        self._cache.misses += 1
+        state = checker.calc_chunk_state(chunk, src_docs)
+        self._states[key] = state
+        self._dirty = True
+        return state
+
+    def save(self):
+        if self._dirty:
+            self._cache.put(self._path, self._states)
+            self._dirty = False
+
+
+class ChunkCache(object):
+    """Directory with pickled states of checkers.
+    The least recently used entries are removed when the total size exceeds max_size
+    (see disk_lru).
+    """
+    def __init__(self, cache_dir, max_size = CHUNK_CACHE_MAX_SIZE):
+        super(ChunkCache, self).__init__()
+        self._cache_dir = cache_dir
+        self._store     = disk_lru.DiskLRU([cache_dir], max_size, "chunk cache")
+
+        self.hits       = 0
+        self.misses     = 0
+
+        if not fs.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _entry_path(self, chunk):
+        key = hashlib.sha1(("%s:%s" % (CHUNK_CACHE_VERSION,
+                                       chunk.get_digest())).encode('utf8')).hexdigest()
+        return fs.join(self._cache_dir, key[:2], key + ".pickle")
+
+    def get(self, chunk):
+        """Returns ChunkResults; they should be saved after checking of the chunk"""
+        path = self._entry_path(chunk)
+        states = {}
+        try:
+            with open(path, 'rb') as f:
+                states = pickle.load(f)
+            self._store.touch(path)
+        except (IOError, OSError):
+            pass
+        except Exception as e:
+            logging.warning("failed to load cached results %s: %s", path, e)
+        return ChunkResults(self, path, states)
+
+    def put(self, path, states):
+        self._store.put_file(path, lambda f: pickle.dump(states, f,
+                                                         protocol = pickle.HIGHEST_PROTOCOL))
+
+    def get_stat(self):
+        return self.hits, self.misses
+
+    def __str__(self):
+        return "chunk cache %s: hits %d, misses %d" % (self._cache_dir,
+                                                       self.hits, self.misses)
+
+
+def configure(cache_dir, max_size = CHUNK_CACHE_MAX_SIZE):
+    """Set the process-wide cache. Empty cache_dir disables the cache."""
+    global CHUNK_CACHE
+    if cache_dir:
+        CHUNK_CACHE = ChunkCache(cache_dir, max_size)
+    else:
+        CHUNK_CACHE = None
+    return CHUNK_CACHE
+
+def get_chunk_cache():
+    global CHUNK_CACHE
+    if CHUNK_CACHE is None and CHUNK_CACHE_DIR:
+        configure(CHUNK_CACHE_DIR)
+    return CHUNK_CACHE
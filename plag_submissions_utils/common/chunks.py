@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import hashlib
 import logging
-import distance
 
 from . import sents
+from . import token_vocab
+from .lexical_scan import LexicalScan
 from .source_doc import get_src_filename
 
 class ModType(object):
@@ -110,6 +112,10 @@ class Chunk(object):
 
         self._orig_doc            = orig_doc
 
+        #measure_dist, lexical_dist, etc. are calculated once per versions of sentences
+        self._features            = {}
+        self._features_versions   = None
+
     def get_id(self):
         return self.get_chunk_id()
 
@@ -146,13 +152,49 @@ class Chunk(object):
     def get_avg_mod_words_cnt(self):
         return self._modified_sents.get_avg_words_cnt()
 
+    def _get_sents_versions(self):
+        return (self._original_sents.get_version(),
+                self._modified_sents.get_version())
+
+    def _get_feature(self, name, calc):
+        versions = self._get_sents_versions()
+        if versions != self._features_versions:
+            self._features = {}
+            self._features_versions = versions
+        if name not in self._features:
+            self._features[name] = calc()
+        return self._features[name]
+
+    def _get_token_ids(self):
+        return token_vocab.to_ids(self._original_sents.get_all_tokens(),
+                                  self._modified_sents.get_all_tokens())
+
     def measure_dist(self):
-        return distance.nlevenshtein(self.get_orig_tokens(),
-                                     self.get_mod_tokens())
+        return self._get_feature(
+            "measure_dist",
+            lambda: token_vocab.nlevenshtein(*self._get_token_ids()))
 
     def lexical_dist(self):
-        return distance.jaccard(self.get_orig_tokens(),
-                                self.get_mod_tokens())
+        return self._get_feature(
+            "lexical_dist",
+            lambda: token_vocab.jaccard(*self._get_token_ids()))
+
+    def get_lexical_scan(self):
+        """Token views of modified sentences shared by checkers (see lexical_scan)"""
+        return self._get_feature("lexical_scan",
+                                 lambda: LexicalScan(self.get_mod_sents()))
+
+    def _get_content(self):
+        return (type(self).__name__, tuple(self._mod_types), self._orig_doc,
+                self._original_sents.get_content(), self._modified_sents.get_content())
+
+    def get_digest(self):
+        """Hash of the content of the chunk (but not of its id).
+        It is used as a key of cached results of checkers (see chunk_cache).
+        """
+        return self._get_feature(
+            "digest",
+            lambda: hashlib.sha1(repr(self._get_content()).encode('utf8')).hexdigest())
 
     def get_mod_sent_holder(self):
         return self._modified_sents
@@ -166,6 +208,9 @@ class Chunk(object):
     def get_mod_sents(self):
         return self._modified_sents.get_sents()
 
+    def set_mod_sents(self, sents):
+        self._modified_sents.set_sents(sents)
+
     def get_orig_tokens(self):
         return self._original_sents.get_all_tokens()
 
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""On-disk store of cache entries with LRU eviction; it is shared by
+doc_cache, chunk_cache and subm_cache.
+
+Entries are files or directories <root>/<prefix>/<name>; the store may be shared
+by several processes. Modification time of an entry is used as its last access time.
+The size of the store is calculated once and then it is only increased by puts;
+when it exceeds max_size, the least recently used entries are removed until the size
+is below the low water mark, so that the store is not listed on every put.
+Entries that were used within evict_grace seconds are never removed,
+since other processes may still read them.
+"""
+
+import logging
+import os
+import os.path as fs
+import shutil
+import tempfile
+import time
+
+#eviction frees space down to this share of max size, so that it runs rarely
+LOW_WATER = 0.8
+
+
+def calc_size(path):
+    if not fs.isdir(path):
+        return fs.getsize(path)
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += fs.getsize(fs.join(dirpath, filename))
+            except OSError:
+                pass
+    return size
+
+
+class DiskLRU(object):
+    def __init__(self, roots, max_size, name, evict_grace = 0, low_water = LOW_WATER):
+        """roots are directories with prefix subdirs of entries; name is used in logs"""
+        super(DiskLRU, self).__init__()
+        self._roots       = roots
+        self._max_size    = max_size
+        self._low_water   = int(max_size * low_water)
+        self._name        = name
+        self._evict_grace = evict_grace
+        #it is calculated on the first put
+        self._size        = None
+        #the store isn't listed again until its size exceeds this one
+        self._evict_size  = max_size
+
+    def touch(self, path):
+        """Marks the entry as recently used"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def put_file(self, path, write):
+        """Calls write(f) for a temp file and then renames it to path,
+        so that concurrent readers never see partially written entry"""
+        entry_dir = fs.dirname(path)
+        os.makedirs(entry_dir, exist_ok = True)
+        fd, temp_path = tempfile.mkstemp(dir = entry_dir, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        self.add(path, fs.getsize(path))
+
+    def add(self, path, size):
+        """Accounts the new entry of the given size; it may evict other entries."""
+        if self._size is None:
+            self._size = sum(entry_size for _, entry_size, _ in self.list_entries())
+        else:
+            self._size += size
+
+        if self._size > self._evict_size:
+            self._evict(path)
+
+    def list_entries(self):
+        """Returns [(mtime, size, path)]"""
+        entries = []
+        for root in self._roots:
+            if not fs.isdir(root):
+                continue
+            for prefix in os.listdir(root):
+                prefix_dir = fs.join(root, prefix)
+                if not fs.isdir(prefix_dir):
+                    continue
+                for name in os.listdir(prefix_dir):
+                    if name.endswith(".tmp"):
+                        continue
+                    path = fs.join(prefix_dir, name)
+                    try:
+                        entries.append((os.stat(path).st_mtime, calc_size(path), path))
+                    except OSError:
+                        #removed by another process
+                        continue
+        return entries
+
+    def _evict(self, keep_path):
+        """The entry keep_path is just put by the caller, so it is never evicted."""
+        entries = self.list_entries()
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        grace_start = time.time() - self._evict_grace
+        for mtime, size, path in entries:
+            if total_size <= self._low_water:
+                break
+            if path == keep_path or (self._evict_grace and mtime >= grace_start):
+                continue
+            logging.debug("evict %s from %s", path, self._name)
+            try:
+                if fs.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+        self._size = total_size
+        #if recently used entries don't allow to free enough space,
+        #don't list the store on every put
+        self._evict_size = max(self._max_size,
+                               total_size + self._max_size - self._low_water)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Persistent cache of converted and preprocessed source documents.
+
+Documents are addressed by the hash of the file content, the converter
+that is used for the file and text_proc.CONVERTER_VERSION.
+The cache is disabled unless DOC_CACHE_DIR is set (or configure is called).
+"""
+
+import hashlib
+import os
+import os.path as fs
+
+from . import disk_lru
+from . import text_proc
+
+DOC_CACHE_DIR = os.environ.get("DOC_CACHE_DIR", "")
+DOC_CACHE_MAX_SIZE = int(os.environ.get("DOC_CACHE_MAX_SIZE", 2 * 1024 ** 3))
+
+DOC_CACHE = None
+
+
+class DocCache(object):
+    """Directory with converted texts.
+    The least recently used texts are removed when the total size exceeds max_size
+    (see disk_lru).
+    """
+    def __init__(self, cache_dir, max_size = DOC_CACHE_MAX_SIZE):
+        super(DocCache, self).__init__()
+        self._cache_dir = cache_dir
+        self._store     = disk_lru.DiskLRU([cache_dir], max_size, "doc cache")
+
+        self.hits       = 0
+        self.misses     = 0
+
+        if not fs.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def make_key(self, doc_path):
+        sha1 = hashlib.sha1()
+        sha1.update(("%s:%s:" % (text_proc.CONVERTER_VERSION,
+                                 text_proc.get_converter_name(doc_path))).encode('utf8'))
+        with open(doc_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(block)
+        return sha1.hexdigest()
+
+    def _entry_path(self, key):
+        return fs.join(self._cache_dir, key[:2], key + ".txt")
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                text = f.read().decode('utf8')
+            self._store.touch(path)
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        data = text.encode('utf8')
+        self._store.put_file(self._entry_path(key), lambda f: f.write(data))
+
+    def get_stat(self):
+        return self.hits, self.misses
+
+    def __str__(self):
+        return "doc cache %s: hits %d, misses %d" % (self._cache_dir,
+                                                     self.hits, self.misses)
+
+
+def configure(cache_dir, max_size = DOC_CACHE_MAX_SIZE):
+    """Set the process-wide cache. Empty cache_dir disables the cache."""
+    global DOC_CACHE
+    if cache_dir:
+        DOC_CACHE = DocCache(cache_dir, max_size)
+    else:
+        DOC_CACHE = None
+    return DOC_CACHE
+
+def get_doc_cache():
+    global DOC_CACHE
+    if DOC_CACHE is None and DOC_CACHE_DIR:
+        configure(DOC_CACHE_DIR)
+    return DOC_CACHE
@@ -1,11 +1,31 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import logging
 import os
 import os.path as fs
+import shutil
+import tarfile
+import lzma
+import tempfile
+import zipfile
+import zlib
 
 import pyunpack as arc
 
+#submissions are extracted to this (RAM-backed) dir if it has enough free space
+EXTRACT_TEMP_DIR = os.environ.get("EXTRACT_TEMP_DIR", "/dev/shm")
+EXTRACT_TEMP_MIN_FREE = int(os.environ.get("EXTRACT_TEMP_MIN_FREE", 1024 ** 3))
+
+#utf-8 flag of zip member names
+ZIP_UTF8_FLAG = 0x800
+
+#errors of zipfile and tarfile that the external tools may cope with;
+#encrypted zip members raise RuntimeError, unknown compression methods NotImplementedError
+ARCHIVE_READ_ERRORS = (zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError,
+                       RuntimeError, NotImplementedError, EOFError,
+                       zlib.error, lzma.LZMAError, OSError)
+
 class InvalidSubmission(Exception):
     pass
 
@@ -15,9 +35,155 @@ def _skip_file(filename):
         return True
     return False
 
-def extract_submission(arch_path, dest_dir):
-    """raise InvalidSubmission if submission is malformed"""
-    arc.Archive(arch_path, backend="patool").extractall(dest_dir)
+def make_temp_dir():
+    """Creates a temp dir for an extracted submission; the caller should remove it."""
+    if EXTRACT_TEMP_DIR:
+        try:
+            st = os.statvfs(EXTRACT_TEMP_DIR)
+            if st.f_bavail * st.f_frsize >= EXTRACT_TEMP_MIN_FREE:
+                return tempfile.mkdtemp(dir = EXTRACT_TEMP_DIR)
+        except OSError:
+            pass
+    return tempfile.mkdtemp()
+
+
+def _split_member_name(name):
+    """Returns path components of archive member or None if it is unsafe."""
+    if name.startswith("/"):
+        return None
+    parts = [p for p in name.split("/") if p and p != "."]
+    if ".." in parts:
+        return None
+    return tuple(parts)
+
+def _find_submission_members(members):
+    """members: list of (path components, is_dir).
+    Returns path components of sources dir and sources_list file.
+    The rules are the same as in _find_submission_files;
+    if there are several candidates, the last one in the sorted top-down walk is used.
+    """
+    #dir -> (subdirs, files)
+    tree = {(): (set(), set())}
+    for parts, is_dir in members:
+        for i in range(len(parts)):
+            parent = parts[:i]
+            if i + 1 < len(parts) or is_dir:
+                tree.setdefault(parts[:i + 1], (set(), set()))
+                tree[parent][0].add(parts[i])
+            else:
+                tree[parent][1].add(parts[i])
+
+    sources_dir = None
+    sources_list_file = None
+    for dirpath in sorted(tree):
+        #only the dir itself is skipped, as in os.walk; its subdirs are searched
+        if dirpath and dirpath[-1] == "__MACOSX":
+            continue
+        subdirs, files = tree[dirpath]
+        for dirname in sorted(d for d in subdirs if not _skip_file(d)):
+            if dirname.lower().find("sources") != -1:
+                sources_dir = dirpath + (dirname, )
+
+        for filename in sorted(f for f in files if not _skip_file(f)):
+            if filename.lower().find("sources_list") != -1:
+                sources_list_file = dirpath + (filename, )
+                break
+
+    return sources_dir, sources_list_file
+
+def _check_found(sources_dir, sources_list_file):
+    if not sources_dir:
+        raise InvalidSubmission("Не удалось обнаружить папку sources")
+
+    if not sources_list_file:
+        raise InvalidSubmission("Не удалось обнаружить файл sources_list.xlsx")
+
+def _is_needed(parts, sources_dir, sources_list_file):
+    return parts == sources_list_file or parts[:len(sources_dir)] == sources_dir
+
+def _write_member(dest_dir, parts, src):
+    path = fs.join(dest_dir, *parts)
+    os.makedirs(fs.dirname(path), exist_ok = True)
+    with open(path, 'wb') as out:
+        shutil.copyfileobj(src, out)
+
+def _extract_zip(arch_path, dest_dir):
+    """Returns None if the archive should be extracted by external tools."""
+    with zipfile.ZipFile(arch_path) as zf:
+        members = []
+        for info in zf.infolist():
+            name = info.filename
+            if not name.isascii() and not info.flag_bits & ZIP_UTF8_FLAG:
+                #names in legacy encodings are left to unzip
+                return None
+            if "\\" in name:
+                return None
+            parts = _split_member_name(name)
+            if parts is None:
+                logging.warning("skip unsafe member %s of %s", name, arch_path)
+                continue
+            if parts:
+                members.append((parts, info, info.is_dir()))
+
+        sources_dir, sources_list_file = _find_submission_members(
+            [(parts, is_dir) for parts, _, is_dir in members])
+        _check_found(sources_dir, sources_list_file)
+
+        for parts, info, is_dir in members:
+            if _is_needed(parts, sources_dir, sources_list_file):
+                if is_dir:
+                    os.makedirs(fs.join(dest_dir, *parts), exist_ok = True)
+                else:
+                    with zf.open(info) as src:
+                        _write_member(dest_dir, parts, src)
+
+    return sources_dir, sources_list_file
+
+def _extract_tar(arch_path, dest_dir):
+    with tarfile.open(arch_path, "r:*") as tf:
+        members = []
+        for info in tf.getmembers():
+            #links and special files are never extracted
+            if not info.isfile() and not info.isdir():
+                continue
+            parts = _split_member_name(info.name)
+            if parts is None:
+                logging.warning("skip unsafe member %s of %s", info.name, arch_path)
+                continue
+            if parts:
+                members.append((parts, info, info.isdir()))
+
+        sources_dir, sources_list_file = _find_submission_members(
+            [(parts, is_dir) for parts, _, is_dir in members])
+        _check_found(sources_dir, sources_list_file)
+
+        for parts, info, is_dir in members:
+            if _is_needed(parts, sources_dir, sources_list_file):
+                if is_dir:
+                    os.makedirs(fs.join(dest_dir, *parts), exist_ok = True)
+                else:
+                    _write_member(dest_dir, parts, tf.extractfile(info))
+
+    return sources_dir, sources_list_file
+
+def _extract_native(arch_path, dest_dir):
+    """Extracts only sources dir and sources_list from zip or tar archive.
+    Returns None if the archive should be extracted by external tools.
+    """
+    #uncompressed tar with xlsx inside is taken for a zip by is_zipfile
+    if tarfile.is_tarfile(arch_path):
+        found = _extract_tar(arch_path, dest_dir)
+    elif zipfile.is_zipfile(arch_path):
+        found = _extract_zip(arch_path, dest_dir)
+    else:
+        return None
+
+    if found is None:
+        return None
+    sources_dir, sources_list_file = found
+    return fs.join(dest_dir, *sources_dir), fs.join(dest_dir, *sources_list_file)
+
+def _find_submission_files(dest_dir):
     sources_dir = ""
     sources_list_file = ""
 
@@ -34,10 +200,30 @@ def extract_submission(arch_path, dest_dir):
                 sources_list_file = fs.join(dirpath, filename)
                 break
 
-    if not sources_dir:
-        raise InvalidSubmission("Не удалось обнаружить папку sources")
+    _check_found(sources_dir, sources_list_file)
+    return sources_dir, sources_list_file
 
-    if not sources_list_file:
-        raise InvalidSubmission("Не удалось обнаружить файл sources_list.xlsx")
+def _remove_new_entries(dest_dir, old_entries):
+    for entry in set(os.listdir(dest_dir)) - old_entries:
+        path = fs.join(dest_dir, entry)
+        if fs.isdir(path) and not fs.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
 
-    return sources_dir, sources_list_file
+def extract_submission(arch_path, dest_dir):
+    """raise InvalidSubmission if submission is malformed"""
+    old_entries = set(os.listdir(dest_dir))
+    try:
+        found = _extract_native(arch_path, dest_dir)
+    except ARCHIVE_READ_ERRORS as e:
+        #e.g. encrypted members or unsupported compression
+        logging.warning("failed to read %s: %s; extract it with external tools", arch_path, e)
+        _remove_new_entries(dest_dir, old_entries)
+        found = None
+    if found is not None:
+        return found
+
+    logging.debug("extract %s with external tools", arch_path)
+    arc.Archive(arch_path, backend="patool").extractall(dest_dir)
+    return _find_submission_files(dest_dir)
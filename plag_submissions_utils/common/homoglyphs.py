@@ -2,10 +2,10 @@
 # coding: utf-8
 
 
-import copy
-
 from confusable_homoglyphs.categories import alias
 from confusable_homoglyphs.confusables import confusables_data
+
+from . import resources
 #adapted from the confusable_homoglyphs
 
 # http://unicode.org/reports/tr39/
@@ -32,26 +32,51 @@ def _find_confusable(init_char, preferred_aliases, max_transitive_depth = 1):
 
     return {}
 
-def find_homoglyphs(string, preferred_aliases):
-    preferred_aliases = [a.upper() for a in preferred_aliases]
-    outputs = []
-    cache = {}
-    for num, char in enumerate(string):
-        if char in cache:
-            d = copy.copy(cache[char])
-            d['pos'] = num
-            outputs.append(d)
+def _build_homoglyph_table(preferred_aliases):
+    table = {}
+    for char in confusables_data:
+        #there are a few confusable sequences, but only single characters are checked
+        if len(char) != 1:
             continue
         char_alias = alias(char)
         if char_alias in preferred_aliases:
             continue
-
         t = _find_confusable(char, preferred_aliases)
-        if t :
+        if t:
+            table[char] = (char_alias, t)
+    return table
+
+def _normalize_aliases(preferred_aliases):
+    return tuple(sorted(a.upper() for a in preferred_aliases))
+
+def register_homoglyph_table(preferred_aliases):
+    """Registers the table for the preferred aliases in resources, so that it can be preloaded.
+    Returns the name of the resource.
+    """
+    preferred_aliases = _normalize_aliases(preferred_aliases)
+    name = "homoglyphs:%s" % ",".join(preferred_aliases)
+    if not resources.is_registered(name):
+        resources.register(name, lambda: _build_homoglyph_table(preferred_aliases))
+    return name
+
+def get_homoglyph_table(preferred_aliases):
+    """Returns dict: character -> (its alias, {'c': homoglyph, 'a': alias of the homoglyph})
+    for all characters that are confusable with characters of the preferred aliases.
+    Walking confusables_data takes a while, so the table is built once per process.
+    """
+    return resources.get(register_homoglyph_table(preferred_aliases))
+
+def find_homoglyphs(string, preferred_aliases):
+    table = get_homoglyph_table(preferred_aliases)
+    outputs = []
+    for num, char in enumerate(string):
+        entry = table.get(char)
+        if entry is not None:
+            char_alias, t = entry
             outputs.append({
                 'character': char,
                 'alias': char_alias,
-                'homoglyphs': t,
+                'homoglyphs': dict(t),
                 'pos': num
             })
     return outputs
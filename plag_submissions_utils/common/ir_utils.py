@@ -14,6 +14,7 @@ from collections import defaultdict
 import distance
 
 from plag_submissions_utils import common_runner
+from . import text_proc
 from .submissions import run_over_submissions
 from .chunks import ModType
 from .chunks import mod_type_to_str
@@ -137,10 +138,22 @@ def calc_sims(opts, procs):
     def proc_arc(susp_id, _, meta_file_path):
         chunks, _ = common_runner.create_chunks(
             susp_id, meta_file_path, opts = opts)
+        #tokens and edit distances are cached in chunks;
+        #so they are calculated by workers
+        for chunk in chunks:
+            if chunk.get_mod_type() != ModType.ORIG:
+                chunk.measure_dist()
+        return chunks
+
+    def merge_result(_, chunks):
         for proc in procs:
             proc(chunks)
 
-    run_over_submissions(opts.archive_dir, proc_arc)
+    run_over_submissions(opts.archive_dir, proc_arc,
+                         workers = opts.workers,
+                         merge_result = merge_result)
+    if text_proc.MORPH_CACHE is not None:
+        logging.info("%s", text_proc.MORPH_CACHE)
 
 def calc_cos_sim(opts):
     proc = BasicNGramSimProcessor('cos', cos_sim)
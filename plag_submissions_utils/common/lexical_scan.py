@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Lexical views of modified sentences of a chunk that are shared by checkers.
+
+Spell, alphabet and sentence checkers used to tokenize the same sentences
+with their own regexes. Every sentence is scanned once for runs of word characters,
+dots and apostrophes; views of the checkers are split from these runs:
+spell tokens ([\\w.]+ without combining accents) for SpellChecker,
+words ([\\w']+ with positions and script flags) for CyrillicAlphabetChecker.
+The scan is cached on the chunk until its sentences are changed (see Chunk.get_lexical_scan).
+"""
+
+import regex
+
+from . import text_proc
+
+RUN_RE = regex.compile(r"[\w.']+")
+ACCENT_RE = regex.compile(r"\p{Mn}")
+CYRILLIC_LETTER_RE = regex.compile('[а-яА-Я]')
+#allow up to 2 punctuation characters before upper letter or digit.
+TITLE_CASE_START_RE = regex.compile(r"^\p{P}{0,2}(\p{Lu}|\d)")
+
+
+def _split_run(run, start, sep):
+    """Yields (start, piece) of non-empty pieces of the run"""
+    for piece in run.split(sep):
+        if piece:
+            yield start, piece
+        start += len(piece) + 1
+
+
+class LexicalScan(object):
+    def __init__(self, sents):
+        super(LexicalScan, self).__init__()
+        self._sents                  = list(sents)
+        self._spell_tokens           = []
+        #sent_num -> [(start, word, has cyrillic letters)]
+        self._words                  = []
+        self._ends_with_terminal     = []
+        self._starts_with_title_case = []
+        #it is calculated on request, since syntok is slow
+        self._segments_cnt           = None
+
+        for sent in self._sents:
+            self._scan_sent(sent)
+
+    def _scan_sent(self, sent):
+        words = []
+        for m in RUN_RE.finditer(sent):
+            run = m.group()
+            for _, token in _split_run(run, m.start(), "'"):
+                token = ACCENT_RE.sub('', token)
+                #a lone combining accent
+                if token:
+                    self._spell_tokens.append(token)
+            for start, word in _split_run(run, m.start(), "."):
+                words.append((start, word, CYRILLIC_LETTER_RE.search(word) is not None))
+        self._words.append(words)
+
+        self._ends_with_terminal.append(bool(sent) and sent[-1] in text_proc.SENTENCE_TERMINALS)
+        first_token = sent.split(None, 1)[0] if sent.strip() else ''
+        self._starts_with_title_case.append(
+            TITLE_CASE_START_RE.search(first_token) is not None)
+
+    def get_sents(self):
+        return self._sents
+
+    def get_spell_tokens(self):
+        """[\\w.]+ tokens of all sentences without combining accents"""
+        return self._spell_tokens
+
+    def get_words(self, sent_num):
+        """[\\w']+ words of the sentence: (start, word, has cyrillic letters)"""
+        return self._words[sent_num]
+
+    def ends_with_terminal(self, sent_num):
+        return self._ends_with_terminal[sent_num]
+
+    def starts_with_title_case(self, sent_num):
+        return self._starts_with_title_case[sent_num]
+
+    def get_segments_cnt(self):
+        """Number of sentences of the text found by the segmenter"""
+        if self._segments_cnt is None:
+            self._segments_cnt = len(text_proc.seg_text_as_list(' '.join(self._sents)))
+        return self._segments_cnt
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Bounded LRU cache of morphological analysis of tokens.
+
+Essays repeat a small vocabulary heavily, so the analyzer is called
+only once per distinct surface form. The cache may be persisted to
+MORPH_CACHE_PATH, so that repeated runs over the corpus start warm.
+Forked workers exit without atexit handlers, so they save the cache
+after every task (see text_proc.save_morph_cache); entries saved by other
+processes are merged on save, so workers don't overwrite each other's entries.
+"""
+
+import atexit
+import fcntl
+import logging
+import os
+import os.path as fs
+import pickle
+import tempfile
+from collections import OrderedDict
+
+MORPH_CACHE_SIZE = int(os.environ.get("MORPH_CACHE_SIZE", 500000))
+MORPH_CACHE_PATH = os.environ.get("MORPH_CACHE_PATH", "")
+
+
+class MorphCache(object):
+    """Maps surface form of a token to analyze(token).
+    The least recently used entries are dropped when there are more than max_size of them.
+    Entries persisted with another tag (e.g. for another dictionary) are ignored.
+    """
+    def __init__(self, analyze, max_size = MORPH_CACHE_SIZE,
+                 path = None, tag = ""):
+        super(MorphCache, self).__init__()
+        self._analyze  = analyze
+        self._max_size = max_size
+        self._path     = path
+        self._tag      = tag
+        self._entries  = OrderedDict()
+        self._dirty    = False
+        #mtime of the file when it was loaded or saved by this cache
+        self._mtime    = None
+
+        self.hits      = 0
+        self.misses    = 0
+
+        if path:
+            self._load(path)
+            atexit.register(self.save)
+
+    def get(self, token):
+        entry = self._entries.get(token)
+        if entry is not None:
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = self._analyze(token)
+        self._entries[token] = entry
+        self._dirty = True
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last = False)
+        return entry
+
+    def _read(self, path):
+        """Returns entries from the least recently used one or None"""
+        try:
+            self._mtime = os.stat(path).st_mtime_ns
+            with open(path, 'rb') as f:
+                tag, entries = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning("failed to load morph cache %s: %s", path, e)
+            return None
+
+        if tag != self._tag:
+            logging.info("morph cache %s was created for %s, ignore it", path, tag)
+            return None
+        return entries
+
+    def _load(self, path):
+        entries = self._read(path)
+        if entries is None:
+            return
+        self._entries.update(entries[-self._max_size:])
+        logging.debug("%d entries were loaded from %s", len(self._entries), path)
+
+    def _merge_saved(self):
+        """Adds entries saved by other processes as the least recently used ones"""
+        try:
+            if os.stat(self._path).st_mtime_ns == self._mtime:
+                return
+        except FileNotFoundError:
+            return
+        entries = self._read(self._path)
+        if entries is None:
+            return
+        merged = OrderedDict((token, entry) for token, entry in entries
+                             if token not in self._entries)
+        merged.update(self._entries)
+        while len(merged) > self._max_size:
+            merged.popitem(last = False)
+        self._entries = merged
+
+    def save(self):
+        if not self._path or not self._dirty:
+            return
+
+        cache_dir = fs.dirname(fs.abspath(self._path))
+        with open(self._path + ".lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._merge_saved()
+            fd, temp_path = tempfile.mkstemp(dir = cache_dir, suffix = ".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump((self._tag, list(self._entries.items())), f,
+                                protocol = pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self._path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+            self._mtime = os.stat(self._path).st_mtime_ns
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stat(self):
+        return self.hits, self.misses
+
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        if not total:
+            return 0.0
+        return float(self.hits) / total
+
+    def __str__(self):
+        return "morph cache: size %d, hits %d, misses %d, hit rate %.2f%%" % (
+            len(self._entries), self.hits, self.misses, self.get_hit_rate() * 100.0)
@@ -2,11 +2,38 @@
 # coding: utf-8
 
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 from .stats import collect_stat
 from .errors import ErrSeverity
 from .errors import Error
 from . import source_doc
+from . import chunk_cache
+from . import resources
+from . import text_proc
+
+#number of processes that check chunks of a submission in parallel;
+#a single check doesn't fork a pool unless a tool enables it (e.g. checker_cli --chunks_workers)
+CHECK_CHUNKS_WORKERS = int(os.environ.get("CHECK_CHUNKS_WORKERS", 1))
+#chunks are checked in parallel only if every process gets at least that many of them
+MIN_CHUNKS_PER_WORKER = 16
+
+#processor, chunks and source documents of the worker process
+_WORKER_CHECK = None
+
+
+def _init_worker(processor, chunks, src_docs):
+    global _WORKER_CHECK
+    _WORKER_CHECK = processor, chunks, src_docs
+
+def _check_shard(start, end):
+    processor, chunks, src_docs = _WORKER_CHECK
+    states = [processor._calc_chunk_states(chunk, src_docs) for chunk in chunks[start:end]]
+    text_proc.save_morph_cache()
+    return states
+
 
 class BasicProcesssorOpts(object):
     def __init__(self):
@@ -20,6 +47,10 @@ class BasicProcesssorOpts(object):
         self.diff_perc         = {}
 
         self.errors_level = ErrSeverity.NORM
+        #number of processes that convert source documents
+        self.load_sources_workers = source_doc.LOAD_SOURCES_WORKERS
+        #number of processes that check chunks
+        self.check_chunks_workers = CHECK_CHUNKS_WORKERS
 
 class BasicProcessor(object):
     def __init__(self, opts, checkers,
@@ -30,16 +61,94 @@ class BasicProcessor(object):
         self._metrics        = metrics
 
 
-    def _process_chunk(self, chunk, src_docs):
+    def _process_chunk(self, chunk, src_docs, states = None):
+        """states are (key, state) of checkers calculated by a worker process (see _calc_chunk_states).
+        The state is merged only if the checker has the same key in this process,
+        i.e. it does not depend on chunks checked by other workers;
+        otherwise the chunk is checked again.
+        """
+        results = None
+        if states is None:
+            cache = chunk_cache.get_chunk_cache()
+            if cache is not None:
+                results = cache.get(chunk)
 
-        for checker in self._checkers:
+        for num, checker in enumerate(self._checkers):
             try:
-                checker(chunk, src_docs)
+                if states is not None and states[num] is not None and \
+                   states[num][0] == checker.get_chunk_cache_key(chunk, src_docs):
+                    checker.merge_chunk_state(chunk, states[num][1])
+                elif results is None:
+                    checker(chunk, src_docs)
+                else:
+                    results.check(checker, chunk, src_docs)
             except Exception as e:
                 logging.exception("during proc %d: ", chunk.get_chunk_id())
 
+        if results is not None:
+            try:
+                results.save()
+            except Exception as e:
+                logging.warning("failed to cache results for %d: %s", chunk.get_chunk_id(), e)
+
+    def _calc_chunk_states(self, chunk, src_docs):
+        """Returns (key, state) of every cacheable checker for the chunk or None;
+        other checkers are run by _process_chunk in the main process.
+        """
+        cache = chunk_cache.get_chunk_cache()
+        results = cache.get(chunk) if cache is not None else None
+
+        states = []
+        for checker in self._checkers:
+            state = None
+            try:
+                key = checker.get_chunk_cache_key(chunk, src_docs)
+                if key is not None and results is not None:
+                    state = key, results.get_state(checker, key, chunk, src_docs)
+                elif key is not None:
+                    state = key, checker.calc_chunk_state(chunk, src_docs)
+            except Exception:
+                #the chunk is checked again and the error is logged by the main process
+                pass
+            states.append(state)
+
+        if results is not None:
+            try:
+                results.save()
+            except Exception as e:
+                logging.warning("failed to cache results for %d: %s", chunk.get_chunk_id(), e)
+        return states
+
+    def _get_checkers_resources(self):
+        names = []
+        for checker in self._checkers:
+            get_resources = getattr(checker, "get_resources", None)
+            if get_resources is not None:
+                names.extend(n for n in get_resources() if n not in names)
+        return names
+
+    def _process_chunks_in_parallel(self, chunks, src_docs, workers):
+        logging.debug("checking %d chunks in %d processes", len(chunks), workers)
+        bounds = [len(chunks) * i // workers for i in range(workers + 1)]
+        #dictionaries of the checkers are loaded once here instead of in every worker
+        resources.preload(self._get_checkers_resources())
+        for doc in src_docs.values():
+            doc.build_seed_index()
+        #checkers, chunks and source documents are shared with forked workers
+        with ProcessPoolExecutor(max_workers = workers,
+                                 mp_context = multiprocessing.get_context("fork"),
+                                 initializer = _init_worker,
+                                 initargs = (self, chunks, src_docs)) as executor:
+            futures = [executor.submit(_check_shard, bounds[i], bounds[i + 1])
+                       for i in range(workers)]
+            #states are merged in the order of chunks, as if they were checked serially
+            for start, future in zip(bounds, futures):
+                for num, states in enumerate(future.result(), start):
+                    self._process_chunk(chunks[num], src_docs, states)
+
     def _load_sources_docs(self, sources_dir):
-        return source_doc.load_sources_docs(sources_dir)
+        return source_doc.load_sources_docs(sources_dir,
+                                            workers = self._opts.load_sources_workers)
 
 
 
@@ -61,8 +170,13 @@ class BasicProcessor(object):
             metric(stat, chunks)
 
         src_docs = self._load_sources_docs(sources_dir)
-        for chunk in chunks:
-            self._process_chunk(chunk, src_docs)
+        workers = min(self._opts.check_chunks_workers,
+                      len(chunks) // MIN_CHUNKS_PER_WORKER)
+        if workers > 1:
+            self._process_chunks_in_parallel(chunks, src_docs, workers)
+        else:
+            for chunk in chunks:
+                self._process_chunk(chunk, src_docs)
 
         for checker in self._checkers:
             errors.extend(e for e in checker.get_errors())
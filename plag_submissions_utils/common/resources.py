@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Process-wide registry of heavy resources: hunspell dictionaries,
+pymorphy2 analyzer, langdetect profiles.
+
+A resource is registered with a loader and is loaded once per process on the first get,
+so checkers created for every submission share it. preload loads all registered resources;
+it should be called before workers are forked, so that they share the loaded pages
+instead of loading their own copies. Load time of every resource is kept for monitoring.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+#name -> loader
+LOADERS = OrderedDict()
+#name -> loaded resource
+RESOURCES = {}
+#name -> load time in seconds
+LOAD_TIMES = OrderedDict()
+
+_LOCK = threading.RLock()
+
+
+def register(name, loader):
+    """Registers loader of the resource; it is not called until the resource is requested.
+    Already loaded resource is not replaced.
+    """
+    with _LOCK:
+        LOADERS[name] = loader
+
+def is_registered(name):
+    return name in LOADERS
+
+def is_loaded(name):
+    return name in RESOURCES
+
+def get(name):
+    """Returns the resource, loading it on the first call.
+    KeyError is raised for unregistered names; errors of the loader are propagated
+    and the resource is loaded again on the next call.
+    """
+    resource = RESOURCES.get(name)
+    if resource is not None:
+        return resource
+
+    with _LOCK:
+        if name not in RESOURCES:
+            loader = LOADERS[name]
+            start = time.time()
+            RESOURCES[name] = loader()
+            LOAD_TIMES[name] = time.time() - start
+            logging.info("loaded %s in %.3fs", name, LOAD_TIMES[name])
+        return RESOURCES[name]
+
+def preload(names = None):
+    """Loads all registered resources (or only the listed ones).
+    Resources are registered by the modules that use them, when they are imported.
+    Failures are logged, since a missing resource is not fatal until it is used.
+    Returns names of resources that failed to load.
+    """
+    if names is None:
+        names = list(LOADERS.keys())
+
+    failed = []
+    for name in names:
+        try:
+            get(name)
+        except Exception as e:
+            logging.warning("Failed to load %s: %s", name, e)
+            failed.append(name)
+    return failed
+
+def get_load_times():
+    """Returns list of (name, load time in seconds) in the order of loading"""
+    return list(LOAD_TIMES.items())
+
+def format_load_times():
+    return ", ".join("%s %.3fs" % (name, secs) for name, secs in get_load_times())
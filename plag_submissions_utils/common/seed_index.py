@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Character n-gram (seed) index over a long text.
+
+It is used to find the longest common substring of a text and a short query
+without scanning the whole text with difflib.
+"""
+
+import difflib
+from array import array
+
+
+class SeedIndex(object):
+    """Positions of every character n-gram of the text (a seed).
+
+    Seeds are hashed into buckets and positions of each bucket are stored contiguously
+    in one array, so the index takes about 8 bytes per character of the text.
+    A bucket may hold positions of other seeds with the same hash,
+    so positions are checked against the text.
+    """
+    def __init__(self, text, seed_len = 8):
+        super(SeedIndex, self).__init__()
+        self._text     = text
+        self._seed_len = seed_len
+        self._mask, self._offsets, self._positions = self._build(text, seed_len)
+
+    @staticmethod
+    def _build(text, seed_len):
+        seeds_cnt = max(len(text) - seed_len + 1, 0)
+        #power of 2 not less than the number of seeds, so buckets are short
+        mask = (1 << max(seeds_cnt - 1, 0).bit_length()) - 1
+
+        buckets = array('I', (hash(text[pos:pos + seed_len]) & mask
+                              for pos in range(seeds_cnt)))
+        #counting sort of positions by buckets; positions of a bucket are sorted
+        offsets = array('i', bytes(4 * (mask + 2)))
+        for bucket in buckets:
+            offsets[bucket + 1] += 1
+        for bucket in range(mask + 1):
+            offsets[bucket + 1] += offsets[bucket]
+
+        positions = array('i', bytes(4 * seeds_cnt))
+        next_offs = array('i', offsets)
+        for pos, bucket in enumerate(buckets):
+            positions[next_offs[bucket]] = pos
+            next_offs[bucket] += 1
+        return mask, offsets, positions
+
+    def _get_bucket(self, seed):
+        bucket = hash(seed) & self._mask
+        return self._positions[self._offsets[bucket]:self._offsets[bucket + 1]]
+
+    def get_seed_len(self):
+        return self._seed_len
+
+    def get_positions(self, seed):
+        """Sorted positions of the seed in the text
+        (seed should be exactly seed_len characters long).
+        """
+        return [pos for pos in self._get_bucket(seed) if self._text.startswith(seed, pos)]
+
+    def find_longest_match(self, query):
+        """Returns the same difflib.Match as
+        SequenceMatcher(a = text, b = query, autojunk = False).find_longest_match(...)
+        over the whole text and query, i.e. the longest block with the smallest
+        offset in the text and then with the smallest offset in the query.
+
+        Blocks shorter than seed_len can't be found via the index;
+        None is returned in this case and the caller should fallback to difflib.
+        """
+        text = self._text
+        text_len = len(text)
+        query_len = len(query)
+        seed_len = self._seed_len
+
+        best_a, best_b, best_size = 0, 0, 0
+        #diagonal (a - b) -> end of the last block in the query on this diagonal
+        covered = {}
+        for b in range(query_len - seed_len + 1):
+            seed = query[b:b + seed_len]
+            for a in self._get_bucket(seed):
+                if not text.startswith(seed, a):
+                    continue
+                diag = a - b
+                if covered.get(diag, -1) > b:
+                    #this seed lies inside the already found block
+                    continue
+
+                beg_a, beg_b = a, b
+                while beg_a > 0 and beg_b > 0 and text[beg_a - 1] == query[beg_b - 1]:
+                    beg_a -= 1
+                    beg_b -= 1
+
+                end_a, end_b = a + seed_len, b + seed_len
+                while end_a < text_len and end_b < query_len and text[end_a] == query[end_b]:
+                    end_a += 1
+                    end_b += 1
+
+                covered[diag] = end_b
+                size = end_b - beg_b
+                if size > best_size or \
+                   (size == best_size and (beg_a, beg_b) < (best_a, best_b)):
+                    best_a, best_b, best_size = beg_a, beg_b, size
+
+        if best_size < seed_len:
+            return None
+        return difflib.Match(best_a, best_b, best_size)
@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import itertools
+
 from . import text_proc
 
+_VERSIONS = itertools.count()
+
 class SentInfo(object):
     """Documentation for SentInfo
 
@@ -19,12 +23,14 @@ def create_sent_info(sent):
 class SentsHolder(object):
     """Documentation for SentsHolder
 
+    Sentences are tokenized on the first access to tokens or sent infos.
     """
     def __init__(self, text, opts, segment = False):
         super().__init__()
         self._opts = opts
         self._sents = []
-        self._sent_tokens = []
+        #sentences (or their syntok tokens after segmentation) that should be tokenized
+        self._tok_sources = []
         if isinstance(text, list):
             #It is possible in essays of version 2.
             #Original text is already segmented by writer!
@@ -35,41 +41,74 @@ class SentsHolder(object):
                 for sent, tokens in res:
                     if len(sent) > 1:
                         self._sents.append(sent)
-                        norm_tokens = text_proc.tok_sent(tokens = tokens,
-                                                         normalize = opts.normalize,
-                                                         skip_stop_words = opts.skip_stop_words)
-                        self._sent_tokens.append(norm_tokens)
+                        self._tok_sources.append(tokens)
             else:
                 if len(text.strip()) > 1:
                     self._sents = [text.strip()]
 
-        if not self._sent_tokens:
+        if not self._tok_sources:
+            self._tok_sources = list(self._sents)
+
+        self._sent_tokens = None
+        self._sent_infos = None
+        self._version = next(_VERSIONS)
+
+    def get_version(self):
+        """It is changed on every change of sentences;
+        versions of different holders never coincide.
+        """
+        return self._version
+
+    def _tok_sent(self, source):
+        if isinstance(source, str):
+            return text_proc.tok_sent(source,
+                                      normalize = self._opts.normalize,
+                                      skip_stop_words = self._opts.skip_stop_words)
+        return text_proc.tok_sent(tokens = source,
+                                  normalize = self._opts.normalize,
+                                  skip_stop_words = self._opts.skip_stop_words)
+
+    def _get_sent_tokens(self):
+        if self._sent_tokens is None:
+            self._sent_tokens = [self._tok_sent(s) for s in self._tok_sources]
+        return self._sent_tokens
 
-            self._sent_tokens = [text_proc.tok_sent(s, normalize = opts.normalize,
-                                                    skip_stop_words = opts.skip_stop_words)
-                                 for s in self._sents]
-        self._sent_infos = [SentInfo(len(t)) for t in self._sent_tokens]
+    def _get_sent_infos(self):
+        if self._sent_infos is None:
+            self._sent_infos = [SentInfo(len(t)) for t in self._get_sent_tokens()]
+        return self._sent_infos
 
     def get_avg_words_cnt(self):
-        if not self._sent_infos:
+        sent_infos = self._get_sent_infos()
+        if not sent_infos:
             return 0.0
-        words_cnt = sum(si.word_cnt for si in self._sent_infos)
-        return float(words_cnt)/ len(self._sent_infos)
+        words_cnt = sum(si.word_cnt for si in sent_infos)
+        return float(words_cnt)/ len(sent_infos)
 
     def get_sent_info(self, sent_num):
-        return self._sent_infos[sent_num]
+        return self._get_sent_infos()[sent_num]
 
     def add_sent(self, sent, tokenize = True):
         self._sents.append(sent)
         if tokenize:
-            tokens = text_proc.tok_sent(sent,
-                                        normalize = self._opts.normalize,
-                                        skip_stop_words = self._opts.skip_stop_words)
-            self._sent_tokens.append(tokens)
-            self._sent_infos.append(SentInfo(len(tokens)))
+            self._tok_sources.append(sent)
+            self._sent_tokens = None
+            self._sent_infos = None
+        self._version = next(_VERSIONS)
+
+    def set_sents(self, sents):
+        """Replaces all sentences (e.g. after fixing them).
+        Sentences are tokenized again.
+        """
+        self._sents[:] = sents
+        self._tok_sources = list(self._sents)
+        self._sent_tokens = None
+        self._sent_infos = None
+        self._version = next(_VERSIONS)
 
 
     def get_sents(self):
+        """Use set_sents to change sentences."""
         return self._sents
 
     def get_text(self):
@@ -77,9 +116,15 @@ class SentsHolder(object):
 
     def get_all_tokens(self):
         all_tokens = []
-        for t in self._sent_tokens:
+        for t in self._get_sent_tokens():
             all_tokens.extend(t)
         return all_tokens
 
     def get_tokens_list(self):
-        return self._sent_tokens
+        return self._get_sent_tokens()
+
+    def get_content(self):
+        """Everything tokens depend on; see Chunk.get_digest"""
+        segmented = not all(isinstance(s, str) for s in self._tok_sources)
+        return (tuple(self._sents), segmented,
+                self._opts.normalize, self._opts.skip_stop_words)
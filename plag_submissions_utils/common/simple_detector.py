@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+from array import array
+from bisect import bisect_left
 import logging
 import string
 
@@ -32,6 +34,29 @@ def _tokenize(text, length):
 
     return tokens
 
+def _extend_detection(d, susp_occurrences, susp_text, src_text):
+    """Extends the detected n-gram (d) as long as the source and
+    the suspicious text match after any of its occurrences in the suspicious text.
+    """
+    for t in susp_occurrences:
+        start_src = d[0][0]
+        start_susp = t[0]
+        while (start_susp < len(susp_text) and
+               start_src < len(src_text) and
+               src_text[start_src] == susp_text[start_susp]):
+            start_susp = start_susp + 1
+            start_src = start_src + 1
+            while (start_susp < len(susp_text) and
+                   susp_text[start_susp] in DELETECHARS):
+                start_susp = start_susp + 1
+            while (start_src < len(src_text) and
+                   src_text[start_src] in DELETECHARS):
+                start_src = start_src + 1
+        if (start_src - 1) - d[0][0] > d[0][1] - d[0][0]:
+            d = ((d[0][0], start_src), (t[0], start_susp))
+    return d
+
+
 class SimpleDetectorOpts(object):
     """Documentation for SimpleDetectorOpts
 
@@ -68,22 +93,8 @@ class SimpleDetector(object):
                         d = ((token[0][0],token[-1][0]),
                              (susp_tokens[ngram][0][0],
                               susp_tokens[ngram][0][1]))
-                        for t in susp_tokens[ngram]:
-                            start_src = token[0][0]
-                            start_susp = t[0]
-                            while (start_susp < len(susp_text) and
-                                   start_src < len(src_text) and
-                                   src_text[start_src] == susp_text[start_susp]):
-                                start_susp = start_susp + 1
-                                start_src = start_src + 1
-                                while (start_susp < len(susp_text) and
-                                       susp_text[start_susp] in DELETECHARS):
-                                    start_susp = start_susp + 1
-                                while (start_src < len(src_text) and
-                                       src_text[start_src] in DELETECHARS):
-                                    start_src = start_src + 1
-                            if (start_src - 1) - token[0][0] > d[0][1] - d[0][0]:
-                                d = ((token[0][0], start_src), (t[0], start_susp))
+                        d = _extend_detection(d, susp_tokens[ngram],
+                                              susp_text, src_text)
                         detections.append(d)
                         skipto = d[0][1]
                         if skipto < len(src_text):
@@ -97,6 +108,109 @@ class SimpleDetector(object):
         logging.debug("\n".join(str(d) for d in detections))
         return detections
 
+DELETECHARS_SET = frozenset(DELETECHARS)
+DELETECHARS_TABLE = dict.fromkeys(ord(c) for c in DELETECHARS)
+HASH_BASE = 1000003
+HASH_MOD = (1 << 61) - 1
+
+def _kept_chars(text):
+    """Returns positions (array) and lowercased string of the characters
+    that are not in DELETECHARS.
+    None is returned if some character is lowercased to several characters;
+    n-grams of such text can't be compared char by char.
+    """
+    lower_table = {}
+    for c in set(text):
+        if c in DELETECHARS:
+            continue
+        lower = c.lower()
+        if len(lower) != 1:
+            return None
+        if lower != c:
+            lower_table[ord(c)] = lower
+
+    positions = array('q', [i for i, c in enumerate(text) if c not in DELETECHARS_SET])
+    kept = text.translate(DELETECHARS_TABLE).translate(lower_table)
+    return positions, kept
+
+def _rolling_hashes(kept, length):
+    """Polynomial hashes of all substrings of the given length."""
+    if len(kept) < length:
+        return []
+    codes = [ord(c) for c in kept]
+    high = pow(HASH_BASE, length - 1, HASH_MOD)
+    h = 0
+    for code in codes[:length]:
+        h = (h * HASH_BASE + code) % HASH_MOD
+
+    hashes = [h]
+    for old, new in zip(codes, codes[length:]):
+        h = ((h - old * high) * HASH_BASE + new) % HASH_MOD
+        hashes.append(h)
+    return hashes
+
+
+class RollingHashDetector(object):
+    """The same detections as SimpleDetector,
+    but n-grams are compared by their rolling (Rabin-Karp) hashes
+    instead of building a string for every position of the texts.
+    """
+
+    def __init__(self, opts = SimpleDetectorOpts()):
+        super(RollingHashDetector, self).__init__()
+        self._opts = opts
+
+    def __call__(self, susp_text, src_text):
+        length = self._opts.lenght
+        susp = _kept_chars(susp_text)
+        src = _kept_chars(src_text)
+        if length < 2 or susp is None or src is None:
+            return SimpleDetector(self._opts)(susp_text, src_text)
+
+        susp_positions, susp_kept = susp
+        src_positions, src_kept = src
+
+        #hash -> start indices of n-grams in susp_kept
+        susp_index = {}
+        for j, h in enumerate(_rolling_hashes(susp_kept, length)):
+            occurrences = susp_index.get(h)
+            if occurrences is None:
+                susp_index[h] = [j]
+            else:
+                occurrences.append(j)
+
+        src_hashes = _rolling_hashes(src_kept, length)
+        detections = []
+        k = 0
+        while k < len(src_hashes):
+            occurrences = susp_index.get(src_hashes[k])
+            if occurrences is None:
+                k += 1
+                continue
+
+            ngram = src_kept[k:k + length]
+            #skip hash collisions
+            occurrences = [(susp_positions[j], susp_positions[j + length - 1])
+                           for j in occurrences
+                           if susp_kept.startswith(ngram, j)]
+            if not occurrences:
+                k += 1
+                continue
+
+            d = ((src_positions[k], src_positions[k + length - 1]),
+                 occurrences[0])
+            d = _extend_detection(d, occurrences, susp_text, src_text)
+            detections.append(d)
+            skipto = d[0][1]
+            if skipto >= len(src_text):
+                break
+            #the next n-gram starts from the end of the detection
+            k = bisect_left(src_positions, skipto)
+
+        logging.debug("%d fragments were detected!", len(detections))
+        logging.debug("\n".join(str(d) for d in detections))
+        return detections
+
 def calc_originality_by_detections(detections, susp_text):
     if not susp_text:
         return 0.0
@@ -106,6 +220,6 @@ def calc_originality_by_detections(detections, susp_text):
 
 def calc_originality(susp_text, src_text, detector = None):
     if detector is None:
-        detector = SimpleDetector()
+        detector = RollingHashDetector()
     detections = detector(susp_text, src_text)
     return calc_originality_by_detections(detections, susp_text)
@@ -2,16 +2,23 @@
 # coding: utf-8
 
 import codecs
+import hashlib
 import os
 import os.path as fs
 import difflib
+from concurrent.futures import ProcessPoolExecutor
 
 import logging
 
 
 from . import text_proc
+from . import doc_cache
+from .seed_index import SeedIndex
 
 WHITELIST_EXTENSIONS = frozenset(['pdf', 'htm', 'html', 'txt', 'doc', 'docx', 'rtf', 'odt'])
+#number of processes that convert source documents in parallel;
+#a pool is not worth forking for a single check (e.g. CGI), so command line tools opt in
+LOAD_SOURCES_WORKERS = int(os.environ.get("LOAD_SOURCES_WORKERS", 1))
 
 def get_src_filename(path):
     basename = fs.basename(path).strip()
@@ -28,7 +35,8 @@ def get_src_filename(path):
 
 def find_src_paths(sources_dir):
     sources_dict = {}
-    entries = os.listdir(sources_dir)
+    #sorted, so that ids of sources do not depend on where the submission was extracted
+    entries = sorted(os.listdir(sources_dir))
     for entry in entries:
         try:
             doc_path = fs.join(sources_dir, entry)
@@ -46,30 +54,105 @@ def find_src_paths(sources_dir):
     return sources_dict
 
 
-def load_sources_docs(sources_dir):
+def load_doc_text(doc_path):
+    """Returns converted and preprocessed text of the document.
+    The text is taken from doc_cache if it is enabled.
+    """
+    cache = doc_cache.get_doc_cache()
+    key = None
+    if cache is not None:
+        try:
+            key = cache.make_key(doc_path)
+            text = cache.get(key)
+            if text is not None:
+                logging.debug("%s was found in doc cache", doc_path)
+                return text
+        except (IOError, OSError) as e:
+            logging.warning("failed to use doc cache for %s: %s", doc_path, e)
+            key = None
+
+    text = text_proc.convert_doc(doc_path)
+    text = text_proc.preprocess_text(text, split_on_paragraphs=True)
+
+    if key is not None:
+        try:
+            cache.put(key, text)
+        except (IOError, OSError) as e:
+            logging.warning("failed to put %s to doc cache: %s", doc_path, e)
+    return text
+
+
+def load_sources_docs(sources_dir, workers = None):
+    """Converts all documents from sources_dir.
+    Documents are converted in a pool of worker processes if workers > 1.
+    """
     paths_dict = find_src_paths(sources_dir)
-    return {k:SourceDoc(paths_dict[k]) for k in paths_dict}
+    if workers is None:
+        workers = LOAD_SOURCES_WORKERS
+    workers = min(workers, len(paths_dict))
+    if workers <= 1:
+        return {k:SourceDoc(paths_dict[k]) for k in paths_dict}
+
+    logging.debug("loading %d sources in %d processes", len(paths_dict), workers)
+    text_proc.prepare_converters()
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        #workers only convert documents, everything else is done once here
+        futures = {k:executor.submit(load_doc_text, paths_dict[k]) for k in paths_dict}
+        return {k:SourceDoc(paths_dict[k], text = futures[k].result()) for k in paths_dict}
 
 
 class SourceDoc(object):
     def __init__(self, doc_path, max_length_delta = 4,
-                 max_offs_delta = 160):
+                 max_offs_delta = 160, seed_len = 8, text = None):
+        """text is the result of load_doc_text(doc_path), if it is already loaded"""
         logging.debug("trying to parse %s", doc_path)
         # self._filename         = get_src_filename(doc_path)
-        self._text             = text_proc.convert_doc(doc_path)
-        self._text             = text_proc.preprocess_text(self._text, split_on_paragraphs=True)
+        if text is None:
+            text = load_doc_text(doc_path)
+        self._text             = text
         logging.debug("stripped source doc: %s", self._text)
 
         self._max_length_delta = max_length_delta
         self._max_offs_delta   = max_offs_delta
-
-    def _try_sequence_matcher(self, sent):
+        #index of char n-grams; it is used to find seeds for sequence matcher.
+        #It is built on the first lookup, since some tools never search the text
+        self._seed_len         = seed_len
+        self._seed_index       = None
+        self._digest           = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        #the index is larger than the text and is cheaper to rebuild than to transfer;
+        #it is rebuilt on the first lookup after unpickling
+        state['_seed_index'] = None
+        return state
+
+    def _get_seed_index(self):
+        if self._seed_index is None:
+            self._seed_index = SeedIndex(self._text, self._seed_len)
+        return self._seed_index
+
+    def build_seed_index(self):
+        """Builds the index now instead of on the first lookup,
+        e.g. so that forked workers share it instead of building their own copies"""
+        self._get_seed_index()
+
+    def _find_longest_match(self, sent):
+        longest_match = self._get_seed_index().find_longest_match(sent)
+        if longest_match is not None:
+            return longest_match
+
+        #the longest match is shorter than seed; scan the whole text
+        logging.debug("no seeds were found, fallback to full scan")
         matcher = difflib.SequenceMatcher(a = self._text,
                                           b = sent,
                                           autojunk = False)
+        return matcher.find_longest_match(0, len(self._text),
+                                          0, len(sent))
+
+    def _try_sequence_matcher(self, sent):
         #find seed
-        longest_match = matcher.find_longest_match(0, len(self._text),
-                                                   0, len(sent))
+        longest_match = self._find_longest_match(sent)
 
         #we should step back on the size of the prefix of the target sent (longest_match.b)
         #and we should step back on some extra size (max_offs_delta)
@@ -82,7 +165,9 @@ class SourceDoc(object):
         logging.debug("left_a_pos: %d", left_a_pos)
         logging.debug("right_a_pos: %d", right_a_pos)
         logging.debug("set text: %s", self._text[left_a_pos:right_a_pos])
-        matcher.set_seq1(self._text[left_a_pos:right_a_pos])
+        matcher = difflib.SequenceMatcher(a = self._text[left_a_pos:right_a_pos],
+                                          b = sent,
+                                          autojunk = False)
 
         #matches[-1] is reserved by difflib creator
         matches = [m for m in matcher.get_matching_blocks() if m.size > 1]
@@ -116,12 +201,30 @@ class SourceDoc(object):
         return None
 
 
-    def is_sent_in_doc(self, sent):
-        return self.get_sent_offs(sent) is not None
-
-    def get_sent_offs(self, sent,
-                      preproc_sent = True):
-
+    def _find(self, text):
+        """The same as self._text.find(text),
+        but only positions of the rarest seed of the text are checked.
+        """
+        seed_index = self._get_seed_index()
+        seed_len = seed_index.get_seed_len()
+        if len(text) < seed_len:
+            return self._text.find(text)
+
+        rarest_offs, rarest_positions = 0, None
+        for offs in range(len(text) - seed_len + 1):
+            positions = seed_index.get_positions(text[offs:offs + seed_len])
+            if not positions:
+                return -1
+            if rarest_positions is None or len(positions) < len(rarest_positions):
+                rarest_offs, rarest_positions = offs, positions
+
+        for pos in rarest_positions:
+            pos -= rarest_offs
+            if pos >= 0 and self._text.startswith(text, pos):
+                return pos
+        return -1
+
+    def _prepare_sent(self, sent, preproc_sent):
         text = sent
         if preproc_sent:
             text = text_proc.preprocess_text(text.strip())
@@ -129,14 +232,46 @@ class SourceDoc(object):
         if not text:
             raise RuntimeError("no text left after text preprocessing")
         logging.debug("stripped text: %s", text)
+        return text
+
+    def _get_offs(self, text):
         #first approach
-        pos = self._text.find(text)
+        pos = self._find(text)
         if pos != -1:
             return (pos, pos + len(text), 0)
 
         logging.debug("failed to use literal find, fallback to seq matching")
         return self._try_sequence_matcher(text)
 
+    def is_sent_in_doc(self, sent):
+        return self.get_sent_offs(sent) is not None
+
+    def get_sent_offs(self, sent,
+                      preproc_sent = True):
+        return self._get_offs(self._prepare_sent(sent, preproc_sent))
+
+    def get_sents_offs(self, sents,
+                       preproc_sent = True):
+        """Batch version of get_sent_offs.
+        Returns a list with offsets (or None) for each of sents.
+        Exact matches of all sentences are searched first;
+        sequence matcher is used only for the rest.
+        """
+        texts = [self._prepare_sent(s, preproc_sent) for s in sents]
+
+        offsets = {}
+        for text in texts:
+            if text not in offsets:
+                pos = self._find(text)
+                offsets[text] = (pos, pos + len(text), 0) if pos != -1 else None
+
+        for text in offsets:
+            if offsets[text] is None:
+                logging.debug("failed to use literal find, fallback to seq matching")
+                offsets[text] = self._try_sequence_matcher(text)
+
+        return [offsets[text] for text in texts]
+
 
 
     # def get_filename(self):
@@ -145,6 +280,15 @@ class SourceDoc(object):
     def get_text(self):
         return self._text
 
+    def get_digest(self):
+        """Hash of the text and the options of the search of sentences"""
+        if self._digest is None:
+            sha1 = hashlib.sha1(("%d:%d:%d:" % (self._max_length_delta, self._max_offs_delta,
+                                                self._seed_len)).encode('utf8'))
+            sha1.update(self._text.encode('utf8'))
+            self._digest = sha1.hexdigest()
+        return self._digest
+
     def write_text_to_file(self, file_path):
         with codecs.open(file_path, 'w', encoding="utf8", errors="strict") as f:
             f.write(self._text)
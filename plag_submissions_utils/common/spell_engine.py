@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Hunspell dictionary with cached verdicts.
+
+Essays repeat a small vocabulary heavily, so spell is called only once
+per distinct token. suggest is the most expensive operation of hunspell;
+suggestions are calculated only on request (e.g. for typos that are reported)
+and are cached too. Engines are shared by all spell checkers of the process,
+so the cache is kept across submissions in batch runs.
+"""
+
+import os
+from collections import OrderedDict
+
+SPELL_CACHE_SIZE = int(os.environ.get("SPELL_CACHE_SIZE", 200000))
+
+
+class SpellEngine(object):
+    """The least recently used verdicts are dropped when there are more than max_size of them."""
+    def __init__(self, spell_dict, max_size = SPELL_CACHE_SIZE, name = ""):
+        super(SpellEngine, self).__init__()
+        self._dict           = spell_dict
+        self._encoding       = spell_dict.get_dic_encoding()
+        self._max_size       = max_size
+        self._name           = name
+        #token -> is it spelled correctly
+        self._verdicts       = OrderedDict()
+        #token -> suggestions
+        self._suggestions    = OrderedDict()
+
+        self.hits            = 0
+        self.misses          = 0
+        self.suggest_hits    = 0
+        self.suggest_misses  = 0
+
+    def _encode(self, token):
+        return token.encode(self._encoding, 'replace')
+
+    def _get(self, entries, token, calc):
+        entry = entries.get(token)
+        if entry is not None:
+            entries.move_to_end(token)
+            return entry, True
+
+        entry = calc(token)
+        entries[token] = entry
+        if len(entries) > self._max_size:
+            entries.popitem(last = False)
+        return entry, False
+
+    def spell(self, token):
+        ok, hit = self._get(self._verdicts, token,
+                            lambda t: bool(self._dict.spell(self._encode(t))))
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return ok
+
+    def _calc_suggestions(self, token):
+        #see HunSpell_suggest https://github.com/blatinier/pyhunspell/blob/master/hunspell.cpp#L171
+        return [s.encode('latin1').decode(self._encoding)
+                for s in self._dict.suggest(self._encode(token))]
+
+    def suggest(self, token):
+        suggestions, hit = self._get(self._suggestions, token, self._calc_suggestions)
+        if hit:
+            self.suggest_hits += 1
+        else:
+            self.suggest_misses += 1
+        return suggestions
+
+    def get_stat(self):
+        return self.hits, self.misses, self.suggest_hits, self.suggest_misses
+
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        if not total:
+            return 0.0
+        return float(self.hits) / total
+
+    def __str__(self):
+        return "spell engine %s: size %d, hits %d, misses %d, hit rate %.2f%%," \
+            " suggest hits %d, suggest misses %d" % (
+                self._name, len(self._verdicts), self.hits, self.misses,
+                self.get_hit_rate() * 100.0, self.suggest_hits, self.suggest_misses)
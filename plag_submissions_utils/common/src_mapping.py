@@ -67,6 +67,10 @@ class SrcMap(object):
     def update_src(self, src):
         self._srcs[src.get_res_id()] = src
 
+    def merge(self, other):
+        for src in other._srcs.values():
+            self.update_src(src)
+
     def get_src_by_filename(self, susp_id, src_filename):
         return self._srcs[gen_res_id(susp_id, src_filename)]
 
@@ -25,16 +25,30 @@ class SubmissionStat(object):
         self.orig_sent_lengths = orig_sent_lengths if orig_sent_lengths is not None else []
         self.mod_sent_lengths  = mod_sent_lengths if mod_sent_lengths is not None else []
         self.mod_type_freqs    = mod_type_freqs if mod_type_freqs is not None else \
-                                 defaultdict(lambda : 0)
-        self.mod_type_co_occur = defaultdict(lambda : 0)
+                                 defaultdict(int)
+        self.mod_type_co_occur = defaultdict(int)
         self.unmod_translated_sents = 0
 
         self.translation_type_freqs = translation_type_freqs if translation_type_freqs is not None else \
-            defaultdict(lambda: 0)
+            defaultdict(int)
 
-        self.docs_freqs        = docs_freqs if docs_freqs is not None else defaultdict(lambda : 0)
+        self.docs_freqs        = docs_freqs if docs_freqs is not None else defaultdict(int)
         self.src_sents_cnt     = src_sents_cnt
 
+    def merge(self, other):
+        """Adds stat of other submissions."""
+        self.chunks_cnt += other.chunks_cnt
+        self.orig_sent_lengths.extend(other.orig_sent_lengths)
+        self.mod_sent_lengths.extend(other.mod_sent_lengths)
+        for freqs, other_freqs in [(self.mod_type_freqs, other.mod_type_freqs),
+                                   (self.mod_type_co_occur, other.mod_type_co_occur),
+                                   (self.translation_type_freqs, other.translation_type_freqs),
+                                   (self.docs_freqs, other.docs_freqs)]:
+            for k, v in other_freqs.items():
+                freqs[k] += v
+        self.unmod_translated_sents += other.unmod_translated_sents
+        self.src_sents_cnt += other.src_sents_cnt
+
     def _defdict_to_str(self, defdict, val_trans = lambda v: v, key_trans = lambda k : k):
         return "\n".join("%s : %s" % (key_trans(k), val_trans(v)) for k, v in defdict.items())
 
@@ -71,6 +85,9 @@ class StatCollector(object):
     def get_stat(self):
         return self._stat
 
+    def merge(self, stat):
+        self._stat.merge(stat)
+
     def mod_types_stat(self):
         items = list(self._stat.mod_type_co_occur.items())
         items.sort(key = lambda t : t[1], reverse=True)
@@ -119,6 +136,10 @@ class SrcStatCollector(object):
     def get_stat(self):
         return self._docs_cnt_stat, self._sents_in_src_stat
 
+    def merge(self, other):
+        self._docs_cnt_stat.update(other._docs_cnt_stat)
+        self._sents_in_src_stat.update(other._sents_in_src_stat)
+
     def __call__(self, chunks):
         docs_freqs = Counter(c.get_orig_doc_filename() for c in chunks
                              if c.get_mod_type() != ModType.ORIG and c.get_orig_doc_filename())
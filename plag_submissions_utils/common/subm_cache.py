@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Persistent cache of extracted submissions and parsed chunks.
+
+Corpus generation and IR experiments make several passes over the same
+submissions. An extracted submission (sources dir and sources_list) is
+addressed by the hash of the archive content, parsed chunks are addressed
+by the hash of sources_list, the version of the format and ChunkOpts.
+SUBM_CACHE_VERSION should be bumped whenever extraction or parsing of
+submissions changes, so that stale entries are never used.
+Converted sources are cached by doc_cache; CLI tools put them into
+the 'docs' subdir of the submissions cache, unless --doc_cache_dir is set.
+The cache is disabled unless SUBM_CACHE_DIR is set (or configure is called).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import os.path as fs
+import pickle
+import shutil
+import tempfile
+
+from . import disk_lru
+from . import extract_utils
+
+SUBM_CACHE_DIR = os.environ.get("SUBM_CACHE_DIR", "")
+SUBM_CACHE_MAX_SIZE = int(os.environ.get("SUBM_CACHE_MAX_SIZE", 10 * 1024 ** 3))
+#entries that were used within this number of seconds are never evicted,
+#since other processes may still read sources of extracted submissions
+SUBM_CACHE_EVICT_GRACE = int(os.environ.get("SUBM_CACHE_EVICT_GRACE", 3600))
+
+SUBM_CACHE_VERSION = "1"
+
+SUBM_CACHE = None
+
+
+def _hash_file(path, prefix):
+    sha1 = hashlib.sha1()
+    sha1.update(prefix.encode('utf8'))
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+class SubmCache(object):
+    """Directory with extracted submissions (subdir 'subm')
+    and pickled chunks (subdir 'chunks').
+    The least recently used entries are removed when the total size exceeds max_size
+    (see disk_lru); entries used within the last evict_grace seconds are kept.
+    Extracted submissions are shared by all users of the cache, so they must not be modified.
+    """
+    def __init__(self, cache_dir, max_size = SUBM_CACHE_MAX_SIZE,
+                 evict_grace = SUBM_CACHE_EVICT_GRACE):
+        super(SubmCache, self).__init__()
+        self._cache_dir = cache_dir
+        #converted sources may be kept in the 'docs' subdir by doc_cache
+        self._store     = disk_lru.DiskLRU([fs.join(cache_dir, "subm"),
+                                            fs.join(cache_dir, "chunks")],
+                                           max_size, "submissions cache",
+                                           evict_grace = evict_grace)
+
+        self.hits       = 0
+        self.misses     = 0
+
+        if not fs.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _entry_path(self, kind, key, ext = ""):
+        return fs.join(self._cache_dir, kind, key[:2], key + ext)
+
+    def extract(self, arch_path):
+        """Returns (sources_dir, sources_list) of the extracted submission.
+        raise InvalidSubmission if submission is malformed"""
+        key = _hash_file(arch_path, "%s:" % SUBM_CACHE_VERSION)
+        entry_path = self._entry_path("subm", key)
+        try:
+            with open(fs.join(entry_path, "paths.json"), 'r') as f:
+                sources_dir, sources_list = json.load(f)
+            self._store.touch(entry_path)
+            self.hits += 1
+            return fs.join(entry_path, sources_dir), fs.join(entry_path, sources_list)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+
+        entry_dir = fs.dirname(entry_path)
+        os.makedirs(entry_dir, exist_ok = True)
+        temp_path = tempfile.mkdtemp(dir = entry_dir, suffix = ".tmp")
+        try:
+            sources_dir, sources_list = extract_utils.extract_submission(arch_path,
+                                                                         temp_path)
+            with open(fs.join(temp_path, "paths.json"), 'w') as f:
+                json.dump([fs.relpath(sources_dir, temp_path),
+                           fs.relpath(sources_list, temp_path)], f)
+            size = disk_lru.calc_size(temp_path)
+            #the entry could be created by another process meanwhile
+            try:
+                os.rename(temp_path, entry_path)
+            except OSError:
+                shutil.rmtree(temp_path)
+                size = 0
+        except Exception:
+            shutil.rmtree(temp_path, ignore_errors = True)
+            raise
+
+        self._store.add(entry_path, size)
+        return (fs.join(entry_path, fs.relpath(sources_dir, temp_path)),
+                fs.join(entry_path, fs.relpath(sources_list, temp_path)))
+
+    def _chunks_key(self, meta_filepath, version, opts):
+        prefix = "%s:%s:%s:%s:" % (SUBM_CACHE_VERSION, version,
+                                   getattr(opts, "normalize", False),
+                                   getattr(opts, "skip_stop_words", False))
+        return _hash_file(meta_filepath, prefix)
+
+    def create_chunks(self, create_chunks, meta_filepath, version, opts):
+        """Returns cached result of create_chunks(meta_filepath, opts)."""
+        key = self._chunks_key(meta_filepath, version, opts)
+        path = self._entry_path("chunks", key, ".pickle")
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            self._store.touch(path)
+            self.hits += 1
+            return result
+        except (IOError, OSError, EOFError, pickle.UnpicklingError) as e:
+            if fs.exists(path):
+                logging.warning("failed to load cached chunks %s: %s", path, e)
+            self.misses += 1
+
+        result = create_chunks(meta_filepath, opts)
+        self._store.put_file(path, lambda f: pickle.dump(result, f,
+                                                         protocol = pickle.HIGHEST_PROTOCOL))
+        return result
+
+    def get_stat(self):
+        return self.hits, self.misses
+
+    def __str__(self):
+        return "submissions cache %s: hits %d, misses %d" % (self._cache_dir,
+                                                             self.hits, self.misses)
+
+
+def configure(cache_dir, max_size = SUBM_CACHE_MAX_SIZE):
+    """Set the process-wide cache. Empty cache_dir disables the cache."""
+    global SUBM_CACHE
+    if cache_dir:
+        SUBM_CACHE = SubmCache(cache_dir, max_size)
+    else:
+        SUBM_CACHE = None
+    return SUBM_CACHE
+
+def get_doc_cache_dir(doc_cache_dir, subm_cache_dir):
+    """Converted sources are kept in the submissions cache,
+    unless another directory is specified for them."""
+    if not doc_cache_dir and subm_cache_dir:
+        return fs.join(subm_cache_dir, "docs")
+    return doc_cache_dir
+
+def get_subm_cache():
+    global SUBM_CACHE
+    if SUBM_CACHE is None and SUBM_CACHE_DIR:
+        configure(SUBM_CACHE_DIR)
+    return SUBM_CACHE
@@ -1,21 +1,37 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import collections
 import shutil
-import tempfile
 import os
 import os.path as fs
 import logging
 import glob
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
+from . import processor
+from . import resources
+from . import source_doc
+from . import subm_cache
+from . import text_proc
 from .extract_utils import extract_submission
+from .extract_utils import make_temp_dir
 from .version import determine_version_by_id
 
-def run_over_submissions(subm_dir, arc_proc, limit_by_version = None,
-                         include_ids_set = None):
-    entries = os.listdir(subm_dir)
-    for entry in entries:
-        temp_dir = None
+#number of processes that process submissions in parallel
+SUBMISSIONS_WORKERS = int(os.environ.get("SUBMISSIONS_WORKERS", 1))
+
+#number of submitted archives per worker whose results are not merged yet
+MAX_PENDING_PER_WORKER = 2
+
+#arc_proc of worker process
+_ARC_PROC = None
+
+
+def _list_archives(subm_dir, limit_by_version, include_ids_set):
+    archives = []
+    for entry in os.listdir(subm_dir):
         try:
             arc_dir= fs.join(subm_dir, entry)
             susp_id = entry
@@ -35,13 +51,95 @@ def run_over_submissions(subm_dir, arc_proc, limit_by_version = None,
                 logging.warning("too many files (>1) in %s", arc_dir)
                 continue
 
-            arc_path = arc_path[0]
-            temp_dir = tempfile.mkdtemp()
-            sources_dir, meta_filepath = extract_submission(arc_path, temp_dir)
-
-            arc_proc(susp_id, sources_dir, meta_filepath)
+            archives.append((susp_id, arc_path[0]))
         except Exception as e:
             logging.exception("Failed to process archive %s: %s", entry, e)
-        finally:
-            if temp_dir is not None:
-                shutil.rmtree(temp_dir)
+    return archives
+
+def _process_archive(arc_proc, susp_id, arc_path):
+    cache = subm_cache.get_subm_cache()
+    if cache is not None:
+        sources_dir, meta_filepath = cache.extract(arc_path)
+        return arc_proc(susp_id, sources_dir, meta_filepath)
+
+    temp_dir = make_temp_dir()
+    try:
+        sources_dir, meta_filepath = extract_submission(arc_path, temp_dir)
+        return arc_proc(susp_id, sources_dir, meta_filepath)
+    finally:
+        shutil.rmtree(temp_dir)
+
+def _init_worker(arc_proc):
+    global _ARC_PROC
+    _ARC_PROC = arc_proc
+    #submissions are already processed in parallel
+    source_doc.LOAD_SOURCES_WORKERS = 1
+    processor.CHECK_CHUNKS_WORKERS = 1
+
+def _run_in_worker(susp_id, arc_path):
+    try:
+        return True, _process_archive(_ARC_PROC, susp_id, arc_path)
+    except Exception as e:
+        logging.exception("Failed to process archive %s: %s", susp_id, e)
+        return False, None
+    finally:
+        text_proc.save_morph_cache()
+
+
+def run_over_submissions(subm_dir, arc_proc, limit_by_version = None,
+                         include_ids_set = None, workers = None,
+                         merge_result = None):
+    """Calls arc_proc(susp_id, sources_dir, meta_filepath) for every extracted submission.
+    Its result is passed to merge_result(susp_id, result) in the order of submissions.
+
+    If the submissions cache is enabled, arc_proc gets the cached tree and must not modify it.
+    If workers > 1, arc_proc is called in forked processes, so changes of
+    the state made by arc_proc are lost; it should return a (picklable) result instead.
+    merge_result is always called in this process.
+    """
+    if workers is None:
+        workers = SUBMISSIONS_WORKERS
+    archives = _list_archives(subm_dir, limit_by_version, include_ids_set)
+    workers = min(workers, len(archives))
+
+    if workers <= 1:
+        for susp_id, arc_path in archives:
+            try:
+                result = _process_archive(arc_proc, susp_id, arc_path)
+                if merge_result is not None:
+                    merge_result(susp_id, result)
+            except Exception as e:
+                logging.exception("Failed to process archive %s: %s", susp_id, e)
+        return
+
+    logging.info("processing %d submissions in %d processes", len(archives), workers)
+    #workers should share long-lived converters and dictionaries
+    text_proc.prepare_converters()
+    resources.preload()
+    #fork allows arc_proc to be a closure or a bound method
+    with ProcessPoolExecutor(max_workers = workers,
+                             mp_context = multiprocessing.get_context("fork"),
+                             initializer = _init_worker,
+                             initargs = (arc_proc, )) as executor:
+        #results are merged in the order of submissions; only a few of them
+        #are kept in flight, so that results of the whole corpus aren't held in memory
+        pending = collections.deque()
+        archives_iter = iter(archives)
+        def submit_next():
+            entry = next(archives_iter, None)
+            if entry is not None:
+                pending.append((entry[0], executor.submit(_run_in_worker, *entry)))
+
+        for _ in range(workers * MAX_PENDING_PER_WORKER):
+            submit_next()
+        while pending:
+            susp_id, future = pending.popleft()
+            try:
+                processed, result = future.result()
+                if processed and merge_result is not None:
+                    merge_result(susp_id, result)
+            except Exception as e:
+                logging.exception("Failed to process archive %s: %s", susp_id, e)
+            #drop the result before the next one is waited for
+            future = result = None
+            submit_next()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler
+
+import mock
+
+from plag_submissions_utils import checker_service
+from plag_submissions_utils import common_runner
+from plag_submissions_utils.common.errors import Error
+from plag_submissions_utils.common.errors import ErrSeverity
+
+
+BOUNDARY = "----checker-test-boundary"
+
+def _make_form(fields, files):
+    lines = []
+    for name, value in fields:
+        lines += ["--" + BOUNDARY,
+                  'Content-Disposition: form-data; name="%s"' % name,
+                  "", value]
+    for name, filename, data in files:
+        lines += ["--" + BOUNDARY,
+                  'Content-Disposition: form-data; name="%s"; filename="%s"' % (name, filename),
+                  "Content-Type: application/octet-stream",
+                  "", data]
+    lines += ["--" + BOUNDARY + "--", ""]
+    return "\r\n".join(lines).encode("utf-8")
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class CheckerServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers = 1)
+        app = checker_service.CheckerApp(checker_service.CheckQueue(self.executor))
+        self.server = make_server("127.0.0.1", 0, app,
+                                  server_class = checker_service.ThreadingWSGIServer,
+                                  handler_class = _QuietHandler)
+        self.base_url = "http://127.0.0.1:%d" % self.server.server_port
+        self.url = self.base_url + "/plag_checker/submission_checker.cgi"
+        self.thread = threading.Thread(target = self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.executor.shutdown()
+
+    def _request(self, url, body = None):
+        headers = {}
+        if body is not None:
+            headers["Content-Type"] = "multipart/form-data; boundary=" + BOUNDARY
+        req = urllib.request.Request(url, data = body, headers = headers)
+        try:
+            with urllib.request.urlopen(req) as resp:
+                return resp.status, resp.read().decode("utf-8")
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode("utf-8")
+
+    def _post(self, body):
+        return self._request(self.url, body)
+
+    def _wait_job(self, job_id):
+        for _ in range(100):
+            status, text = self._request(self.base_url + "/jobs/" + job_id)
+            self.assertEqual(200, status)
+            info = json.loads(text)
+            if info["status"] in ("done", "failed"):
+                return info
+            time.sleep(0.05)
+        self.fail("job is not finished")
+
+    def test_check(self):
+        uploaded = []
+        def run(arch_path, version):
+            with open(arch_path) as f:
+                uploaded.append((arch_path.endswith(".zip"), f.read(), version))
+            return [], [Error("Слишком много опечаток", ErrSeverity.HIGH)], None
+
+        with mock.patch.object(common_runner, "run", side_effect = run):
+            body = _make_form([("version", "2")], [("file", "эссе.zip", "archive")])
+            for _ in range(2):
+                status, html = self._post(body)
+                self.assertEqual(200, status)
+                self.assertIn("<b>эссе.zip</b>", html)
+                self.assertIn("Слишком много опечаток", html)
+
+            #another version is checked again
+            self._post(_make_form([("version", "3")], [("file", "эссе.zip", "archive")]))
+
+        #the second result is cached
+        self.assertEqual([(True, "archive", "2"), (True, "archive", "3")], uploaded)
+
+    def test_jobs(self):
+        started = threading.Event()
+        finish = threading.Event()
+        def run(arch_path, version):
+            started.set()
+            finish.wait(10)
+            return [], [Error("Мало источников")], None
+
+        with mock.patch.object(common_runner, "run", side_effect = run) as run_mock:
+            body = _make_form([("version", "1")], [("file", "1.zip", "archive")])
+            status, text = self._request(self.base_url + "/jobs", body)
+            self.assertEqual(202, status)
+            job_id = json.loads(text)["job_id"]
+
+            started.wait(10)
+            self.assertEqual("running", json.loads(
+                self._request(self.base_url + "/jobs/" + job_id)[1])["status"])
+            status, _ = self._request(self.base_url + "/jobs/%s/report" % job_id)
+            self.assertEqual(409, status)
+
+            #the same archive while it is checked
+            status, text = self._request(self.base_url + "/jobs",
+                                         _make_form([("version", "1")],
+                                                    [("file", "2.zip", "archive")]))
+            job_id2 = json.loads(text)["job_id"]
+            self.assertNotEqual(job_id, job_id2)
+
+            finish.set()
+            self.assertEqual("done", self._wait_job(job_id)["status"])
+            status, html = self._request(self.base_url + "/jobs/%s/report" % job_id)
+            self.assertEqual(200, status)
+            self.assertIn("<b>1.zip</b>", html)
+            self.assertIn("Мало источников", html)
+
+            status, html = self._request(self.base_url + "/jobs/%s/report" % job_id2)
+            self.assertEqual(200, status)
+            self.assertIn("<b>2.zip</b>", html)
+        self.assertEqual(1, run_mock.call_count)
+
+        status, _ = self._request(self.base_url + "/jobs/unknown")
+        self.assertEqual(404, status)
+
+    def test_failed_job(self):
+        body = _make_form([("version", "1")], [("file", "1.zip", "archive")])
+        with mock.patch.object(common_runner, "run",
+                               side_effect = ValueError("broken archive")) as run_mock:
+            for _ in range(2):
+                status, text = self._request(self.base_url + "/jobs", body)
+                job_id = json.loads(text)["job_id"]
+                info = self._wait_job(job_id)
+                self.assertEqual("failed", info["status"])
+                self.assertEqual("broken archive", info["error"])
+            status, text = self._request(self.base_url + "/jobs/%s/report" % job_id)
+            self.assertEqual((500, "broken archive"), (status, text))
+        #failures are not cached
+        self.assertEqual(2, run_mock.call_count)
+
+    def test_too_large_upload(self):
+        self.server.set_app(checker_service.CheckerApp(
+            checker_service.CheckQueue(self.executor), max_upload_size = 500))
+        with mock.patch.object(common_runner, "run") as run_mock:
+            body = _make_form([("version", "1")], [("file", "1.zip", "x" * 1000)])
+            for url in (self.url, self.base_url + "/jobs"):
+                status, _ = self._request(url, body)
+                self.assertEqual(413, status)
+        self.assertFalse(run_mock.called)
+
+    def test_bad_requests(self):
+        with mock.patch.object(common_runner, "run") as run_mock:
+            status, text = self._post(_make_form([("version", "2")], []))
+            self.assertEqual(500, status)
+            self.assertEqual("no 'file' field in uploaded form", text)
+
+            status, _ = self._post(_make_form([("version", "4")],
+                                              [("file", "a.zip", "archive")]))
+            self.assertEqual(500, status)
+
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(self.url)
+            self.assertEqual(405, cm.exception.code)
+        self.assertFalse(run_mock.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
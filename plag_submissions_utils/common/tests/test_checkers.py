@@ -3,11 +3,13 @@
 
 import logging
 import unittest
+import mock
 
 
 import plag_submissions_utils.common.checkers  as chks
 from plag_submissions_utils.common.chunks import Chunk
 from plag_submissions_utils.common.errors import ErrSeverity
+from plag_submissions_utils.common.spell_engine import SpellEngine
 
 from plag_submissions_utils.v1.processor import ProcessorOpts
 from plag_submissions_utils.v1.processor import Processor
@@ -221,6 +223,48 @@ class SpellCheckerTestCase(unittest.TestCase):
         self.assertEqual("ошибка, не ашибка.", chunk.get_mod_text())
 
 
+    def test_chunk_state(self):
+        text = "я визиал и атправил вам я нарушел"
+        state = self.checker.calc_chunk_state(Chunk("", text, "", "", 1), None)
+
+        #the state is merged for the moved row
+        checker = chks.SpellChecker()
+        checker(Chunk("", "Этот текст точно без ошибок!", "", "", 1), None)
+        checker.merge_chunk_state(Chunk("", text, "", "", 2), state)
+
+        expected = chks.SpellChecker()
+        expected(Chunk("", "Этот текст точно без ошибок!", "", "", 1), None)
+        expected(Chunk("", text, "", "", 2), None)
+        self.assertEqual([str(e) for e in expected.get_errors()],
+                         [str(e) for e in checker.get_errors()])
+        self.assertIn("№ 2", str(checker.get_errors()[0]))
+
+    def test_lazy_suggestions(self):
+        suggestions = {"ашибка": ["ошибка"], "опечатко": ["опечатка"], "ъъъъ": []}
+        spell_dict = mock.Mock()
+        spell_dict.get_dic_encoding.return_value = 'utf-8'
+        spell_dict.spell.side_effect = lambda w: w.decode('utf-8') not in suggestions
+        spell_dict.suggest.side_effect = lambda w: [
+            s.encode('utf-8').decode('latin1') for s in suggestions[w.decode('utf-8')]]
+
+        with mock.patch.object(chks, "get_spell_engine", return_value = SpellEngine(spell_dict)):
+            checker = chks.SpellChecker()
+            checker._typo_max_tf = 3
+            checker(Chunk("", "тут ашибка, ашибка, ашибка, ъъъъ и опечатко тут.", "", "", 1), None)
+            self.assertFalse(spell_dict.suggest.called)
+
+            errors = checker.get_errors()
+        self.assertEqual(3, spell_dict.suggest.call_count)
+        #frequent "typo" and the token without suggestions are not reported
+        self.assertEqual(["опечатко: № 1"], errors[0].extra)
+
+    def test_chunk_cache_key(self):
+        chunk = Chunk("", "Текст", "", "", 1)
+        self.assertNotEqual(self.checker.get_chunk_cache_key(chunk, None),
+                            chks.SpellChecker(whitelist = ["ашибка"]).get_chunk_cache_key(chunk, None))
+        self.assertNotEqual(self.checker.get_chunk_cache_key(chunk, None),
+                            chks.SpellChecker(lang_hint = 'en').get_chunk_cache_key(chunk, None))
+
     def test_abbr(self):
         text = "(совр. Гаити)"
         chunk = Chunk("", text, "", "", 1)
@@ -249,6 +293,18 @@ class CyrillicAlphabetChecker(unittest.TestCase):
         self.assertEqual(1, len(self.checker.get_errors()))
         # print self.checker.get_errors()[0]
 
+    def test_chunk_state(self):
+        chunk = Chunk([], "Здeсь есть одна замена.", "ADD", "filename", 1)
+        state = self.checker.calc_chunk_state(chunk, None)
+        self.assertEqual(self.checker.get_errors(), state)
+
+        checker = chks.CyrillicAlphabetChecker(Opts())
+        checker.merge_chunk_state(Chunk([], "Здeсь есть одна замена.", "ADD", "filename", 5),
+                                  state)
+        self.assertEqual([(5, state[0].msg)],
+                         [(e.chunk_num, e.msg) for e in checker.get_errors()])
+        self.assertEqual(1, state[0].chunk_num)
+
 
     def test_fix(self):
         chunk = Chunk("", ["искуᏟꓚCСTвенный.", "искуᏟꓚCСTвенный cнeг."], "", "", 1)
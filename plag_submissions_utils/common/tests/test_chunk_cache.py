@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+import mock
+
+from plag_submissions_utils.common import chunk_cache
+from plag_submissions_utils.common.chunk_cache import ChunkCache
+from plag_submissions_utils.common.chunks import Chunk
+from plag_submissions_utils.common.errors import ChunkError
+from plag_submissions_utils.common.processor import BasicProcessor
+from plag_submissions_utils.common.processor import BasicProcesssorOpts
+
+
+class _BadWordChecker(object):
+    def __init__(self, word, cacheable = True):
+        self._word      = word
+        self._cacheable = cacheable
+        self._errors    = []
+        self.checked    = []
+
+    def get_errors(self):
+        return self._errors
+
+    def __call__(self, chunk, src_docs):
+        self.checked.append(chunk.get_chunk_id())
+        if self._word in chunk.get_mod_text():
+            self._errors.append(ChunkError(self._word, chunk.get_chunk_id()))
+
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return (self._word, ) if self._cacheable else None
+
+    def calc_chunk_state(self, chunk, src_docs):
+        start = len(self._errors)
+        self(chunk, src_docs)
+        return [e.msg for e in self._errors[start:]]
+
+    def merge_chunk_state(self, chunk, state):
+        self._errors.extend(ChunkError(msg, chunk.get_chunk_id()) for msg in state)
+
+
+class ChunkCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ChunkCache(fs.join(self.temp_dir, "cache"))
+        patcher = mock.patch.object(chunk_cache, "CHUNK_CACHE", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _check(self, texts, checkers):
+        processor = BasicProcessor(BasicProcesssorOpts(), checkers, [])
+        for num, text in enumerate(texts, 1):
+            processor._process_chunk(Chunk("", text, "ORIG", "", num), {})
+        return [[(e.chunk_num, e.msg) for e in c.get_errors()] for c in checkers]
+
+    def test_reuse_unchanged_chunks(self):
+        checker = _BadWordChecker("плохо")
+        self.assertEqual([[(2, "плохо")]],
+                         self._check(["Хорошо.", "Плохо, очень плохо.", "Ок."], [checker]))
+        self.assertEqual([1, 2, 3], checker.checked)
+        self.assertEqual((0, 3), self.cache.get_stat())
+
+        #a new row is inserted and the last one is fixed
+        checker = _BadWordChecker("плохо")
+        self.assertEqual([[(1, "плохо"), (3, "плохо")]],
+                         self._check(["Совсем плохо.", "Хорошо.", "Плохо, очень плохо.", "Ок!"],
+                                     [checker]))
+        self.assertEqual([1, 4], checker.checked)
+        self.assertEqual((2, 5), self.cache.get_stat())
+
+    def test_checker_key(self):
+        self._check(["Плохо.", "Хорошо."], [_BadWordChecker("Плохо")])
+
+        other = _BadWordChecker("Хорошо")
+        not_cached = _BadWordChecker("Плохо", cacheable = False)
+        self.assertEqual([[(2, "Хорошо")], [(1, "Плохо")]],
+                         self._check(["Плохо.", "Хорошо."], [other, not_cached]))
+        self.assertEqual([1, 2], other.checked)
+        self.assertEqual([1, 2], not_cached.checked)
+
+    def test_broken_entry(self):
+        chunk = Chunk("", "Плохо.", "ORIG", "", 1)
+        self._check(["Плохо."], [_BadWordChecker("Плохо")])
+        with open(self.cache._entry_path(chunk), 'wb') as f:
+            f.write(b"garbage")
+
+        checker = _BadWordChecker("Плохо")
+        self.assertEqual([[(1, "Плохо")]], self._check(["Плохо."], [checker]))
+        self.assertEqual([1], checker.checked)
+
+    def test_disabled(self):
+        with mock.patch.object(chunk_cache, "CHUNK_CACHE", None), \
+             mock.patch.object(chunk_cache, "CHUNK_CACHE_DIR", ""):
+            for _ in range(2):
+                checker = _BadWordChecker("Плохо")
+                self._check(["Плохо."], [checker])
+                self.assertEqual([1], checker.checked)
+
+
+if __name__ == '__main__':
+    unittest.main()
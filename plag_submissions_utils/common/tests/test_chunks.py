@@ -3,6 +3,7 @@
 
 
 import unittest
+import mock
 import regex
 
 from plag_submissions_utils.common.chunks import Chunk
@@ -22,3 +23,32 @@ class ChunksEncodingTestCase(unittest.TestCase):
         self.assertEqual('x', matches[0][2])
         self.assertEqual('y', matches[1][1])
         self.assertEqual('z', matches[2][1])
+
+class ChunkFeaturesTestCase(unittest.TestCase):
+    def test_cached_dist(self):
+        ch = Chunk("Some original text.", "Some modified text.", "LPR", "filename", 1)
+        with mock.patch("plag_submissions_utils.common.token_vocab.nlevenshtein",
+                        return_value = 0.25) as nlevenshtein:
+            self.assertEqual(0.25, ch.measure_dist())
+            self.assertEqual(0.25, ch.measure_dist())
+        self.assertEqual(1, nlevenshtein.call_count)
+
+    def test_invalidation(self):
+        ch = Chunk("Some original text.", "Some original text.", "LPR", "filename", 1)
+        self.assertEqual(0.0, ch.measure_dist())
+        self.assertEqual(0.0, ch.lexical_dist())
+
+        ch.set_mod_sents(["Other text."])
+        self.assertEqual(["Other text."], ch.get_mod_sents())
+        self.assertEqual(["other", "text"], ch.get_mod_tokens())
+        self.assertAlmostEqual(2.0 / 3, ch.measure_dist())
+        self.assertAlmostEqual(3.0 / 4, ch.lexical_dist())
+
+    def test_lazy_tokens(self):
+        with mock.patch("plag_submissions_utils.common.text_proc.tok_sent",
+                        return_value = ["text"]) as tok_sent:
+            ch = Chunk("Some original text.", "Some modified text.", "LPR", "filename", 1)
+            self.assertEqual(0, tok_sent.call_count)
+            self.assertEqual(1.0, ch.get_avg_mod_words_cnt())
+            ch.get_mod_tokens()
+        self.assertEqual(1, tok_sent.call_count)
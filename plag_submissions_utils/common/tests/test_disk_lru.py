@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+import mock
+
+from plag_submissions_utils.common.disk_lru import DiskLRU
+
+
+class DiskLRUTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _put(self, store, name, size, mtime = None):
+        path = fs.join(self.temp_dir, name[:2], name)
+        store.put_file(path, lambda f: f.write(b"x" * size))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_low_water(self):
+        store = DiskLRU([self.temp_dir], 100, "test")
+        paths = [self._put(store, "aa%02d" % num, 20, mtime = num) for num in range(5)]
+        self.assertTrue(all(fs.exists(p) for p in paths))
+
+        #the oldest entries are evicted until the size is below 80% of max size
+        new_path = self._put(store, "bb01", 20)
+        self.assertEqual([False, False, True, True, True],
+                         [fs.exists(p) for p in paths])
+        self.assertTrue(fs.exists(new_path))
+
+        #the store isn't listed again until it exceeds max size
+        with mock.patch.object(store, "list_entries",
+                               wraps = store.list_entries) as list_mock:
+            self._put(store, "bb02", 20)
+            self.assertFalse(list_mock.called)
+            self._put(store, "bb03", 20)
+            self.assertEqual(1, list_mock.call_count)
+
+    def test_grace(self):
+        store = DiskLRU([self.temp_dir], 100, "test", evict_grace = 600)
+        old_path = self._put(store, "aa01", 60, mtime = 0)
+        recent_path = self._put(store, "aa02", 60)
+        #the recently used entry is kept, even though the size exceeds max size
+        self.assertFalse(fs.exists(old_path))
+        self.assertTrue(fs.exists(recent_path))
+
+        self._put(store, "aa03", 60)
+        self.assertTrue(fs.exists(recent_path))
+        #the store isn't listed on every put, while recently used entries are kept
+        with mock.patch.object(store, "list_entries") as list_mock:
+            self._put(store, "aa04", 10)
+            self.assertFalse(list_mock.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+import mock
+
+from plag_submissions_utils.common import doc_cache
+from plag_submissions_utils.common.doc_cache import DocCache
+from plag_submissions_utils.common.source_doc import SourceDoc
+
+
+class DocCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = fs.join(self.temp_dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _make_doc(self, name, content):
+        path = fs.join(self.temp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_key(self):
+        cache = DocCache(self.cache_dir)
+        doc1 = self._make_doc("1.html", "text")
+        doc2 = self._make_doc("2.html", "text")
+        doc3 = self._make_doc("3.pdf", "text")
+        doc4 = self._make_doc("4.html", "other text")
+
+        self.assertEqual(cache.make_key(doc1), cache.make_key(doc2))
+        #another converter
+        self.assertNotEqual(cache.make_key(doc1), cache.make_key(doc3))
+        self.assertNotEqual(cache.make_key(doc1), cache.make_key(doc4))
+
+    def test_get_put(self):
+        cache = DocCache(self.cache_dir)
+        self.assertIsNone(cache.get("abcd"))
+        cache.put("abcd", "Текст\r\nдокумента.")
+        self.assertEqual("Текст\r\nдокумента.", cache.get("abcd"))
+        self.assertEqual((1, 1), cache.get_stat())
+
+    def test_lru_eviction(self):
+        cache = DocCache(self.cache_dir, max_size = 25)
+        cache.put("aa01", "1" * 10)
+        cache.put("aa02", "2" * 10)
+        #make the first entry the least recently used one
+        os.utime(cache._entry_path("aa01"), (0, 0))
+        cache.get("aa02")
+
+        cache.put("aa03", "3" * 10)
+        self.assertIsNone(cache.get("aa01"))
+        self.assertEqual("2" * 10, cache.get("aa02"))
+        self.assertEqual("3" * 10, cache.get("aa03"))
+
+    def test_source_doc(self):
+        doc_path = self._make_doc("1.html", "<html>Some text.</html>")
+        convert = mock.Mock(return_value = "Some text.")
+        doc_cache.configure(self.cache_dir)
+        try:
+            with mock.patch("plag_submissions_utils.common.text_proc.convert_doc",
+                            convert):
+                first = SourceDoc(doc_path)
+                second = SourceDoc(doc_path)
+            cache = doc_cache.get_doc_cache()
+        finally:
+            doc_cache.configure(None)
+
+        self.assertEqual(1, convert.call_count)
+        self.assertEqual(first.get_text(), second.get_text())
+        self.assertEqual((1, 1), cache.get_stat())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import io
+import os
+import os.path as fs
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+import mock
+
+from plag_submissions_utils.common import extract_utils
+from plag_submissions_utils.common.extract_utils import extract_submission
+from plag_submissions_utils.common.extract_utils import InvalidSubmission
+
+
+class ExtractSubmissionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dest_dir = fs.join(self.temp_dir, "dest")
+        os.mkdir(self.dest_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _create_zip(self, members):
+        path = fs.join(self.temp_dir, "arc.zip")
+        with zipfile.ZipFile(path, 'w') as zf:
+            for name, data in members:
+                zf.writestr(name, data)
+        return path
+
+    def _listing(self):
+        return sorted(fs.relpath(fs.join(d, f), self.dest_dir)
+                      for d, _, files in os.walk(self.dest_dir) for f in files)
+
+    @mock.patch('pyunpack.Archive')
+    def test_zip(self, archive_mock):
+        path = self._create_zip([
+            ("__MACOSX/work/sources/1.txt", "mac"),
+            ("work/sources/1.txt", "one"),
+            ("work/sources/sub/2.txt", "two"),
+            ("work/.sources_list.xlsx", "hidden"),
+            ("work/sources_list.xlsx", "list"),
+            ("work/readme.txt", "readme")])
+
+        sources_dir, sources_list = extract_submission(path, self.dest_dir)
+        self.assertFalse(archive_mock.called)
+        self.assertEqual(fs.join(self.dest_dir, "work", "sources"), sources_dir)
+        self.assertEqual(fs.join(self.dest_dir, "work", "sources_list.xlsx"),
+                         sources_list)
+        #only needed members are extracted
+        self.assertEqual(["work/sources/1.txt", "work/sources/sub/2.txt",
+                          "work/sources_list.xlsx"], self._listing())
+        with open(fs.join(sources_dir, "1.txt")) as f:
+            self.assertEqual("one", f.read())
+
+    def test_tar_gz(self):
+        src_dir = fs.join(self.temp_dir, "src")
+        os.makedirs(fs.join(src_dir, "Sources"))
+        with open(fs.join(src_dir, "Sources", "1.txt"), 'w') as f:
+            f.write("one")
+        with open(fs.join(src_dir, "sources_list.xlsx"), 'w') as f:
+            f.write("list")
+        os.symlink("/etc/passwd", fs.join(src_dir, "Sources", "2.txt"))
+        path = shutil.make_archive(fs.join(self.temp_dir, "arc"), 'gztar', src_dir)
+
+        sources_dir, sources_list = extract_submission(path, self.dest_dir)
+        self.assertEqual(fs.join(self.dest_dir, "Sources"), sources_dir)
+        self.assertEqual(fs.join(self.dest_dir, "sources_list.xlsx"), sources_list)
+        #links are not extracted
+        self.assertEqual(["Sources/1.txt", "sources_list.xlsx"], self._listing())
+
+    def test_unsafe_members(self):
+        path = fs.join(self.temp_dir, "arc.tar")
+        with tarfile.open(path, 'w') as tf:
+            for name in ["sources/1.txt", "../sources/2.txt",
+                         "/tmp/sources/3.txt", "sources_list.xlsx"]:
+                info = tarfile.TarInfo(name)
+                info.size = 1
+                tf.addfile(info, io.BytesIO(b"x"))
+
+        extract_submission(path, self.dest_dir)
+        self.assertEqual(["sources/1.txt", "sources_list.xlsx"], self._listing())
+
+    def test_invalid(self):
+        path = self._create_zip([("sources/1.txt", "one")])
+        with self.assertRaises(InvalidSubmission):
+            extract_submission(path, self.dest_dir)
+
+        path = self._create_zip([("sources_list.xlsx", "list")])
+        with self.assertRaises(InvalidSubmission):
+            extract_submission(path, self.dest_dir)
+
+    @mock.patch('pyunpack.Archive')
+    def test_fallback(self, archive_mock):
+        path = fs.join(self.temp_dir, "arc.rar")
+        with open(path, 'wb') as f:
+            f.write(b"Rar!\x1a\x07\x00")
+
+        def extractall(dest_dir):
+            os.makedirs(fs.join(dest_dir, "sources"))
+            open(fs.join(dest_dir, "sources_list.xlsx"), 'w').close()
+        archive_mock.return_value.extractall.side_effect = extractall
+
+        sources_dir, sources_list = extract_submission(path, self.dest_dir)
+        archive_mock.assert_called_once_with(path, backend = "patool")
+        self.assertEqual(fs.join(self.dest_dir, "sources"), sources_dir)
+        self.assertEqual(fs.join(self.dest_dir, "sources_list.xlsx"), sources_list)
+
+    @mock.patch('pyunpack.Archive')
+    def test_read_error_fallback(self, archive_mock):
+        path = self._create_zip([("sources/1.txt", "one"), ("sources_list.xlsx", "list")])
+        def extractall(dest_dir):
+            with zipfile.ZipFile(path) as zf:
+                zf.extractall(dest_dir)
+        archive_mock.return_value.extractall.side_effect = extractall
+
+        #e.g. the second member is encrypted
+        orig_write = extract_utils._write_member
+        def write_member(dest_dir, parts, src):
+            if parts == ("sources_list.xlsx", ):
+                raise RuntimeError("File is encrypted, password required for extraction")
+            orig_write(dest_dir, parts, src)
+        with mock.patch.object(extract_utils, "_write_member", side_effect = write_member):
+            sources_dir, sources_list = extract_submission(path, self.dest_dir)
+
+        archive_mock.assert_called_once_with(path, backend = "patool")
+        self.assertEqual(fs.join(self.dest_dir, "sources"), sources_dir)
+        self.assertEqual(["sources/1.txt", "sources_list.xlsx"], self._listing())
+
+    def test_macosx_subdirs(self):
+        #only entries of __MACOSX itself are skipped, as in os.walk
+        path = self._create_zip([("__MACOSX/work/sources/1.txt", "mac"),
+                                 ("__MACOSX/work/sources_list.xlsx", "list")])
+        sources_dir, sources_list = extract_submission(path, self.dest_dir)
+        self.assertEqual(fs.join(self.dest_dir, "__MACOSX", "work", "sources"), sources_dir)
+        self.assertRaises(InvalidSubmission, extract_submission,
+                          self._create_zip([("__MACOSX/sources_list.xlsx", "list"),
+                                            ("sources/1.txt", "one")]),
+                          self.dest_dir)
+
+    def test_test_data(self):
+        sources_dir, sources_list = extract_submission("data/test_data_v3/test.zip",
+                                                       self.dest_dir)
+        self.assertEqual("sources", fs.basename(sources_dir))
+        self.assertEqual("sources_list.xlsx", fs.basename(sources_list))
+        self.assertEqual(5, len(os.listdir(sources_dir)))
+
+    @mock.patch.object(extract_utils, "EXTRACT_TEMP_MIN_FREE", 0)
+    def test_make_temp_dir(self):
+        with mock.patch.object(extract_utils, "EXTRACT_TEMP_DIR", self.temp_dir):
+            temp_dir = extract_utils.make_temp_dir()
+            self.assertEqual(self.temp_dir, fs.dirname(temp_dir))
+
+        with mock.patch.object(extract_utils, "EXTRACT_TEMP_DIR",
+                               fs.join(self.temp_dir, "missing")):
+            temp_dir = extract_utils.make_temp_dir()
+            self.assertEqual(tempfile.gettempdir(), fs.dirname(temp_dir))
+            os.rmdir(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+
+from plag_submissions_utils import gen_corpus
+
+
+class GenCorpusTestCase(unittest.TestCase):
+    def test_arg_parser(self):
+        parser = gen_corpus.create_arg_parser()
+        args = parser.parse_args(["-j", "3", "--sources_workers", "2",
+                                  "create_src", "-i", "subm", "-o", "out"])
+        self.assertEqual(3, args.workers)
+        self.assertEqual(2, args.sources_workers)
+        self.assertEqual("subm", args.subm_dir)
+        self.assertEqual("out", args.out_dir)
+        self.assertIs(gen_corpus.create_sources, args.func)
+
+        args = parser.parse_args(["pan", "-i", "subm"])
+        self.assertIs(gen_corpus.create_pan_meta, args.func)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+
+from plag_submissions_utils.common import homoglyphs
+
+
+class HomoglyphsTestCase(unittest.TestCase):
+    def test_table(self):
+        table = homoglyphs.get_homoglyph_table(['cyrillic'])
+        self.assertIs(table, homoglyphs.get_homoglyph_table(['CYRILLIC']))
+        self.assertEqual(('LATIN', {'c': 'С', 'a': 'CYRILLIC'}), table['C'])
+        self.assertEqual('С', table['Ꮯ'][1]['c'])
+        self.assertNotIn('С', table)
+        self.assertNotIn('ж', table)
+
+    def test_find(self):
+        found = homoglyphs.find_homoglyphs("искуᏟꓚCСTвенный", ['CYRILLIC'])
+        self.assertEqual([(4, 'CHEROKEE', 'С'), (5, 'LISU', 'С'),
+                          (6, 'LATIN', 'С'), (8, 'LATIN', 'Т')],
+                         [(f['pos'], f['alias'], f['homoglyphs']['c']) for f in found])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+
+from plag_submissions_utils.common.chunks import Chunk
+from plag_submissions_utils.common.lexical_scan import LexicalScan
+
+
+class LexicalScanTestCase(unittest.TestCase):
+    def test_tokens(self):
+        scan = LexicalScan(["Уи́льям's HTTP-трафик, т.е. Tор", "нет точки"])
+        self.assertEqual(["Уильям", "s", "HTTP", "трафик", "т.е.", "Tор", "нет", "точки"],
+                         scan.get_spell_tokens())
+        self.assertEqual([(0, "Уи́льям's", True), (10, "HTTP", False), (15, "трафик", True),
+                          (23, "т", True), (25, "е", True), (28, "Tор", True)],
+                         scan.get_words(0))
+
+    def test_sents(self):
+        scan = LexicalScan(["«Первое» предложение.", "второе без точки", "3 раза!"])
+        self.assertEqual([True, False, True], [scan.ends_with_terminal(n) for n in range(3)])
+        self.assertEqual([True, False, True], [scan.starts_with_title_case(n) for n in range(3)])
+        self.assertEqual(2, LexicalScan(["Первое предложение. Второе предложение."])
+                         .get_segments_cnt())
+
+    def test_chunk(self):
+        chunk = Chunk("", ["Первое предложение"], "", "", 1)
+        scan = chunk.get_lexical_scan()
+        self.assertIs(scan, chunk.get_lexical_scan())
+        self.assertFalse(scan.ends_with_terminal(0))
+
+        #the scan is calculated again for changed sentences
+        chunk.set_mod_sents(["Первое предложение."])
+        self.assertTrue(chunk.get_lexical_scan().ends_with_terminal(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+import mock
+
+from plag_submissions_utils.common import text_proc
+from plag_submissions_utils.common.morph_cache import MorphCache
+
+
+class MorphCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.analyze = mock.Mock(side_effect = lambda t: (t.lower(), None))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_lru(self):
+        cache = MorphCache(self.analyze, max_size = 2)
+        self.assertEqual(("a", None), cache.get("A"))
+        cache.get("B")
+        cache.get("A")
+        #B is the least recently used one
+        cache.get("C")
+        self.assertEqual(2, len(cache))
+        cache.get("A")
+        cache.get("B")
+
+        self.assertEqual(4, self.analyze.call_count)
+        self.assertEqual((2, 4), cache.get_stat())
+        self.assertAlmostEqual(1.0 / 3, cache.get_hit_rate())
+
+    def test_persistence(self):
+        path = fs.join(self.temp_dir, "morph.cache")
+        cache = MorphCache(self.analyze, path = path, tag = "1")
+        cache.get("A")
+        cache.save()
+
+        warm = MorphCache(self.analyze, path = path, tag = "1")
+        self.assertEqual(("a", None), warm.get("A"))
+        self.assertEqual((1, 0), warm.get_stat())
+
+        outdated = MorphCache(self.analyze, path = path, tag = "2")
+        self.assertEqual(0, len(outdated))
+
+    def test_merge_saved(self):
+        path = fs.join(self.temp_dir, "morph.cache")
+        cache = MorphCache(self.analyze, path = path, tag = "1")
+        cache.get("A")
+        pid = os.fork()
+        if pid == 0:
+            #forked workers exit without atexit handlers
+            cache.get("B")
+            cache.save()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        cache.get("C")
+        cache.save()
+
+        warm = MorphCache(self.analyze, max_size = 2, path = path, tag = "1")
+        #entries of the worker are merged as the least recently used ones
+        self.assertEqual(["A", "C"], list(warm._entries))
+        warm = MorphCache(self.analyze, path = path, tag = "1")
+        self.assertEqual(["B", "A", "C"], list(warm._entries))
+
+    def test_save_morph_cache(self):
+        with mock.patch.object(text_proc, "MORPH_CACHE") as cache:
+            cache.save.side_effect = OSError("no space left")
+            text_proc.save_morph_cache()
+            cache.save.assert_called_once_with()
+
+    def test_tok_sent(self):
+        sent = "Сделавший работу человек пошёл в дом и в сад."
+        tokens = text_proc.tok_sent(sent, normalize = True, skip_stop_words = True)
+        #the second call uses cached analysis
+        self.assertEqual(tokens, text_proc.tok_sent(sent, normalize = True,
+                                                    skip_stop_words = True))
+        self.assertEqual(["сделавший", "работа", "человек", "пойти", "дом", "сад"], tokens)
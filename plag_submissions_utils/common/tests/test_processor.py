@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import unittest
+import mock
+
+from plag_submissions_utils.common import chunk_cache
+from plag_submissions_utils.common import processor
+from plag_submissions_utils.common.chunks import Chunk
+from plag_submissions_utils.common.errors import ChunkError
+from plag_submissions_utils.common.errors import ErrSeverity
+from plag_submissions_utils.common.processor import BasicProcessor
+from plag_submissions_utils.common.processor import BasicProcesssorOpts
+from plag_submissions_utils.common.source_doc import SourceDoc
+
+
+class _ShortChecker(object):
+    """Chunk-local checker; its state also holds pid of the process that checked the chunk"""
+    def __init__(self):
+        self._errors = []
+        self.pids    = set()
+
+    def get_errors(self):
+        return self._errors
+
+    def __call__(self, chunk, src_docs):
+        self.calc_chunk_state(chunk, src_docs)
+
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return ()
+
+    def calc_chunk_state(self, chunk, src_docs):
+        state = os.getpid(), len(chunk.get_mod_text()) < 10
+        self.merge_chunk_state(chunk, state)
+        return state
+
+    def merge_chunk_state(self, chunk, state):
+        pid, is_short = state
+        self.pids.add(pid)
+        if is_short:
+            self._errors.append(ChunkError("short", chunk.get_chunk_id(), ErrSeverity.HIGH))
+
+
+class _RepeatChecker(_ShortChecker):
+    """Its result depends on the previous chunk"""
+    def __init__(self):
+        super(_RepeatChecker, self).__init__()
+        self._prev_text = None
+        self.checked    = []
+
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return (self._prev_text, )
+
+    def calc_chunk_state(self, chunk, src_docs):
+        self.checked.append(chunk.get_chunk_id())
+        state = chunk.get_mod_text(), chunk.get_mod_text() == self._prev_text
+        self.merge_chunk_state(chunk, state)
+        return state
+
+    def merge_chunk_state(self, chunk, state):
+        self._prev_text, repeated = state
+        if repeated:
+            self._errors.append(ChunkError("repeated", chunk.get_chunk_id()))
+
+
+class _OrderChecker(object):
+    """Not cacheable"""
+    def __init__(self):
+        self._ids = []
+
+    def get_errors(self):
+        return [ChunkError("order %s" % self._ids, 0)]
+
+    def __call__(self, chunk, src_docs):
+        self._ids.append(chunk.get_chunk_id())
+
+    def get_chunk_cache_key(self, chunk, src_docs):
+        return None
+
+
+class _Processor(BasicProcessor):
+    def __init__(self, opts, checkers, texts):
+        super(_Processor, self).__init__(opts, checkers, [])
+        self._texts = texts
+
+    def _create_chunks(self, inp_file):
+        return [Chunk("", text, "ORIG", "", num)
+                for num, text in enumerate(self._texts, 1)], []
+
+    def _load_sources_docs(self, sources_dir):
+        return {}
+
+
+class BasicProcessorTestCase(unittest.TestCase):
+    TEXTS = ["Short.", "Short.", "Long enough sentence.", "Long enough sentence.",
+             "Other long sentence.", "Short.", "Short.", "Last long sentence."]
+
+    def _check(self, workers):
+        opts = BasicProcesssorOpts()
+        opts.errors_level = ErrSeverity.LOW
+        opts.check_chunks_workers = workers
+        checkers = [_ShortChecker(), _RepeatChecker(), _OrderChecker()]
+        errors, _ = _Processor(opts, checkers, self.TEXTS).check("", "")
+        return [str(e) for e in errors], checkers
+
+    @mock.patch.object(processor, "MIN_CHUNKS_PER_WORKER", 2)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE", None)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE_DIR", "")
+    def test_parallel(self):
+        serial_errors, serial_checkers = self._check(1)
+        self.assertEqual({os.getpid()}, serial_checkers[0].pids)
+
+        errors, checkers = self._check(3)
+        self.assertEqual(serial_errors, errors)
+        #all chunks were checked by workers
+        self.assertTrue(checkers[0].pids)
+        self.assertNotIn(os.getpid(), checkers[0].pids)
+        #shards are 1-2, 3-5 and 6-8; the first chunk of a shard depends on the previous one,
+        #so it is checked again (unless the worker has just checked the previous shard)
+        self.assertLessEqual(set(checkers[1].checked), {3, 6})
+
+    @mock.patch.object(processor, "MIN_CHUNKS_PER_WORKER", 2)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE", None)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE_DIR", "")
+    def test_preload_checkers_resources(self):
+        with mock.patch.object(_ShortChecker, "get_resources", create = True,
+                               return_value = ["dict"]), \
+             mock.patch.object(processor.resources, "preload") as preload_mock:
+            self._check(3)
+        #only resources of the checkers are loaded before forking
+        preload_mock.assert_called_once_with(["dict"])
+
+    @mock.patch.object(processor, "MIN_CHUNKS_PER_WORKER", 2)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE", None)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE_DIR", "")
+    def test_seed_index_before_fork(self):
+        doc = SourceDoc("1.txt", text = "Long enough sentence of the source.")
+        with mock.patch.object(_Processor, "_load_sources_docs", return_value = {"1.txt": doc}):
+            self._check(3)
+        #the index is built once by the parent, so that workers share it
+        self.assertIsNotNone(doc._seed_index)
+
+    @mock.patch.object(processor, "MIN_CHUNKS_PER_WORKER", 5)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE", None)
+    @mock.patch.object(chunk_cache, "CHUNK_CACHE_DIR", "")
+    def test_few_chunks(self):
+        _, checkers = self._check(3)
+        self.assertEqual({os.getpid()}, checkers[0].pids)
+
+
+if __name__ == '__main__':
+    unittest.main()
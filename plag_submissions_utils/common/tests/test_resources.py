@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import mock
+
+from plag_submissions_utils.common import resources
+
+
+@mock.patch.dict(resources.LOAD_TIMES, clear = True)
+@mock.patch.dict(resources.RESOURCES, clear = True)
+@mock.patch.dict(resources.LOADERS, clear = True)
+class ResourcesTestCase(unittest.TestCase):
+    def test_get(self):
+        loader = mock.Mock(return_value = "dict")
+        resources.register("dict", loader)
+        self.assertTrue(resources.is_registered("dict"))
+        self.assertFalse(resources.is_loaded("dict"))
+
+        self.assertEqual("dict", resources.get("dict"))
+        self.assertEqual("dict", resources.get("dict"))
+        self.assertEqual(1, loader.call_count)
+        self.assertTrue(resources.is_loaded("dict"))
+        self.assertEqual(["dict"], [name for name, _ in resources.get_load_times()])
+        self.assertRaises(KeyError, resources.get, "unknown")
+
+    def test_preload(self):
+        resources.register("good", lambda: "good")
+        broken = mock.Mock(side_effect = IOError("no such file"))
+        resources.register("broken", broken)
+
+        self.assertEqual(["broken"], resources.preload())
+        self.assertTrue(resources.is_loaded("good"))
+        self.assertFalse(resources.is_loaded("broken"))
+        #the failed one is loaded again on request
+        self.assertRaises(IOError, resources.get, "broken")
+        self.assertEqual(2, broken.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import difflib
+import unittest
+
+from plag_submissions_utils.common.seed_index import SeedIndex
+
+
+def difflib_longest_match(text, query):
+    matcher = difflib.SequenceMatcher(a = text, b = query, autojunk = False)
+    return matcher.find_longest_match(0, len(text), 0, len(query))
+
+class SeedIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.text = "Sentence for <many trash> sequence matcher <many trash> test!\n"\
+                    "Предложение для проверки <trash> sequence matcher <trash> test!"
+
+    def test_same_as_difflib(self):
+        index = SeedIndex(self.text, 4)
+        queries = ["Предложение для проверки sequence matcher test!",
+                   "Sentence for sequence matcher test!",
+                   "<trash> test!",
+                   " sequence matcher "]
+        for query in queries:
+            self.assertEqual(difflib_longest_match(self.text, query),
+                             index.find_longest_match(query))
+
+    def test_ties(self):
+        #the first occurrence in text is preferred
+        text = "abcdXabcdYabcd"
+        index = SeedIndex(text, 2)
+        match = index.find_longest_match("Zabcd")
+        self.assertEqual(difflib_longest_match(text, "Zabcd"), match)
+        self.assertEqual(0, match.a)
+
+    def test_positions(self):
+        #there are fewer buckets than distinct seeds, so buckets are shared by seeds
+        index = SeedIndex("abcabcabdxyzxyz", 2)
+        self.assertEqual([0, 3, 6], index.get_positions("ab"))
+        self.assertEqual([10, 13], index.get_positions("yz"))
+        self.assertEqual([], index.get_positions("zz"))
+        self.assertEqual([], SeedIndex("", 2).get_positions("ab"))
+
+    def test_short_match(self):
+        index = SeedIndex(self.text, 8)
+        self.assertIsNone(index.find_longest_match("trash"))
+        self.assertIsNone(index.find_longest_match(""))
@@ -5,6 +5,7 @@ import unittest
 
 from plag_submissions_utils.common.simple_detector import SimpleDetector
 from plag_submissions_utils.common.simple_detector import SimpleDetectorOpts
+from plag_submissions_utils.common.simple_detector import RollingHashDetector
 from plag_submissions_utils.common.simple_detector import calc_originality_by_detections
 
 class SimpleDetectorTestCase(unittest.TestCase):
@@ -54,3 +55,21 @@ class SimpleDetectorTestCase(unittest.TestCase):
 
         originality = calc_originality_by_detections(detections, susp_text)
         self.assertAlmostEqual(18.0/32, originality, 3)
+
+
+class RollingHashDetectorTestCase(SimpleDetectorTestCase):
+    def setUp(self):
+        opts = SimpleDetectorOpts(5)
+        self.detector = RollingHashDetector(opts)
+
+    def test_same_as_simple(self):
+        simple = SimpleDetector(SimpleDetectorOpts(5))
+        texts = [("Тест text!!!!Text Other bla-bla!", "Good text!!Test Another code!"),
+                 ("Some text. some TEXT. Some text.", "some text, Some text! other"),
+                 ("ΣΣΣΣΣ ΣΣ", "σσσσσ. σσ"),
+                 ("İstanbul text", "İstanbul text"),
+                 ("", "text"),
+                 ("short", "")]
+        for susp_text, src_text in texts:
+            self.assertEqual(simple(susp_text, src_text),
+                             self.detector(susp_text, src_text))
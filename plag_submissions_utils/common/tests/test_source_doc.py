@@ -1,10 +1,14 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import os.path as fs
+import shutil
+import tempfile
 import unittest
 import mock
 
 from plag_submissions_utils.common.source_doc import SourceDoc
+from plag_submissions_utils.common.source_doc import load_sources_docs
 
 def dummy_doc(path):
     return """text
@@ -100,6 +104,16 @@ class FindSentInSrcTestCase(unittest.TestCase):
                          source_doc.get_text()[offs_beg:offs_end])
 
 
+    def test_batch_offs(self):
+        sents = [SIMPLE_SENT, SEQ_MATCHER_SENT2, SEQ_MATCHER_SENT,
+                 "немного 1рашн1 текст <many trash>", SIMPLE_SENT]
+        offsets = self.source_doc.get_sents_offs(sents)
+
+        self.assertEqual([self.source_doc.get_sent_offs(s) for s in sents], offsets)
+        self.assertEqual((27, 54, 0), offsets[0])
+        self.assertIsNone(offsets[3])
+
+
     @unittest.skip("current limitation")
     def test_offs_with_repeated_parts(self):
         #It finds the first occurrence of a part
@@ -251,3 +265,30 @@ class SpecificSeqMatcherCases(unittest.TestCase):
         offs_beg, offs_end, err = src_doc.get_sent_offs(sent)
         self.assertEqual(0, offs_beg)
         self.assertEqual(len(src_doc.get_text())-1, offs_end)
+
+
+def read_doc(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+class LoadSourcesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sources_dir = tempfile.mkdtemp()
+        for num in range(4):
+            with open(fs.join(self.sources_dir, "%d.html" % num), 'w') as f:
+                f.write("Текст источника %d. Второе предложение." % num)
+
+    def tearDown(self):
+        shutil.rmtree(self.sources_dir)
+
+    @mock.patch("plag_submissions_utils.common.text_proc.convert_doc",
+                read_doc)
+    def test_parallel_load(self):
+        docs = load_sources_docs(self.sources_dir, workers = 1)
+        parallel_docs = load_sources_docs(self.sources_dir, workers = 3)
+
+        self.assertEqual(['0', '1', '2', '3'], sorted(parallel_docs))
+        for name in docs:
+            self.assertEqual(docs[name].get_text(), parallel_docs[name].get_text())
+        self.assertEqual((19, 38, 0),
+                         parallel_docs['1'].get_sent_offs("Второе предложение."))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import mock
+
+from plag_submissions_utils.common.spell_engine import SpellEngine
+
+
+def _make_dict():
+    spell_dict = mock.Mock()
+    spell_dict.get_dic_encoding.return_value = 'KOI8-R'
+    spell_dict.spell.side_effect = lambda w: w.decode('KOI8-R') != "ашибка"
+    #pyhunspell decodes suggestions as latin1
+    spell_dict.suggest.side_effect = lambda w: ["ошибка".encode('KOI8-R').decode('latin1')]
+    return spell_dict
+
+
+class SpellEngineTestCase(unittest.TestCase):
+    def test_spell(self):
+        spell_dict = _make_dict()
+        engine = SpellEngine(spell_dict)
+        for _ in range(3):
+            self.assertTrue(engine.spell("ошибка"))
+            self.assertFalse(engine.spell("ашибка"))
+
+        self.assertEqual(2, spell_dict.spell.call_count)
+        spell_dict.spell.assert_any_call("ашибка".encode('KOI8-R'))
+        self.assertFalse(spell_dict.suggest.called)
+        self.assertEqual((4, 2, 0, 0), engine.get_stat())
+        self.assertAlmostEqual(4.0 / 6, engine.get_hit_rate())
+
+    def test_suggest(self):
+        spell_dict = _make_dict()
+        engine = SpellEngine(spell_dict)
+        self.assertEqual(["ошибка"], engine.suggest("ашибка"))
+        self.assertEqual(["ошибка"], engine.suggest("ашибка"))
+        self.assertEqual(1, spell_dict.suggest.call_count)
+        self.assertEqual((0, 0, 1, 1), engine.get_stat())
+
+    def test_lru(self):
+        spell_dict = _make_dict()
+        engine = SpellEngine(spell_dict, max_size = 2)
+        engine.spell("раз")
+        engine.spell("два")
+        engine.spell("раз")
+        #"два" is the least recently used one
+        engine.spell("три")
+        engine.spell("раз")
+        engine.spell("два")
+        self.assertEqual(4, spell_dict.spell.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
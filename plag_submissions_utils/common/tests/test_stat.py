@@ -37,6 +37,25 @@ class StatTestCase(unittest.TestCase):
         self.assertEqual(2, stat.mod_type_co_occur[(ModType.LPR, ModType.DEL, ModType.SYN)])
 
 
+    def test_merge(self):
+        chunks = [
+            Chunk("", "", "ADD,DEL", "", 1),
+            Chunk("", "", "ADD", "", 2),
+            Chunk("", "", "DEL,HPR", "", 3)
+        ]
+        collector = StatCollector()
+        collector(chunks)
+
+        merged = StatCollector()
+        merged.merge(StatCollector()(chunks[:1]))
+        merged.merge(StatCollector()(chunks[1:]))
+
+        stat, merged_stat = collector.get_stat(), merged.get_stat()
+        self.assertEqual(stat.chunks_cnt, merged_stat.chunks_cnt)
+        self.assertEqual(stat.mod_sent_lengths, merged_stat.mod_sent_lengths)
+        self.assertEqual(stat.mod_type_freqs, merged_stat.mod_type_freqs)
+        self.assertEqual(stat.mod_type_co_occur, merged_stat.mod_type_co_occur)
+
     def test_src_stat(self):
         all_chunks = [
             [
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+import zipfile
+import mock
+
+from plag_submissions_utils.common import disk_lru
+from plag_submissions_utils.common import extract_utils
+from plag_submissions_utils.common import subm_cache
+from plag_submissions_utils.common.chunks import ChunkOpts
+from plag_submissions_utils.common.submissions import run_over_submissions
+from plag_submissions_utils.common.subm_cache import SubmCache
+
+
+class SubmCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = fs.join(self.temp_dir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _make_arc(self, name, content):
+        path = fs.join(self.temp_dir, name)
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr("essay/sources/1.txt", content)
+            zf.writestr("essay/sources_list.xlsx", "list")
+        return path
+
+    def test_extract(self):
+        cache = SubmCache(self.cache_dir)
+        arc1 = self._make_arc("1.zip", "text")
+        sources_dir, sources_list = cache.extract(arc1)
+        self.assertEqual("sources", fs.basename(sources_dir))
+        self.assertEqual("sources_list.xlsx", fs.basename(sources_list))
+        with open(fs.join(sources_dir, "1.txt")) as f:
+            self.assertEqual("text", f.read())
+
+        with mock.patch.object(extract_utils, "extract_submission") as extract_mock:
+            self.assertEqual((sources_dir, sources_list), cache.extract(arc1))
+            self.assertFalse(extract_mock.called)
+        self.assertEqual((1, 1), cache.get_stat())
+
+        arc2 = self._make_arc("2.zip", "other text")
+        sources_dir2, _ = cache.extract(arc2)
+        self.assertNotEqual(sources_dir, sources_dir2)
+        self.assertEqual((1, 2), cache.get_stat())
+
+    def test_invalid_submission(self):
+        cache = SubmCache(self.cache_dir)
+        arc_path = fs.join(self.temp_dir, "arc.zip")
+        with zipfile.ZipFile(arc_path, 'w') as zf:
+            zf.writestr("sources_list.xlsx", "list")
+        with self.assertRaises(extract_utils.InvalidSubmission):
+            cache.extract(arc_path)
+        self.assertEqual([], cache._store.list_entries())
+
+    def test_create_chunks(self):
+        cache = SubmCache(self.cache_dir)
+        meta_path = fs.join(self.temp_dir, "sources_list.xlsx")
+        with open(meta_path, 'w') as f:
+            f.write("list")
+        create = mock.Mock(side_effect = lambda path, opts: (["chunk"], ["error"]))
+
+        opts = ChunkOpts()
+        self.assertEqual((["chunk"], ["error"]),
+                         cache.create_chunks(create, meta_path, "2", opts))
+        self.assertEqual((["chunk"], ["error"]),
+                         cache.create_chunks(create, meta_path, "2", opts))
+        self.assertEqual(1, create.call_count)
+
+        #another version or opts
+        cache.create_chunks(create, meta_path, "3", opts)
+        cache.create_chunks(create, meta_path, "2", ChunkOpts(normalize = True))
+        self.assertEqual(3, create.call_count)
+
+        with open(meta_path, 'w') as f:
+            f.write("new list")
+        cache.create_chunks(create, meta_path, "2", opts)
+        self.assertEqual(4, create.call_count)
+
+    def test_lru_eviction(self):
+        cache = SubmCache(self.cache_dir, max_size = 25)
+        #the entry is larger than max_size, but it is not evicted until the next put
+        sources_dir1, _ = cache.extract(self._make_arc("1.zip", "1" * 10))
+        self.assertTrue(fs.exists(sources_dir1))
+        entry1 = fs.dirname(fs.dirname(sources_dir1))
+        os.utime(entry1, (0, 0))
+
+        sources_dir2, _ = cache.extract(self._make_arc("2.zip", "2" * 10))
+        self.assertFalse(fs.exists(entry1))
+        self.assertTrue(fs.exists(sources_dir2))
+
+    def test_eviction_grace(self):
+        cache = SubmCache(self.cache_dir, max_size = 500, evict_grace = 600)
+        sources_dir1, _ = cache.extract(self._make_arc("1.zip", "1" * 400))
+        sources_dir2, _ = cache.extract(self._make_arc("2.zip", "2" * 400))
+        #both entries are recently used, so another process may still read them
+        self.assertTrue(fs.exists(sources_dir1))
+        self.assertTrue(fs.exists(sources_dir2))
+
+        #the cache is not listed again on every put
+        with mock.patch.object(cache._store, "list_entries") as list_mock:
+            cache.extract(self._make_arc("3.zip", "3"))
+            self.assertFalse(list_mock.called)
+
+    def test_eviction_low_water(self):
+        cache = SubmCache(self.cache_dir, max_size = 1000, evict_grace = 0)
+        for num in range(4):
+            cache.extract(self._make_arc("%d.zip" % num, str(num) * 100))
+        entries = [path for _, _, path in sorted(cache._store.list_entries())]
+        for num, path in enumerate(entries):
+            os.utime(path, (num, num))
+        entry_size = disk_lru.calc_size(entries[0])
+
+        cache.extract(self._make_arc("4.zip", "4" * 400))
+        kept = [fs.exists(path) for path in entries]
+        #the oldest entries are evicted until the cache is below 80% of max_size
+        self.assertEqual(sorted(kept), kept)
+        self.assertIn(True, kept)
+        total_size = sum(size for _, size, _ in cache._store.list_entries())
+        self.assertLessEqual(total_size, 800)
+        self.assertGreater(total_size + entry_size, 800)
+
+    def test_run_over_submissions(self):
+        subm_dir = fs.join(self.temp_dir, "subm")
+        os.makedirs(fs.join(subm_dir, "1"))
+        shutil.copy(self._make_arc("1.zip", "text"), fs.join(subm_dir, "1"))
+
+        def arc_proc(susp_id, sources_dir, _):
+            return sources_dir
+
+        results = []
+        with mock.patch.object(subm_cache, "SUBM_CACHE", SubmCache(self.cache_dir)):
+            for _ in range(2):
+                run_over_submissions(subm_dir, arc_proc, workers = 1,
+                                     merge_result = lambda _, r: results.append(r))
+            self.assertEqual((1, 1), subm_cache.get_subm_cache().get_stat())
+        self.assertEqual(results[0], results[1])
+        self.assertTrue(results[0].startswith(self.cache_dir))
+
+    def test_doc_cache_dir(self):
+        self.assertEqual("docs", subm_cache.get_doc_cache_dir("docs", "subm"))
+        self.assertEqual(fs.join("subm", "docs"),
+                         subm_cache.get_doc_cache_dir("", "subm"))
+        self.assertEqual("", subm_cache.get_doc_cache_dir("", ""))
+
+
+if __name__ == '__main__':
+    unittest.main()
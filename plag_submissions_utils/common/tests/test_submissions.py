@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+import mock
+
+from plag_submissions_utils.common import submissions
+from plag_submissions_utils.common.submissions import run_over_submissions
+
+TEST_ARCHIVE = fs.join(fs.dirname(__file__), "..", "..", "..", "data", "test_data", "test.zip")
+
+
+class RunOverSubmissionsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.subm_dir = tempfile.mkdtemp()
+        for susp_id in ["4", "5", "6", "7"]:
+            os.makedirs(fs.join(self.subm_dir, susp_id))
+            shutil.copy(TEST_ARCHIVE, fs.join(self.subm_dir, susp_id))
+        #empty submission
+        os.makedirs(fs.join(self.subm_dir, "8"))
+
+    def tearDown(self):
+        shutil.rmtree(self.subm_dir)
+
+    def _run(self, workers):
+        def arc_proc(susp_id, sources_dir, meta_filepath):
+            if susp_id == "6":
+                raise RuntimeError("broken archive")
+            return len(os.listdir(sources_dir)), fs.basename(meta_filepath)
+
+        results = []
+        run_over_submissions(self.subm_dir, arc_proc, workers = workers,
+                             merge_result = lambda susp_id, r: results.append((susp_id, r)))
+        return results
+
+    def test_sequential(self):
+        results = self._run(1)
+        listing = [e for e in os.listdir(self.subm_dir) if e not in ("6", "8")]
+        self.assertEqual(listing, [susp_id for susp_id, _ in results])
+        self.assertEqual(7, results[0][1][0])
+
+    def test_parallel(self):
+        self.assertEqual(self._run(1), self._run(3))
+
+    @mock.patch.object(submissions, "MAX_PENDING_PER_WORKER", 1)
+    def test_parallel_few_pending(self):
+        #archives are submitted as results are merged
+        self.assertEqual(self._run(1), self._run(2))
@@ -100,3 +100,17 @@ class MorphTestCase(unittest.TestCase):
         self.assertEqual('пришедший', tokens[0])
         self.assertEqual('человек', tokens[1])
         self.assertEqual('уйти', tokens[2])
+
+
+class LangByScriptTestCase(unittest.TestCase):
+    def test_detect(self):
+        self.assertEqual('ru', text_proc.detect_lang_by_script("Пришедшие люди, ушли ни с чем!"))
+        self.assertEqual('en', text_proc.detect_lang_by_script("People came and left with nothing."))
+        #a few foreign words do not change the language
+        self.assertEqual('ru', text_proc.detect_lang_by_script(
+            "Библиотека NumPy используется для вычислений."))
+
+    def test_ambiguous(self):
+        self.assertIsNone(text_proc.detect_lang_by_script("Библиотека NumPy and SciPy"))
+        self.assertIsNone(text_proc.detect_lang_by_script("1234, 5678!"))
+        self.assertIsNone(text_proc.detect_lang_by_script(""))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os.path as fs
+import shutil
+import sys
+import tempfile
+import unittest
+import mock
+
+from plag_submissions_utils.common import text_proc
+from plag_submissions_utils.common import tika_server
+from plag_submissions_utils.common.tika_server import TikaServer
+
+
+#the same protocol as tika app in server mode: read a document until EOF,
+#write the text and close the connection
+FAKE_TIKA = """
+import socket, sys, threading, time
+port = int([a for a in sys.argv if a.startswith('--port=')][0][len('--port='):])
+server = socket.socket()
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(('127.0.0.1', port))
+server.listen(5)
+def handle(conn):
+    data = b''
+    while True:
+        block = conn.recv(1024)
+        if not block:
+            break
+        data += block
+    if data == b'slow':
+        time.sleep(3)
+    conn.sendall(data.decode('utf8').upper().encode('utf8'))
+    conn.close()
+while True:
+    conn, _ = server.accept()
+    threading.Thread(target=handle, args=(conn,), daemon=True).start()
+"""
+
+class TikaServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        script = self._make_file("fake_tika.py", FAKE_TIKA)
+        self.server = TikaServer([sys.executable, script], timeout = 1,
+                                 startup_timeout = 10)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _make_file(self, name, content):
+        path = fs.join(self.temp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_convert(self):
+        self.server.start()
+        doc1 = self._make_file("1.html", "Текст документа.")
+        doc2 = self._make_file("2.html", "other text")
+        self.assertEqual("ТЕКСТ ДОКУМЕНТА.", self.server.convert(doc1))
+        self.assertEqual("OTHER TEXT", self.server.convert(doc2))
+
+    def test_timeout(self):
+        self.server.start()
+        doc = self._make_file("1.html", "slow")
+        with self.assertRaises(tika_server.ConversionTimeout):
+            self.server.convert(doc)
+
+    def test_restart(self):
+        self.server.start()
+        doc = self._make_file("1.html", "text")
+        self.server._proc.kill()
+        self.server._proc.wait()
+        self.assertEqual("TEXT", self.server.convert(doc))
+
+    def test_failed_start(self):
+        server = TikaServer([fs.join(self.temp_dir, "no_such_tika")])
+        with self.assertRaises(tika_server.TikaServerError):
+            server.start()
+
+    def test_fallback(self):
+        for error in (tika_server.TikaServerError("failed"),
+                      tika_server.ConversionTimeout("slow")):
+            server = mock.Mock()
+            server.convert.side_effect = error
+            doc = self._make_file("1.html", "text")
+            with mock.patch.object(text_proc, "_get_tika_server", return_value = server), \
+                 mock.patch("subprocess.check_output", return_value = b"text") as check_output:
+                self.assertEqual("text", text_proc.convert_doc(doc))
+            self.assertEqual(1, check_output.call_count)
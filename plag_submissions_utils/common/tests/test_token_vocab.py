@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import random
+import unittest
+
+import distance
+
+from plag_submissions_utils.common import token_vocab
+from plag_submissions_utils.common.token_vocab import TokenVocab
+
+
+class TokenVocabTestCase(unittest.TestCase):
+    def setUp(self):
+        self.vocab = TokenVocab()
+
+    def test_ids(self):
+        ids = self.vocab.to_ids(["a", "b", "a", "c"])
+        self.assertEqual([0, 1, 0, 2], list(ids))
+        self.assertEqual(1, self.vocab.get_id("b"))
+        self.assertEqual(3, len(self.vocab))
+
+    def test_to_ids(self):
+        ids1, ids2 = token_vocab.to_ids(["a", "b"], ["b", "c"])
+        self.assertEqual(([0, 1], [1, 2]), (list(ids1), list(ids2)))
+        #every comparison has its own vocabulary
+        ids, = token_vocab.to_ids(["c"])
+        self.assertEqual([0], list(ids))
+
+    def _check_same(self, seq1, seq2):
+        ids1, ids2 = self.vocab.to_ids(seq1), self.vocab.to_ids(seq2)
+        self.assertEqual(distance.levenshtein(seq1, seq2),
+                         token_vocab.levenshtein(ids1, ids2))
+        self.assertEqual(distance.nlevenshtein(seq1, seq2),
+                         token_vocab.nlevenshtein(ids1, ids2))
+        if seq1 or seq2:
+            self.assertEqual(distance.jaccard(seq1, seq2),
+                             token_vocab.jaccard(ids1, ids2))
+
+    def test_same_as_distance(self):
+        self._check_same("но в нём теперь красовалась пробоина".split(),
+                         "в нём красовались большие пробоины".split())
+        self._check_same([], [])
+        self._check_same(["a"], [])
+        self._check_same(["a", "b"], ["a", "b"])
+
+    def test_random(self):
+        rnd = random.Random(0)
+        for _ in range(200):
+            #long sequences check bit vectors longer than machine word
+            seq1 = [str(rnd.randint(0, 5)) for _ in range(rnd.randint(0, 150))]
+            seq2 = [str(rnd.randint(0, 5)) for _ in range(rnd.randint(0, 150))]
+            self._check_same(seq1, seq2)
+
+    def test_empty_jaccard(self):
+        with self.assertRaises(ZeroDivisionError):
+            token_vocab.jaccard(self.vocab.to_ids([]), self.vocab.to_ids([]))
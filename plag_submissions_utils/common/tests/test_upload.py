@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import hashlib
+import io
+import os
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from plag_submissions_utils.common import upload
+from plag_submissions_utils.common.upload import UploadTooLarge
+
+
+class UploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dest_path = fs.join(self.temp_dir, "arch.zip")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    @mock.patch.object(upload, "BLOCK_SIZE", 10)
+    def test_save_upload(self):
+        data = b"x" * 35
+        digest = hashlib.sha1()
+        self.assertEqual(35, upload.save_upload(io.BytesIO(data), self.dest_path,
+                                                max_size = 35, digest = digest))
+        self.assertEqual(hashlib.sha1(data).hexdigest(), digest.hexdigest())
+        with open(self.dest_path, 'rb') as f:
+            self.assertEqual(data, f.read())
+
+    @mock.patch.object(upload, "BLOCK_SIZE", 10)
+    def test_too_large(self):
+        upl_file = io.BytesIO(b"x" * 100)
+        with self.assertRaises(UploadTooLarge):
+            upload.save_upload(upl_file, self.dest_path, max_size = 15)
+        #the rest of the upload is not read
+        self.assertEqual(20, upl_file.tell())
+        self.assertFalse(fs.exists(self.dest_path))
+
+    def _make_form(self, data):
+        body = (b"--b\r\n"
+                b'Content-Disposition: form-data; name="version"\r\n\r\n2\r\n'
+                b"--b\r\n"
+                b'Content-Disposition: form-data; name="file"; filename="a.zip"\r\n'
+                b"Content-Type: application/zip\r\n\r\n" + data + b"\r\n"
+                b"--b--\r\n")
+        environ = {"REQUEST_METHOD": "POST",
+                   "CONTENT_TYPE": "multipart/form-data; boundary=b"}
+        return io.BytesIO(body), environ
+
+    def test_parse_form(self):
+        for data in (b"x" * 5000, b"small"):
+            upload_dir = tempfile.mkdtemp(dir = self.temp_dir)
+            fp, environ = self._make_form(data)
+            form = upload.parse_form(fp, environ, upload_dir)
+            self.assertEqual("2", form.getvalue("version"))
+            self.assertEqual("a.zip", form["file"].filename)
+
+            dest_path = fs.join(upload_dir, "arch.zip")
+            digest = hashlib.sha1()
+            self.assertEqual(len(data), upload.save_form_file(form["file"], dest_path,
+                                                              digest = digest))
+            self.assertEqual(hashlib.sha1(data).hexdigest(), digest.hexdigest())
+            with open(dest_path, 'rb') as f:
+                self.assertEqual(data, f.read())
+            #the uploaded file is moved, not copied
+            self.assertEqual(["arch.zip"], os.listdir(upload_dir))
+
+    def test_parse_form_too_large(self):
+        fp, environ = self._make_form(b"x" * 100000)
+        with self.assertRaises(UploadTooLarge):
+            upload.parse_form(fp, environ, self.temp_dir, max_size = 1000)
+        #the rest of the request is not read
+        self.assertLess(fp.tell(), 100000)
+
+        fp, environ = self._make_form(b"x" * 100)
+        environ["CONTENT_LENGTH"] = str(len(fp.getvalue()))
+        with self.assertRaises(UploadTooLarge):
+            upload.parse_form(fp, environ, self.temp_dir, max_size = 100)
+        self.assertEqual(0, fp.tell())
+
+    def test_check_content_length(self):
+        upload.check_content_length({"CONTENT_LENGTH": "100"}, 100)
+        upload.check_content_length({"CONTENT_LENGTH": ""}, 100)
+        upload.check_content_length({}, 100)
+        with self.assertRaises(UploadTooLarge):
+            upload.check_content_length({"CONTENT_LENGTH": "101"}, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os.path as fs
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import mock
+import xlrd
+
+from plag_submissions_utils.common import extract_utils
+from plag_submissions_utils.common import xlsx_reader
+
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+ xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="s1" sheetId="1" r:id="rId1"/><sheet name="s2" sheetId="2" r:id="rId2"/></sheets>
+</workbook>"""
+
+RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Target="worksheets/sheet1.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>
+<Relationship Id="rId2" Target="worksheets/sheet2.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>
+<Relationship Id="rId3" Target="sharedStrings.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/>
+</Relationships>"""
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="xml" ContentType="application/xml"/>
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Override PartName="/xl/workbook.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+</Types>"""
+
+SHARED_STRINGS = """<?xml version="1.0" encoding="UTF-8"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<si><t>Номер</t></si>
+<si><r><t xml:space="preserve">rich </t></r><r><t>text</t></r><rPh><t>skip</t></rPh></si>
+<si><t> stripped_x0041_ </t></si>
+</sst>"""
+
+SHEET = """<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>
+<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>
+<row r="3"><c r="A3"><v>1</v></c><c r="B3"/><c t="s"><v>2</v></c>
+<c t="inlineStr"><is><t>inline</t></is></c></row>
+<row><c r="A4" t="b"><v>1</v></c><c r="B4" t="e"><v>#DIV/0!</v></c>
+<c r="C4" t="str"><f>A1</f><v>formula</v></c></row>
+</sheetData><mergeCells count="1"><mergeCell ref="E5:F6"/></mergeCells></worksheet>"""
+
+
+class XlsxReaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _create_xlsx(self, sheet):
+        path = fs.join(self.temp_dir, "sources_list.xlsx")
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+            zf.writestr("xl/workbook.xml", WORKBOOK)
+            zf.writestr("xl/_rels/workbook.xml.rels", RELS)
+            zf.writestr("xl/sharedStrings.xml", SHARED_STRINGS)
+            zf.writestr("xl/worksheets/sheet1.xml", sheet)
+            zf.writestr("xl/worksheets/sheet2.xml", SHEET)
+        return path
+
+    def _assert_same_as_xlrd(self, path):
+        expected = xlrd.open_workbook(path).sheet_by_index(0)
+        rows = list(xlsx_reader._iter_xlsx_rows(path))
+        self.assertEqual(expected.nrows, len(rows))
+        for rowx, row in enumerate(rows):
+            row = xlsx_reader.pad_row(row, expected.ncols)
+            self.assertEqual(expected.row_values(rowx), row)
+            self.assertEqual([type(v) for v in expected.row_values(rowx)],
+                             [type(v) for v in row])
+
+    def test_cells(self):
+        path = self._create_xlsx(SHEET)
+        rows = list(xlsx_reader._iter_xlsx_rows(path))
+        self.assertEqual([["Номер", "", "rich text"],
+                          [],
+                          [1.0, "", "strippedA", "inline"],
+                          [1, 7, "formula"],
+                          [],
+                          []], rows)
+        self._assert_same_as_xlrd(path)
+
+    def test_test_data(self):
+        for arc_path in ("data/test_data/test.zip", "data/test_data_v2/test.zip",
+                         "data/test_data_v3/test.zip"):
+            dest_dir = tempfile.mkdtemp(dir = self.temp_dir)
+            _, sources_list = extract_utils.extract_submission(arc_path, dest_dir)
+            self._assert_same_as_xlrd(sources_list)
+
+    def test_fallback(self):
+        sheet = SHEET.replace('t="b"', 't="unknown"')
+        path = self._create_xlsx(sheet)
+        with self.assertRaises(xlsx_reader.XlsxFormatError):
+            list(xlsx_reader._iter_xlsx_rows(path))
+
+        #rows after the failed one are read by xlrd
+        with mock.patch.object(xlrd, "open_workbook") as open_mock:
+            xlrd_sheet = open_mock.return_value.sheet_by_index.return_value
+            xlrd_sheet.nrows = 4
+            xlrd_sheet.row_values.side_effect = lambda rowx: ["xlrd", rowx]
+            rows = list(xlsx_reader.iter_first_sheet_rows(path))
+            open_mock.assert_called_once_with(path)
+        self.assertEqual([["Номер", "", "rich text"],
+                          [],
+                          [1.0, "", "strippedA", "inline"],
+                          ["xlrd", 3]], rows)
+
+        with mock.patch.object(xlrd, "open_workbook") as open_mock:
+            rows = list(xlsx_reader.iter_first_sheet_rows(self._create_xlsx(SHEET)))
+            self.assertFalse(open_mock.called)
+        self.assertEqual(6, len(rows))
+
+
+if __name__ == '__main__':
+    unittest.main()
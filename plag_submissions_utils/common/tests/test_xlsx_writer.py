@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os.path as fs
+import re
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import openpyxl
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+from plag_submissions_utils.common import xlsx_writer
+
+
+class XlsxWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.out_path = fs.join(self.temp_dir, "sources_list.xlsx")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _read_members(self, path):
+        with zipfile.ZipFile(path) as zf:
+            #it contains creation time
+            return {name: zf.read(name) for name in zf.namelist()
+                    if name != "docProps/core.xml"}
+
+    def _read_rows(self, path):
+        ws = openpyxl.load_workbook(path).active
+        return [[c.value for c in row] for row in ws.iter_rows()]
+
+    def test_same_as_workbook(self):
+        rows = [("файл", "тип", "эссе"),
+                ("1.txt", "ADD", "предложение", None, "orig"),
+                (None, ),
+                ("2.txt", 1.5, "")]
+
+        #rows are consumed as they are produced
+        xlsx_writer.write_rows(self.out_path, (row for row in rows))
+
+        expected_path = fs.join(self.temp_dir, "expected.xlsx")
+        wb = openpyxl.Workbook()
+        for row in rows:
+            wb.active.append(row)
+        wb.save(expected_path)
+
+        expected = self._read_members(expected_path)
+        #write-only sheet doesn't write the optional dimension element
+        sheet_name = "xl/worksheets/sheet1.xml"
+        expected[sheet_name] = re.sub(b'<dimension ref="[^"]*" */>', b'', expected[sheet_name])
+        self.assertEqual(expected, self._read_members(self.out_path))
+
+    def test_invalid_rows(self):
+        rows = [("a", "b"), ("bad\x01", "c"), ("d", "e")]
+        with self.assertRaises(IllegalCharacterError):
+            xlsx_writer.write_rows(self.out_path, rows)
+        self.assertFalse(fs.exists(self.out_path))
+
+        xlsx_writer.write_rows(self.out_path, rows, skip_invalid = True)
+        self.assertEqual([["a", "b"], ["d", "e"]], self._read_rows(self.out_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
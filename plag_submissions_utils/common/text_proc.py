@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import logging
 import pipes
 import subprocess
 import os
@@ -34,14 +35,71 @@ HYPHENS = [h for h in Tokenizer._hyphens if h is not '-']
 
 import syntok.segmenter
 
-MORPH_ANALYZER = None
+from . import morph_cache
+from . import resources
+from . import tika_server
+
+MORPH_CACHE = None
 STOP_POS = ['PREP', 'CONJ', 'PRCL', 'INTJ']
+#bump it when _normalize starts to return another normal form;
+#it invalidates persisted morph cache.
+MORPH_VERSION = "1"
+
+resources.register("pymorphy2", pymorphy2.MorphAnalyzer)
 
 def _get_morph_analyzer():
-    global MORPH_ANALYZER
-    if MORPH_ANALYZER is None:
-        MORPH_ANALYZER = pymorphy2.MorphAnalyzer()
-    return MORPH_ANALYZER
+    return resources.get("pymorphy2")
+
+def _analyze_token(token):
+    """Returns normal form and POS of the token."""
+    results = _get_morph_analyzer().parse(token)
+    pos = results[0].tag.POS if results else None
+    if pos is not None:
+        #grammemes of pymorphy2 are instances of a local class, they can't be pickled
+        pos = str(pos)
+    return _normalize(results, token), pos
+
+def _get_morph_cache():
+    global MORPH_CACHE
+    if MORPH_CACHE is None:
+        meta = _get_morph_analyzer().dictionary.meta
+        tag = "%s:%s:%s" % (MORPH_VERSION, meta.get('pymorphy2_version'),
+                            meta.get('source_revision'))
+        MORPH_CACHE = morph_cache.MorphCache(_analyze_token,
+                                             path = morph_cache.MORPH_CACHE_PATH,
+                                             tag = tag)
+    return MORPH_CACHE
+
+def save_morph_cache():
+    """Forked workers exit without atexit handlers, so they call it after every task."""
+    if MORPH_CACHE is None:
+        return
+    try:
+        MORPH_CACHE.save()
+    except Exception as e:
+        logging.warning("failed to save morph cache: %s", e)
+
+
+CYRILLIC_LETTER_RE = regex.compile(r"\p{Cyrillic}")
+LATIN_LETTER_RE = regex.compile(r"\p{Latin}")
+#share of letters of one script that is enough to determine the language
+SCRIPT_LANG_RATIO = 0.8
+
+def detect_lang_by_script(text, min_ratio = SCRIPT_LANG_RATIO):
+    """Returns 'ru' if the text is mostly written in Cyrillic, 'en' if it is mostly Latin
+    and None if it is ambiguous (or has no letters).
+    It is cheap and deterministic, unlike langdetect.
+    """
+    cyr_cnt = len(CYRILLIC_LETTER_RE.findall(text))
+    lat_cnt = len(LATIN_LETTER_RE.findall(text))
+    letters_cnt = cyr_cnt + lat_cnt
+    if not letters_cnt:
+        return None
+    if cyr_cnt >= min_ratio * letters_cnt:
+        return 'ru'
+    if lat_cnt >= min_ratio * letters_cnt:
+        return 'en'
+    return None
 
 
 def ispunct(st):
@@ -83,14 +141,12 @@ def tok_sent(sent = None, tokens = None, make_lower = True, normalize = False,
         tokens = tok.split(sent)
 
     if normalize or skip_stop_words:
-        analyzer = _get_morph_analyzer()
+        cache = _get_morph_cache()
         norm_tokens = []
         for token in tokens:
-            results = analyzer.parse(token.value)
-            normal_form = _normalize(results, token.value)
-            if skip_stop_words and results:
-                if results[0].tag.POS in STOP_POS:
-                    continue
+            normal_form, pos = cache.get(token.value)
+            if skip_stop_words and pos in STOP_POS:
+                continue
 
             norm_tokens.append(normal_form)
         tokens = norm_tokens
@@ -104,14 +160,58 @@ def tok_sent(sent = None, tokens = None, make_lower = True, normalize = False,
     return [proc(s) for s in tokens if not ispunct(s)]
 
 TIKA_PREFIX=os.environ.get("TIKA_PREFIX", "/compiled")
-
-def convert_doc(doc_path):
+#bump it when convert_doc or preprocess_text starts to produce another text;
+#it invalidates converted documents in doc_cache.
+CONVERTER_VERSION = "1"
+#keep one tika process running instead of starting tika for every document
+TIKA_USE_SERVER = os.environ.get("TIKA_USE_SERVER", "") not in ("", "0")
+TIKA_SERVER_CONCURRENCY = int(os.environ.get("TIKA_SERVER_CONCURRENCY", 4))
+#seconds per document
+TIKA_SERVER_TIMEOUT = int(os.environ.get("TIKA_SERVER_TIMEOUT", 120))
+TIKA_SERVER = None
+
+def _get_tika_server():
+    global TIKA_SERVER, TIKA_USE_SERVER
+    if TIKA_SERVER is None and TIKA_USE_SERVER:
+        server = tika_server.TikaServer(["%s/bin/tika" % TIKA_PREFIX],
+                                        max_concurrency = TIKA_SERVER_CONCURRENCY,
+                                        timeout = TIKA_SERVER_TIMEOUT)
+        try:
+            server.start()
+        except tika_server.TikaServerError as e:
+            logging.warning("%s; one-shot tika is used", e)
+            TIKA_USE_SERVER = False
+            return None
+        TIKA_SERVER = server
+    return TIKA_SERVER
+
+def prepare_converters():
+    """Starts long-lived converters.
+    It should be called before forking workers, so that they share the converters.
+    """
+    _get_tika_server()
+
+def get_converter_name(doc_path):
     #tika's pdf converter is not very good
     if doc_path.endswith("pdf"):
-        cmd = "pdftotext %s -" % pipes.quote(doc_path)
+        return "pdftotext"
     elif doc_path.endswith("txt"):
+        return "enca"
+    return "tika"
+
+def convert_doc(doc_path):
+    converter = get_converter_name(doc_path)
+    if converter == "pdftotext":
+        cmd = "pdftotext %s -" % pipes.quote(doc_path)
+    elif converter == "enca":
         cmd = "enca -Lrussian -x utf-8 %s && cat %s" % ((pipes.quote(doc_path), )*2)
     else:
+        server = _get_tika_server()
+        if server is not None:
+            try:
+                return server.convert(doc_path)
+            except tika_server.TikaServerError as e:
+                logging.warning("%s; fallback to one-shot tika", e)
         cmd = "%s/bin/tika --text %s" % (TIKA_PREFIX, pipes.quote(doc_path))
     # textract html converter is not very good
     # cmd = "textract %s" % pipes.quote(doc_path)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Long-lived tika process that converts documents sent over a local socket.
+
+Tika app started with --server option listens on the port. A client sends
+the document, shuts down the write side of the connection and reads
+plain text until the server closes the connection.
+It saves the JVM start (several seconds) on every converted document.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import socket
+import subprocess
+import time
+
+
+class TikaServerError(Exception):
+    """The server is unavailable or can't convert the document;
+    the caller may fallback to the one-shot tika."""
+    pass
+
+class ConversionTimeout(TikaServerError):
+    """The document may still be converted by the one-shot tika"""
+    pass
+
+
+def _find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TikaServer(object):
+    """Tika process with a limited number of documents converted concurrently.
+    The limit is shared with the processes forked after start.
+    """
+    def __init__(self, cmd, max_concurrency = 4, timeout = 120,
+                 startup_timeout = 60):
+        super(TikaServer, self).__init__()
+        self._cmd             = list(cmd)
+        self._timeout         = timeout
+        self._startup_timeout = startup_timeout
+        self._slots           = multiprocessing.BoundedSemaphore(max_concurrency)
+
+        self._proc            = None
+        self._port            = None
+        self._owner_pid       = None
+
+    def is_running(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self):
+        if self.is_running():
+            return
+
+        self._port = _find_free_port()
+        cmd = self._cmd + ["--text", "--encoding=UTF-8",
+                           "--port=%d" % self._port, "--server"]
+        logging.info("starting tika server: %s", " ".join(cmd))
+        try:
+            self._proc = subprocess.Popen(cmd, stdin = subprocess.DEVNULL,
+                                          stdout = subprocess.DEVNULL,
+                                          stderr = subprocess.DEVNULL)
+        except OSError as e:
+            raise TikaServerError("failed to start tika server: %s" % e)
+        self._owner_pid = os.getpid()
+        atexit.register(self.stop)
+
+        deadline = time.monotonic() + self._startup_timeout
+        while True:
+            if not self.is_running():
+                raise TikaServerError("tika server exited with code %s" %
+                                      self._proc.returncode)
+            try:
+                socket.create_connection(("127.0.0.1", self._port), timeout = 1).close()
+                return
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                self.stop()
+                raise TikaServerError("tika server has not started in %d seconds" %
+                                      self._startup_timeout)
+            time.sleep(0.2)
+
+    def stop(self):
+        #only the process that started the server may stop it
+        if self._proc is None or os.getpid() != self._owner_pid:
+            return
+        if self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+        self._proc = None
+
+    def convert(self, doc_path):
+        """Returns text of the document.
+        Raises ConversionTimeout if it takes more than timeout seconds
+        (including waiting for a free slot).
+        """
+        if not self.is_running() and os.getpid() == self._owner_pid:
+            logging.warning("tika server is not running, restarting it")
+            self.start()
+
+        deadline = time.monotonic() + self._timeout
+        if not self._slots.acquire(timeout = self._timeout):
+            raise ConversionTimeout("no free tika slot for %s in %d seconds" %
+                                    (doc_path, self._timeout))
+        try:
+            return self._convert(doc_path, deadline)
+        finally:
+            self._slots.release()
+
+    def _convert(self, doc_path, deadline):
+        def time_left():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise socket.timeout()
+            return left
+
+        with open(doc_path, 'rb') as f:
+            data = f.read()
+
+        parts = []
+        try:
+            with socket.create_connection(("127.0.0.1", self._port),
+                                          timeout = time_left()) as conn:
+                conn.settimeout(time_left())
+                conn.sendall(data)
+                conn.shutdown(socket.SHUT_WR)
+                while True:
+                    conn.settimeout(time_left())
+                    block = conn.recv(64 * 1024)
+                    if not block:
+                        break
+                    parts.append(block)
+        except socket.timeout:
+            raise ConversionTimeout("conversion of %s took more than %d seconds" %
+                                    (doc_path, self._timeout))
+        except OSError as e:
+            raise TikaServerError("failed to convert %s: %s" % (doc_path, e))
+
+        if not parts:
+            #tika doesn't report errors in server mode
+            raise TikaServerError("no text was received for %s" % doc_path)
+        return b''.join(parts).decode('utf8')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Vocabulary that maps tokens to integer ids and distances over sequences of ids.
+
+nlevenshtein and jaccard return exactly the same values as
+distance.nlevenshtein and distance.jaccard for the corresponding token lists.
+"""
+
+from array import array
+
+
+class TokenVocab(object):
+    def __init__(self):
+        super(TokenVocab, self).__init__()
+        self._ids = {}
+
+    def get_id(self, token):
+        token_id = self._ids.get(token)
+        if token_id is None:
+            token_id = len(self._ids)
+            self._ids[token] = token_id
+        return token_id
+
+    def to_ids(self, tokens):
+        return array('i', [self.get_id(t) for t in tokens])
+
+    def __len__(self):
+        return len(self._ids)
+
+
+def to_ids(*token_lists):
+    """Returns arrays of ids of token lists in a new vocabulary.
+    Ids can be compared only with each other; the vocabulary lives as long as
+    a single comparison, so it doesn't grow in long-lived processes."""
+    vocab = TokenVocab()
+    return [vocab.to_ids(tokens) for tokens in token_lists]
+
+
+def levenshtein(seq1, seq2):
+    """Edit distance computed with the bit-parallel algorithm of Myers
+    (in Hyyro's formulation); bit vectors are python ints,
+    so there is no limit on the length of sequences.
+    """
+    if len(seq1) < len(seq2):
+        seq1, seq2 = seq2, seq1
+    #the shorter sequence is the pattern
+    pattern_len = len(seq2)
+    if pattern_len == 0:
+        return len(seq1)
+
+    peq = {}
+    for i, item in enumerate(seq2):
+        peq[item] = peq.get(item, 0) | (1 << i)
+
+    mask = (1 << pattern_len) - 1
+    last_bit = 1 << (pattern_len - 1)
+    pv = mask
+    mv = 0
+    score = pattern_len
+    for item in seq1:
+        eq = peq.get(item, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last_bit:
+            score += 1
+        elif mh & last_bit:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+def nlevenshtein(seq1, seq2):
+    if seq1 == seq2:
+        return 0.0
+    len1, len2 = len(seq1), len(seq2)
+    if len1 == 0 or len2 == 0:
+        return 1.0
+    return levenshtein(seq1, seq2) / float(max(len1, len2))
+
+def jaccard(seq1, seq2):
+    set1, set2 = set(seq1), set(seq2)
+    return 1 - len(set1 & set2) / float(len(set1 | set2))
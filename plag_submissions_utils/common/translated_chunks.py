@@ -1,10 +1,9 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import distance
-
 from . import sents
 from . import chunks
+from . import token_vocab
 
 class TranslatorType(object):
     UNK      = 0
@@ -73,13 +72,23 @@ class TranslatedChunk(chunks.Chunk):
     def has_translator_type(self, translator_type):
         return translator_type in self._translator_types
 
+    def _get_sents_versions(self):
+        return super()._get_sents_versions() + (self._translated_sents.get_version(), )
+
+    def _get_content(self):
+        return super()._get_content() + (tuple(self._translator_types),
+                                         self._translated_sents.get_content())
+
+    def _translated_dist(self):
+        return token_vocab.nlevenshtein(
+            *token_vocab.to_ids(self._translated_sents.get_all_tokens(),
+                                self._modified_sents.get_all_tokens()))
+
     def measure_dist(self):
-        return distance.nlevenshtein(self.get_translated_tokens(),
-                                     self.get_mod_tokens())
+        return self._get_feature("translated_dist", self._translated_dist)
 
     def lexical_dist(self):
-        return distance.nlevenshtein(self.get_translated_tokens(),
-                                     self.get_mod_tokens())
+        return self._get_feature("translated_dist", self._translated_dist)
 
     def get_translated_sent_holder(self):
         return self._translated_sents
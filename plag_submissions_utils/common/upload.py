@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Parsing of uploaded forms with a size limit.
+
+The form is rejected by its Content-Length before anything is read.
+While the form is parsed, the request body is read through LimitedInput,
+which stops the parsing as soon as the limit is exceeded
+(e.g. if Content-Length is unknown). Uploaded files are written by
+UploadForm to the upload directory once and are moved to their destination
+by save_form_file instead of being copied.
+"""
+
+import cgi
+import os
+import os.path as fs
+import tempfile
+
+#maximum size of the uploaded form (the archive and a few small fields)
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 200 * 1024 ** 2))
+
+BLOCK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_size):
+        if max_size >= 1024 ** 2:
+            limit = "%d МБ" % (max_size // 1024 ** 2)
+        else:
+            limit = "%d байт" % max_size
+        super(UploadTooLarge, self).__init__(
+            "Размер загруженного файла превышает %s" % limit)
+
+
+def check_content_length(environ, max_size = None):
+    """raise UploadTooLarge if the declared size of the request exceeds max_size"""
+    if max_size is None:
+        max_size = MAX_UPLOAD_SIZE
+    try:
+        content_length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > max_size:
+        raise UploadTooLarge(max_size)
+
+class LimitedInput(object):
+    """Reads the request body from fp;
+    raise UploadTooLarge as soon as more than max_size bytes are read."""
+    def __init__(self, fp, max_size):
+        super(LimitedInput, self).__init__()
+        self._fp       = fp
+        self._max_size = max_size
+        self._size     = 0
+
+    def _count(self, data):
+        self._size += len(data)
+        if self._size > self._max_size:
+            raise UploadTooLarge(self._max_size)
+        return data
+
+    def read(self, size = -1):
+        return self._count(self._fp.read(size))
+
+    def readline(self, size = -1):
+        return self._count(self._fp.readline(size))
+
+
+class UploadForm(cgi.FieldStorage):
+    """FieldStorage that writes uploaded files to upload_dir instead of anonymous
+    temporary files, so that they can be moved to their destination.
+    upload_dir is set on subclasses created by parse_form,
+    since parts of the form are created with the class of the form.
+    """
+    upload_dir = None
+
+    def make_file(self):
+        if not self._binary_file:
+            return super(UploadForm, self).make_file()
+        return tempfile.NamedTemporaryFile("wb+", dir = self.upload_dir,
+                                           suffix = ".upl", delete = False)
+
+
+def parse_form(fp, environ, upload_dir, max_size = None, keep_blank_values = False):
+    """Parses the form posted in fp; uploaded files are written to upload_dir.
+    raise UploadTooLarge if the request is larger than max_size
+    (files written before that are left in upload_dir).
+    """
+    if max_size is None:
+        max_size = MAX_UPLOAD_SIZE
+    check_content_length(environ, max_size)
+    form_class = type("UploadForm", (UploadForm,), {"upload_dir": upload_dir})
+    return form_class(fp = LimitedInput(fp, max_size), environ = environ,
+                      keep_blank_values = keep_blank_values)
+
+def save_form_file(field, dest_path, digest = None):
+    """Moves the uploaded file of the field of UploadForm to dest_path
+    (small files are kept in memory by FieldStorage, they are written);
+    digest (hashlib object) is updated with the content if it is set.
+    Returns the size of the file.
+    """
+    path = getattr(field.file, "name", None)
+    if not isinstance(path, str):
+        return save_upload(field.file, dest_path, digest = digest)
+
+    field.file.close()
+    os.rename(path, dest_path)
+    if digest is not None:
+        with open(dest_path, 'rb') as f:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                digest.update(block)
+    return fs.getsize(dest_path)
+
+def save_upload(upl_file, dest_path, max_size = None, digest = None):
+    """Copies uploaded file object to dest_path in blocks;
+    digest (hashlib object) is updated with the content if it is set.
+    raise UploadTooLarge (and removes dest_path) if the file is larger than max_size.
+    """
+    if max_size is None:
+        max_size = MAX_UPLOAD_SIZE
+    size = 0
+    try:
+        with open(dest_path, 'wb') as f:
+            for block in iter(lambda: upl_file.read(BLOCK_SIZE), b''):
+                size += len(block)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+                if digest is not None:
+                    digest.update(block)
+                f.write(block)
+    except UploadTooLarge:
+        os.remove(dest_path)
+        raise
+    return size
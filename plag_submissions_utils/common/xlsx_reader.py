@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Streaming reader of the first sheet of xlsx workbooks.
+
+xlrd.open_workbook parses styles and every sheet of the workbook and
+keeps types of all cells before the first row can be read.
+Only the first sheet of sources_list is used, so iter_first_sheet_rows reads
+just the shared strings and that sheet; rows are parsed and yielded one by one,
+so that chunks are created while the sheet is read. Values of rows are the same
+as xlrd returns (formatting_info=False, ragged rows), empty rows between rows
+and at the end of merged cells are yielded too.
+Anything unusual (xls files, unknown cell types, etc.) is left to xlrd.
+"""
+
+import logging
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import xlrd
+
+U_SSML12 = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+U_ODREL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+U_PKGREL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+XML_SPACE_ATTR = "{http://www.w3.org/XML/1998/namespace}space"
+XML_WHITESPACE = "\t\n \r"
+
+ROW_TAG = U_SSML12 + "row"
+MERGE_CELL_TAG = U_SSML12 + "mergeCell"
+SI_TAG = U_SSML12 + "si"
+T_TAG = U_SSML12 + "t"
+R_TAG = U_SSML12 + "r"
+V_TAG = U_SSML12 + "v"
+F_TAG = U_SSML12 + "f"
+IS_TAG = U_SSML12 + "is"
+
+X12_MAX_ROWS = 2 ** 20
+X12_MAX_COLS = 2 ** 14
+
+ERROR_CODE_FROM_TEXT = {text: code
+                        for code, text in xlrd.biffh.error_text_from_code.items()}
+
+_ESCAPE_RE = re.compile(r'_x[0-9A-Fa-f]{4,4}_')
+
+#column letters -> colx
+_COLX_CACHE = {}
+
+
+class XlsxFormatError(Exception):
+    pass
+
+
+def _unescape(text):
+    if "_" in text:
+        return _ESCAPE_RE.sub(lambda m: chr(int(m.group(0)[2:6], 16)), text)
+    return text
+
+def _cooked_text(elem):
+    text = elem.text
+    if text is None:
+        return ''
+    if elem.get(XML_SPACE_ATTR) != 'preserve':
+        text = text.strip(XML_WHITESPACE)
+    return _unescape(text)
+
+def _get_text_from_si_or_is(elem):
+    accum = []
+    for child in elem:
+        if child.tag == T_TAG:
+            text = _cooked_text(child)
+            if text:
+                accum.append(text)
+        elif child.tag == R_TAG:
+            for tnode in child:
+                if tnode.tag == T_TAG:
+                    text = _cooked_text(tnode)
+                    if text:
+                        accum.append(text)
+    return ''.join(accum)
+
+def _letters_to_colx(letters):
+    colx = _COLX_CACHE.get(letters)
+    if colx is None:
+        colx = 0
+        for c in letters.replace('$', ''):
+            if not 'A' <= c <= 'Z':
+                raise XlsxFormatError("unexpected column %r" % letters)
+            colx = colx * 26 + ord(c) - ord('A') + 1
+        colx -= 1
+        if not 0 <= colx < X12_MAX_COLS:
+            raise XlsxFormatError("unexpected column %r" % letters)
+        _COLX_CACHE[letters] = colx
+    return colx
+
+def _split_cell_name(cell_name):
+    """Returns colx and the row number (as string) of cell_name"""
+    letters = cell_name.rstrip("0123456789")
+    row_num = cell_name[len(letters):]
+    if not row_num or row_num[0] == '0':
+        raise XlsxFormatError("unexpected cell name %r" % cell_name)
+    return _letters_to_colx(letters), row_num
+
+def _cnv_boolean(text):
+    if not text:
+        return 0
+    if text in ("1", "true", "on"):
+        return 1
+    if text in ("0", "false", "off"):
+        return 0
+    raise XlsxFormatError("unexpected boolean value %r" % text)
+
+
+def _parse_rels(stream):
+    """Returns relation id -> (type, path)"""
+    rels = {}
+    for elem in ET.parse(stream).getroot().iter(U_PKGREL + "Relationship"):
+        target = elem.get("Target").replace('\\', '/').lower()
+        if target.startswith('/'):
+            path = target[1:]
+        else:
+            path = 'xl/' + target
+        rels[elem.get("Id")] = (elem.get("Type").split('/')[-1], path)
+    return rels
+
+def _find_first_sheet(stream, rels):
+    for elem in ET.parse(stream).getroot().iter(U_SSML12 + "sheet"):
+        reltype, path = rels[elem.get(U_ODREL + "id")]
+        if reltype == 'worksheet':
+            return path
+    raise XlsxFormatError("there are no sheets")
+
+def _parse_shared_strings(stream):
+    strings = []
+    for _, elem in ET.iterparse(stream):
+        if elem.tag == SI_TAG:
+            strings.append(_get_text_from_si_or_is(elem))
+            elem.clear()
+    return strings
+
+
+def _put_cell(row, colx, value):
+    if colx < len(row):
+        row[colx] = value
+    else:
+        row.extend([''] * (colx - len(row)))
+        row.append(value)
+
+def pad_row(row, ncols):
+    """Missing cells at the end of the row are empty, like in padded rows of xlrd"""
+    if len(row) >= ncols:
+        return row
+    return row + [''] * (ncols - len(row))
+
+
+class _SheetParser(object):
+    """Puts values of cells like xlrd.xlsx.X12Sheet with formatting_info=False.
+    Names of cells without values are parsed only if the next cell has no name.
+    """
+    def __init__(self, shared_strings):
+        super(_SheetParser, self).__init__()
+        self._sst          = shared_strings
+        self._rowx         = -1
+        self._merged_nrows = 0
+
+    def _do_row(self, row_elem):
+        """Returns rowx and values of the row"""
+        row_number = row_elem.get('r')
+        if row_number is None:
+            self._rowx += 1
+        else:
+            self._rowx = int(row_number) - 1
+        if not 0 <= self._rowx < X12_MAX_ROWS:
+            raise XlsxFormatError("unexpected row number %r" % row_number)
+        row = []
+
+        colx = -1
+        #name of the previous cell if it was not parsed
+        skipped_name = None
+        for cell_elem in row_elem:
+            cell_name = cell_elem.get('r')
+            cell_type = cell_elem.get('t', 'n')
+            if not len(cell_elem) and cell_type in ('n', 's', 'inlineStr'):
+                #there is no value
+                if cell_name is None:
+                    if skipped_name is not None:
+                        colx, _ = _split_cell_name(skipped_name)
+                        skipped_name = None
+                    colx += 1
+                else:
+                    skipped_name = cell_name
+                continue
+
+            if cell_name is None:
+                if skipped_name is not None:
+                    colx, _ = _split_cell_name(skipped_name)
+                colx += 1
+            else:
+                colx, cell_row_num = _split_cell_name(cell_name)
+                if row_number is not None and cell_row_num != row_number:
+                    raise XlsxFormatError("cell name %r but row number is %r" %
+                                          (cell_name, row_number))
+            skipped_name = None
+            self._do_cell(cell_elem, cell_type, row, colx)
+        return self._rowx, row
+
+    def _do_cell(self, cell_elem, cell_type, row, colx):
+        tvalue = '#N/A' if cell_type == 'e' else None
+        for child in cell_elem:
+            child_tag = child.tag
+            if child_tag == V_TAG:
+                if cell_type == 'str':
+                    tvalue = _cooked_text(child)
+                else:
+                    tvalue = child.text
+            elif child_tag == IS_TAG and cell_type == 'inlineStr':
+                tvalue = _get_text_from_si_or_is(child)
+            elif child_tag != F_TAG:
+                raise XlsxFormatError("cell type %s has unexpected child %r" %
+                                      (cell_type, child_tag))
+
+        if cell_type == 'n':
+            if tvalue:
+                _put_cell(row, colx, float(tvalue))
+        elif cell_type == 's':
+            if tvalue:
+                _put_cell(row, colx, self._sst[int(tvalue)])
+        elif cell_type == 'str':
+            _put_cell(row, colx, tvalue)
+        elif cell_type == 'b':
+            _put_cell(row, colx, _cnv_boolean(tvalue))
+        elif cell_type == 'e':
+            _put_cell(row, colx, ERROR_CODE_FROM_TEXT[tvalue])
+        elif cell_type == 'inlineStr':
+            if tvalue:
+                _put_cell(row, colx, tvalue)
+        else:
+            raise XlsxFormatError("unknown cell type %r" % cell_type)
+
+    def _do_merge_cell(self, elem):
+        ref = elem.get('ref')
+        if not ref:
+            return
+        refs = ref.split(':')
+        if len(refs) > 2:
+            raise XlsxFormatError("unexpected merged cells %r" % ref)
+        for cell_name in refs:
+            _, row_num = _split_cell_name(cell_name)
+        self._merged_nrows = max(self._merged_nrows, int(row_num))
+
+    def iter_rows(self, stream):
+        nrows = 0
+        for _, elem in ET.iterparse(stream):
+            if elem.tag == ROW_TAG:
+                rowx, row = self._do_row(elem)
+                elem.clear()
+                #rows without values are yielded only before rows with values
+                if not row:
+                    continue
+                if rowx < nrows:
+                    raise XlsxFormatError("unexpected row number %d" % (rowx + 1))
+                while nrows < rowx:
+                    yield []
+                    nrows += 1
+                yield row
+                nrows += 1
+            elif elem.tag == MERGE_CELL_TAG:
+                self._do_merge_cell(elem)
+
+        #merged cells extend the sheet like in xlrd
+        while nrows < self._merged_nrows:
+            yield []
+            nrows += 1
+
+
+def _iter_xlsx_rows(path):
+    """raise XlsxFormatError (or any parse error) if the file can't be read by this reader"""
+    with zipfile.ZipFile(path) as zf:
+        #some third party files use lower case names
+        names = {name.replace('\\', '/').lower(): name for name in zf.namelist()}
+        if 'xl/workbook.xml' not in names:
+            raise XlsxFormatError("there is no workbook")
+
+        with zf.open(names['xl/_rels/workbook.xml.rels']) as stream:
+            rels = _parse_rels(stream)
+        with zf.open(names['xl/workbook.xml']) as stream:
+            sheet_path = _find_first_sheet(stream, rels)
+
+        shared_strings = []
+        if 'xl/sharedstrings.xml' in names:
+            with zf.open(names['xl/sharedstrings.xml']) as stream:
+                shared_strings = _parse_shared_strings(stream)
+
+        with zf.open(names[sheet_path]) as stream:
+            for row in _SheetParser(shared_strings).iter_rows(stream):
+                yield row
+
+def iter_first_sheet_rows(path):
+    """Yields lists of values of rows of the first sheet of the workbook.
+    Unlike rows of xlrd, they are not padded to the same length (see pad_row).
+    If the reader fails in the middle of the sheet, the rest of rows is read by xlrd.
+    """
+    nrows = 0
+    if zipfile.is_zipfile(path):
+        try:
+            for row in _iter_xlsx_rows(path):
+                yield row
+                nrows += 1
+            return
+        except Exception as e:
+            logging.debug("failed to read %s, fallback to xlrd: %s", path, e)
+    sheet = xlrd.open_workbook(path).sheet_by_index(0)
+    for rowx in range(nrows, sheet.nrows):
+        yield sheet.row_values(rowx)
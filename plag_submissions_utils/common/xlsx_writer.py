@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Streaming export of rows to xlsx.
+
+openpyxl.Workbook keeps a Cell object for every value until the workbook
+is saved. Write-only workbook writes cells to the sheet as rows are
+appended, so memory does not grow with the number of rows.
+The only difference of write-only sheets is the missing dimension element;
+it is optional, readers (Excel, LibreOffice, xlrd, openpyxl) calculate
+the used range from the rows.
+"""
+
+import logging
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+
+
+def write_rows(out_filename, rows, skip_invalid = False):
+    """Writes rows (iterable of tuples, e.g. a generator) to the only sheet of a new workbook.
+    Rows should not be empty: unlike the ordinary sheet, write-only one
+    writes an element for an empty row.
+    A row with a value that can't be written (illegal characters, unknown type)
+    is logged and skipped if skip_invalid is set, otherwise the error is raised
+    and nothing is written.
+    """
+    wb = openpyxl.Workbook(write_only = True)
+    ws = wb.create_sheet()
+
+    #write-only sheet is broken by an error in the middle of a row,
+    #so values of the row are checked before it is written
+    check_cell = WriteOnlyCell(ws)
+    for row in rows:
+        try:
+            for value in row:
+                check_cell.value = value
+        except Exception as e:
+            if not skip_invalid:
+                raise
+            logging.error("Failed to append row to xlsx: %s\nrow: %s", e, row)
+            continue
+        ws.append(row)
+
+    wb.save(filename = out_filename)
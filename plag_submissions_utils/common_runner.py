@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import tempfile
 import shutil
 import logging
 import importlib
@@ -11,6 +10,8 @@ from plag_submissions_utils.common.errors import ErrSeverity
 from plag_submissions_utils.common.version import determine_version_by_id
 from plag_submissions_utils.common.chunks import ChunkOpts
 from plag_submissions_utils.common.extract_utils import extract_submission
+from plag_submissions_utils.common.extract_utils import make_temp_dir
+from plag_submissions_utils.common import subm_cache
 
 def _metrics_violations_cnt(metrics, level):
     return len([1 for m in metrics if m.get_violation_level() == level] )
@@ -36,7 +37,7 @@ def fatal_errors_cnt(metrics, errors, stat):
 
 
 def run(archive_path, version):
-    temp_dir = tempfile.mkdtemp()
+    temp_dir = make_temp_dir()
     try:
         mod = _import(version)
 
@@ -68,12 +69,16 @@ def create_chunks(susp_id, meta_filepath, version=None,
     if version is None:
         version = determine_version_by_id(susp_id)
 
+    cache = subm_cache.get_subm_cache()
+    if cache is not None:
+        return cache.create_chunks(getattr(_import(version), 'create_chunks'),
+                                   meta_filepath, version, opts)
     return _create_chunks(version, meta_filepath, opts)
 
 
 def fix(archive_path, out_filename, version,
         spell_checker_whitelist = None):
-    temp_dir, new_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    temp_dir, new_dir = make_temp_dir(), make_temp_dir()
     try:
         mod = _import(version)
 
@@ -9,7 +9,6 @@ import json
 import os
 import os.path as fs
 import logging
-import tempfile
 import shutil
 import hashlib
 import sys
@@ -17,9 +16,14 @@ import sys
 from .common.chunks import ModType
 from .common.chunks import mod_types_to_str
 from .common.extract_utils import extract_submission
+from .common.extract_utils import make_temp_dir
 from .common.source_doc import load_sources_docs
+from .common import doc_cache
+from .common import source_doc
+from .common import subm_cache
 from .common import src_mapping
 from .common.submissions import run_over_submissions
+from .common.submissions import SUBMISSIONS_WORKERS
 from .common.text_proc import seg_text
 from . import common_runner
 
@@ -35,7 +39,7 @@ class SrcRetrievalMetaGenerator:
             ids = _load_ids(opts.ids_file)
             self._mapping = create_mapping(opts.subm_dir,
                                            use_filename_as_id = opts.use_filename_as_id,
-                                           ids = ids)
+                                           ids = ids, workers = opts.workers)
 
         self._src_map = None
         self._init_src_map()
@@ -127,7 +131,8 @@ class TextAlignmentTaskGenerator(object):
             self._mapping.from_csv(opts.mapping)
         else:
             self._mapping = create_mapping(opts.subm_dir,
-                                           use_filename_as_id = opts.use_filename_as_id)
+                                           use_filename_as_id = opts.use_filename_as_id,
+                                           workers = opts.workers)
 
         self._xml_map = {}
         self._pairs = []
@@ -340,14 +345,16 @@ class Generator(object):
         self._opts = opts
         self._out_pipes = out_pipes
 
-    def process_chunk(self, susp_doc, chunk, sources):
+    def calc_chunk_offsets(self, chunk, sources):
+        """Returns offsets of original sentences of the chunk in its source
+        or None if the chunk should be skipped.
+        """
         if chunk.get_mod_type() == ModType.ORIG or not chunk.get_orig_doc_filename():
-            return
+            return None
         source = sources[chunk.get_orig_doc_filename()]
-        offsets = []
-        for sent in chunk.get_orig_sents():
-            offsets.append(source.get_sent_offs(sent))
+        return source.get_sents_offs(chunk.get_orig_sents())
 
+    def emit_chunk(self, susp_doc, chunk, offsets):
         for pipe in self._out_pipes:
             try:
                 pipe(susp_doc, chunk, offsets)
@@ -355,7 +362,16 @@ class Generator(object):
                 logging.warning("Id: %s - Failed to process offsets by %s: %s",
                                 susp_doc.get_susp_id(), pipe.get_name(), e)
 
-    def process_extracted_archive(self, susp_id, sources_dir, meta_file_path):
+    def process_chunk(self, susp_doc, chunk, sources):
+        offsets = self.calc_chunk_offsets(chunk, sources)
+        if offsets is not None:
+            self.emit_chunk(susp_doc, chunk, offsets)
+
+    def compute_archive(self, susp_id, sources_dir, meta_file_path):
+        """Computes everything the out pipes need.
+        It doesn't change the state of generator, so it may be run in a worker process.
+        Returns (chunks, sources, offsets of every chunk).
+        """
         chunks, chunks_errors = common_runner.create_chunks(susp_id, meta_file_path,
                                                             self._opts.version)
 
@@ -363,14 +379,25 @@ class Generator(object):
             logging.error("Id: %s - Errors while creating chunks:\n%s", susp_id,
                           "\n".join(str(e) for e in chunks_errors))
         sources = load_sources_docs(sources_dir)
-        susp_doc = SuspDocGenerator(susp_id)
-        susp_doc.add_chunks(chunks)
+        chunks_offsets = []
         for chunk in chunks:
+            offsets = None
             try:
-                self.process_chunk(susp_doc, chunk, sources)
+                offsets = self.calc_chunk_offsets(chunk, sources)
             except Exception as e:
                 logging.warning("Id: %s - Failed to process chunk %s: %s",
                                 susp_id, chunk.get_chunk_id(), e)
+            chunks_offsets.append(offsets)
+        return chunks, sources, chunks_offsets
+
+    def emit_archive(self, susp_id, result):
+        """Passes results of compute_archive to the out pipes."""
+        chunks, sources, chunks_offsets = result
+        susp_doc = SuspDocGenerator(susp_id)
+        susp_doc.add_chunks(chunks)
+        for chunk, offsets in zip(chunks, chunks_offsets):
+            if offsets is not None:
+                self.emit_chunk(susp_doc, chunk, offsets)
 
         for pipe in self._out_pipes:
             try:
@@ -379,9 +406,13 @@ class Generator(object):
                 logging.warning("Id: %s - Failed to finalize susp: %s",
                                 susp_doc.get_susp_id(), e)
 
+    def process_extracted_archive(self, susp_id, sources_dir, meta_file_path):
+        self.emit_archive(susp_id,
+                          self.compute_archive(susp_id, sources_dir, meta_file_path))
+
     def process_archive(self, archive_path, susp_id):
 
-        temp_dir = tempfile.mkdtemp()
+        temp_dir = make_temp_dir()
         try:
             sources_dir, meta_file_path = extract_submission(archive_path, temp_dir)
             self.process_extracted_archive(susp_id, sources_dir, meta_file_path)
@@ -392,9 +423,11 @@ class Generator(object):
     def process_submissions(self):
         ids = _load_ids(self._opts.ids_file)
         run_over_submissions(self._opts.subm_dir,
-                             self.process_extracted_archive,
+                             self.compute_archive,
                              self._opts.limit_by_version,
-                             include_ids_set = ids)
+                             include_ids_set = ids,
+                             workers = self._opts.workers,
+                             merge_result = self.emit_archive)
 
 
 class SuspDocGenerator:
@@ -434,8 +467,8 @@ class SuspDocGenerator:
 
 def write_sources_to_files(mapping, susp_id, sources, out_dir,
                            ext_id_as_filename = False):
-    if not fs.exists(out_dir):
-        os.makedirs(out_dir)
+    #it may be called in parallel by workers of run_over_submissions
+    os.makedirs(out_dir, exist_ok = True)
 
     for src_filename in sources:
         source_doc = sources[src_filename]
@@ -451,15 +484,18 @@ def write_sources_to_files(mapping, susp_id, sources, out_dir,
 
 
 def create_mapping(subm_dir, limit_by_version = None,
-                   use_filename_as_id = False, ids = None):
+                   use_filename_as_id = False, ids = None, workers = None):
     mapping = src_mapping.SrcMap()
 
     def arc_proc(susp_id, sources_dir, _):
-        src_mapping.add_src_from_dir(susp_id, sources_dir, mapping,
+        susp_mapping = src_mapping.SrcMap()
+        src_mapping.add_src_from_dir(susp_id, sources_dir, susp_mapping,
                                      use_filename_as_id)
+        return susp_mapping
 
     run_over_submissions(subm_dir, arc_proc, limit_by_version,
-                         include_ids_set = ids)
+                         include_ids_set = ids, workers = workers,
+                         merge_result = lambda _, susp_mapping: mapping.merge(susp_mapping))
     return mapping
 
 #cli support
@@ -507,7 +543,7 @@ def dumb_dump(opts):
 def gen_map(opts):
     ids = _load_ids(opts.ids_file)
     mapping = create_mapping(opts.subm_dir, opts.limit_by_version,
-                             opts.use_filename_as_id, ids)
+                             opts.use_filename_as_id, ids, opts.workers)
     with open(opts.mapping_file, 'w') as f:
         mapping.to_csv(f)
 
@@ -522,7 +558,7 @@ def create_sources(opts):
                                opts.ext_id_as_filename)
 
     run_over_submissions(opts.subm_dir, arc_proc, opts.limit_by_version,
-                         include_ids_set = ids)
+                         include_ids_set = ids, workers = opts.workers)
 
 def create_susp_docs(opts):
     def arc_proc(susp_id, _, meta_file_path):
@@ -533,15 +569,14 @@ def create_susp_docs(opts):
             susp_gen = SuspDocGenerator(susp_id)
             susp_gen.add_chunks(chunks)
             susp_gen.write_susp_doc(f)
-    if not fs.exists(opts.out_dir):
-        os.makedirs(opts.out_dir)
+    os.makedirs(opts.out_dir, exist_ok = True)
 
     ids = _load_ids(opts.ids_file)
     run_over_submissions(opts.subm_dir, arc_proc, opts.limit_by_version,
-                         include_ids_set = ids)
+                         include_ids_set = ids, workers = opts.workers)
 
 
-def main():
+def create_arg_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("--verbose", "-v", action="store_true", default = False)
     parser.add_argument("--version", "-V", default=None,
@@ -550,6 +585,18 @@ def main():
     parser.add_argument("--limit_by_version", "-L", default=None,
                         help="process only essays with specified version."
                         "If not specified, process all found essays.")
+    parser.add_argument("--doc_cache_dir", "-C", default=doc_cache.DOC_CACHE_DIR,
+                        help="directory for caching of converted source documents."
+                        " If it is not specified, sources are converted every time.")
+    parser.add_argument("--subm_cache_dir", "-S", default=subm_cache.SUBM_CACHE_DIR,
+                        help="directory for caching of extracted submissions and parsed chunks."
+                        " If it is not specified, submissions are extracted on every pass."
+                        " Converted sources are cached there too, unless --doc_cache_dir is set.")
+    parser.add_argument("--workers", "-j", type=int, default=SUBMISSIONS_WORKERS,
+                        help="number of processes that process submissions."
+                        " Outputs are written in the same order as in the single process.")
+    parser.add_argument("--sources_workers", type=int, default=source_doc.LOAD_SOURCES_WORKERS,
+                        help="number of processes that convert source documents of a submission")
 
     subparsers = parser.add_subparsers(help='sub-command help')
 
@@ -660,17 +707,29 @@ def main():
     pan_parser.add_argument("--ids_file", "-I", default='',
                             help = "use only those ids, otherwise process everything")
     pan_parser.set_defaults(func = create_pan_meta)
-    args = parser.parse_args()
+    return parser
+
+def main():
+    args = create_arg_parser().parse_args()
 
     FORMAT="%(asctime)s %(levelname)s: %(name)s: %(message)s"
     logging.basicConfig(level = logging.DEBUG if args.verbose else logging.INFO,
                         format = FORMAT)
+    cache = doc_cache.configure(subm_cache.get_doc_cache_dir(args.doc_cache_dir,
+                                                             args.subm_cache_dir))
+    subm_cache_inst = subm_cache.configure(args.subm_cache_dir)
+    source_doc.LOAD_SOURCES_WORKERS = args.sources_workers
     try:
 
         args.func(args)
     except Exception as e:
         logging.exception("failed to gen: %s ", e)
 
+    if cache is not None:
+        logging.info("%s", cache)
+    if subm_cache_inst is not None:
+        logging.info("%s", subm_cache_inst)
+
 
 if __name__ == '__main__' :
     main()
@@ -678,6 +737,7 @@ if __name__ == '__main__' :
 class Opts(object):
     def __init__(self):
         self.version = None
+        self.workers = None
 
 def test():
 
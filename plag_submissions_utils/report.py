@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Rendering of the html report of the checked submission.
+
+It is shared by checker_cgi and checker_service,
+so it should not import anything heavy.
+"""
+
+import os.path as fs
+
+from jinja2 import Template
+
+REPORT_TEMPLATE_PATH = fs.join(fs.dirname(fs.dirname(fs.realpath(__file__))),
+                               "data/templates/report.html.j2")
+
+REPORT_TEMPLATE = None
+
+
+def get_report_template():
+    global REPORT_TEMPLATE
+    if REPORT_TEMPLATE is None:
+        with open(REPORT_TEMPLATE_PATH, 'r', encoding = 'utf-8') as f:
+            REPORT_TEMPLATE = Template(f.read())
+    return REPORT_TEMPLATE
+
+def render_report(checked_filename, metrics, errors):
+    return get_report_template().render({
+        "checked_filename": checked_filename,
+        "errors" : errors,
+        "metrics": metrics
+    })
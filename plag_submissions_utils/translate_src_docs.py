@@ -185,9 +185,10 @@ class Translator(object):
             return
 
         source = sources[source_id]
-        for sent_num, sent in enumerate(chunk.get_orig_sents()):
-            sent_text = text_proc.preprocess_text(sent.strip())
-            res = source.get_sent_offs(sent_text, preproc_sent = False)
+        sent_texts = [text_proc.preprocess_text(sent.strip())
+                      for sent in chunk.get_orig_sents()]
+        offsets = source.get_sents_offs(sent_texts, preproc_sent = False)
+        for sent_num, (sent_text, res) in enumerate(zip(sent_texts, offsets)):
             if res is None:
                 logging.warning("Chunk %d, sent %d: unable to find sent in sources",
                                 chunk.get_id(), sent_num)
@@ -405,10 +406,11 @@ class Translator(object):
                 ids = frozenset([int(l) for l in f])
         else:
             ids = None
+        #stat of the translator is updated by every submission, so it is not forked
         run_over_submissions(self._opts.subm_dir,
                              self._process_extracted_archive,
                              self._opts.limit_by_version,
-                             include_ids_set = ids)
+                             include_ids_set = ids, workers = 1)
 
         logging.info("Stat: %s", self._stat)
 
@@ -2,11 +2,11 @@
 # coding: utf-8
 
 
+import itertools
 import logging
 
-import xlrd
-import openpyxl
-
+from plag_submissions_utils.common import xlsx_reader
+from plag_submissions_utils.common import xlsx_writer
 from plag_submissions_utils.common.processor import BasicProcessor
 from plag_submissions_utils.common.processor import BasicProcesssorOpts
 from plag_submissions_utils.common.errors import ErrSeverity
@@ -84,21 +84,25 @@ class Processor(BasicProcessor):
         return create_chunks(inp_file)
 
 
+#number column and columns of the chunk; missing cells are empty
+SHEET_NCOLS = 5
+
 def create_chunks(inp_file, opts = ChunkOpts()):
     errors = []
-    book = xlrd.open_workbook(inp_file)
-    sheet = book.sheet_by_index(0)
-    if sheet.nrows <= 2:
+    rows = (xlsx_reader.pad_row(row, SHEET_NCOLS)
+            for row in xlsx_reader.iter_first_sheet_rows(inp_file))
+    first_rows = list(itertools.islice(rows, 3))
+    if len(first_rows) <= 2:
         errors.append(Error("Sheet contains 2 or less rows!!",
                             ErrSeverity.HIGH))
         return [], errors
 
     #TODO find other columns; Do not use number column at all
-    if sheet.row_values(0)[0].lower().find("номер") == -1:
+    if first_rows[0][0].lower().find("номер") == -1:
         #no one follows the guide
         #there may be no header or it may be # or № or 'Меня зовут Вася'
         try:
-            int(sheet.row_values(1)[0])
+            int(first_rows[1][0])
             #hmm this column contains number it must be a 'Номер' column
             main_content_offs = 1
         except ValueError:
@@ -108,8 +112,7 @@ def create_chunks(inp_file, opts = ChunkOpts()):
         main_content_offs = 1
 
     chunks = []
-    for rownum in range(1, sheet.nrows):
-        row_vals = sheet.row_values(rownum)
+    for rownum, row_vals in enumerate(itertools.chain(first_rows[1:], rows), 1):
         try:
             sent_num = rownum + 1
             chunk = _try_create_chunk(
@@ -166,11 +169,10 @@ def chunk_to_row(chunk):
         mod_type_str)
 
 
-def create_xlsx_from_chunks(chunks, out_filename):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.append(("modified text", "original text", "src", "mod type"))
+def _iter_rows(chunks):
+    yield ("modified text", "original text", "src", "mod type")
     for chunk in chunks:
-        ws.append(chunk_to_row(chunk))
+        yield chunk_to_row(chunk)
 
-    wb.save(filename = out_filename)
+def create_xlsx_from_chunks(chunks, out_filename):
+    xlsx_writer.write_rows(out_filename, _iter_rows(chunks))
@@ -2,11 +2,11 @@
 # coding: utf-8
 
 
+import itertools
 import logging
 
-import openpyxl
-import xlrd
-
+from plag_submissions_utils.common import xlsx_reader
+from plag_submissions_utils.common import xlsx_writer
 from plag_submissions_utils.common.processor import BasicProcessor
 from plag_submissions_utils.common.processor import BasicProcesssorOpts
 from plag_submissions_utils.common.errors import ErrSeverity
@@ -144,16 +144,20 @@ def _check_headers(first_row):
 
 
 
+#number column and columns of the chunk; missing cells are empty
+SHEET_NCOLS = 7
+
 def create_chunks(inp_file, opts = ChunkOpts()):
     errors = []
-    book = xlrd.open_workbook(inp_file)
-    sheet = book.sheet_by_index(0)
-    if sheet.nrows <= 2:
+    rows = (xlsx_reader.pad_row(row, SHEET_NCOLS)
+            for row in xlsx_reader.iter_first_sheet_rows(inp_file))
+    first_rows = list(itertools.islice(rows, 3))
+    if len(first_rows) <= 2:
         errors.append(Error("Sheet contains 2 or less rows!!",
                             ErrSeverity.HIGH))
         return [], errors
 
-    headers = sheet.row_values(0)
+    headers = first_rows[0]
     err = _check_headers(headers)
     if err is not None:
         errors.append(Error(err,
@@ -162,8 +166,7 @@ def create_chunks(inp_file, opts = ChunkOpts()):
 
     chunks = []
     delete_first_column = _is_number_first_col(headers)
-    for rownum in range(1, sheet.nrows):
-        row_vals = sheet.row_values(rownum)
+    for rownum, row_vals in enumerate(itertools.chain(first_rows[1:], rows), 1):
         try:
             sent_num = rownum + 1
 
@@ -263,16 +266,14 @@ def chunk_to_row(chunk):
         chunk.get_translated_text(),
         ) + orig_colls
 
-def create_xlsx_from_chunks(chunks, out_filename):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.append(("название файла документа", "типы сокрытия", "переводчик",
-               "эссе", "исходный фрагмент", "исходное предложение"))
+def _iter_rows(chunks):
+    yield ("название файла документа", "типы сокрытия", "переводчик",
+           "эссе", "исходный фрагмент", "исходное предложение")
     for chunk in chunks:
         try:
-            row = chunk_to_row(chunk)
-            ws.append(row)
+            yield chunk_to_row(chunk)
         except Exception as e:
-            logging.error("Failed to append chunk to xlsx: %s\nchunk: %s", e, row)
+            logging.error("Failed to append chunk to xlsx: %s\nchunk: %s", e, chunk)
 
-    wb.save(filename = out_filename)
+def create_xlsx_from_chunks(chunks, out_filename):
+    xlsx_writer.write_rows(out_filename, _iter_rows(chunks), skip_invalid = True)
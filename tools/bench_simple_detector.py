@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Compares SimpleDetector and RollingHashDetector on a generated essay.
+
+usage: bench_simple_detector.py [sents_cnt]
+"""
+
+import os.path as fs
+import random
+import sys
+import time
+
+sys.path.insert(0,
+                fs.dirname(fs.dirname(fs.realpath(__file__))))
+
+from plag_submissions_utils.common.simple_detector import SimpleDetector
+from plag_submissions_utils.common.simple_detector import RollingHashDetector
+from plag_submissions_utils.common.simple_detector import calc_originality_by_detections
+
+WORDS = ["текст", "предложение", "система", "анализ", "данные", "метод",
+         "результат", "работа", "исследование", "модель", "процесс", "задача",
+         "text", "method", "data", "model"]
+
+def gen_sent(rnd):
+    words = [rnd.choice(WORDS) for _ in range(rnd.randint(6, 16))]
+    return " ".join(words).capitalize() + rnd.choice([".", "!", "?", ","])
+
+def gen_texts(sents_cnt, seed = 0):
+    """Returns (modified, original) texts;
+    a half of modified sentences are copied from original ones."""
+    rnd = random.Random(seed)
+    orig_sents = [gen_sent(rnd) for _ in range(sents_cnt)]
+    mod_sents = [s if rnd.random() < 0.5 else gen_sent(rnd) for s in orig_sents]
+    return "\n".join(mod_sents), "\n".join(orig_sents)
+
+def bench(detector, susp_text, src_text):
+    start = time.time()
+    detections = detector(susp_text, src_text)
+    return detections, time.time() - start
+
+def main():
+    sents_cnt = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    susp_text, src_text = gen_texts(sents_cnt)
+    print("sentences: %d, essay length: %d" % (sents_cnt, len(susp_text)))
+
+    results = []
+    for detector in [SimpleDetector(), RollingHashDetector()]:
+        detections, elapsed = bench(detector, susp_text, src_text)
+        print("%-20s %8.2fs detections: %d, originality: %.4f" % (
+            type(detector).__name__, elapsed, len(detections),
+            calc_originality_by_detections(detections, susp_text)))
+        results.append(detections)
+
+    print("same detections: %s" % (results[0] == results[1]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Compares the cost of language detection of SpellChecker
+by langdetect and by the script of the text on chunks of a submission.
+
+usage: bench_spell_lang.py [archive [version]]
+"""
+
+import os.path as fs
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0,
+                fs.dirname(fs.dirname(fs.realpath(__file__))))
+
+import langdetect
+
+from plag_submissions_utils import common_runner
+from plag_submissions_utils.common import text_proc
+from plag_submissions_utils.common.extract_utils import extract_submission
+
+def load_texts(archive, version):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        _, meta_filepath = extract_submission(archive, temp_dir)
+        chunks, _ = common_runner.create_chunks(None, meta_filepath, version = version)
+    finally:
+        shutil.rmtree(temp_dir)
+    return [c.get_mod_text() for c in chunks if c.get_mod_text()]
+
+def detect_by_script(text):
+    lang = text_proc.detect_lang_by_script(text)
+    if lang is None:
+        return langdetect.detect(text), True
+    return lang, False
+
+def bench(detect, texts, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        results = [detect(t) for t in texts]
+    return results, (time.time() - start) / (repeat * len(texts))
+
+def main():
+    archive = sys.argv[1] if len(sys.argv) > 1 else "data/test_data_v3/test.zip"
+    version = sys.argv[2] if len(sys.argv) > 2 else "3"
+    texts = load_texts(archive, version)
+    print("chunks: %d" % len(texts))
+
+    #the first call loads language profiles
+    start = time.time()
+    langdetect.detect(texts[0])
+    print("%-20s %10.2fms" % ("langdetect init", (time.time() - start) * 1000.0))
+
+    before, before_time = bench(langdetect.detect, texts, 3)
+    print("%-20s %10.1fus per chunk" % ("langdetect", before_time * 1e6))
+
+    after, after_time = bench(detect_by_script, texts, 3)
+    fallbacks = sum(1 for _, fallback in after if fallback)
+    print("%-20s %10.1fus per chunk, langdetect fallbacks: %d" % (
+        "script", after_time * 1e6, fallbacks))
+
+    same = sum(1 for b, (a, _) in zip(before, after) if a == b)
+    print("same language: %d of %d, speedup: %.1fx" % (same, len(texts),
+                                                      before_time / after_time))
+
+if __name__ == '__main__':
+    main()
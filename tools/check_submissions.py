@@ -3,6 +3,7 @@
 
 
 # import os
+import argparse
 import os.path as fs
 import sys
 import glob
@@ -11,17 +12,23 @@ sys.path.insert(0,
                 fs.dirname(fs.dirname(fs.realpath(__file__))))
 
 import plag_submissions_utils.common_runner as cr
+from plag_submissions_utils.common import processor
+from plag_submissions_utils.common import resources
+#registers dictionaries of spell checkers
+from plag_submissions_utils.common import checkers
 from plag_submissions_utils.common.version import determine_version_by_id
 
-results=[("id", "fatal", "serious", "medium")]
-if len(sys.argv) == 1:
-    print("<data_dir> [ids_list]")
+parser = argparse.ArgumentParser()
+parser.add_argument("data_dir")
+parser.add_argument("ids_list", nargs='?', default=None)
+parser.add_argument("--chunks_workers", "-j", type=int, default=processor.CHECK_CHUNKS_WORKERS,
+                    help="number of processes that check chunks of a submission")
+args = parser.parse_args()
+processor.CHECK_CHUNKS_WORKERS = args.chunks_workers
 
-data_dir=sys.argv[1]
-if len(sys.argv) == 3:
-    ids_list_path=sys.argv[2]
-else:
-    ids_list_path = None
+results=[("id", "fatal", "serious", "medium")]
+data_dir=args.data_dir
+ids_list_path=args.ids_list
 
 if ids_list_path is None:
     glob_path = data_dir + "/*"
@@ -30,6 +37,10 @@ else:
     with open(ids_list_path, 'r') as f:
         ids = [l.strip() for l in f]
 
+#checkers of all submissions share dictionaries
+resources.preload()
+sys.stderr.write("loaded resources: %s\n" % resources.format_load_times())
+
 for sid in ids:
     glob_path=data_dir + "/" + str(sid).zfill(3) + "/*"
 